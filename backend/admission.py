@@ -0,0 +1,179 @@
+"""
+Admission control for expensive endpoints
+Report, analysis and scrape-trigger routes are grouped behind per-group
+concurrency limits with a short bounded wait queue. When the queue is full,
+or a request waits longer than the queue allows, the request fails fast with
+503 and a Retry-After estimate instead of piling up until everything times
+out. Cheap routes (/health, cached reads) are never gated, so they stay fast
+under a burst of heavy requests.
+"""
+
+import asyncio
+import contextlib
+import logging
+import math
+import os
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import Depends, HTTPException
+
+logger = logging.getLogger(__name__)
+
+# group=limit pairs; the Pi4 backend runs one or two of each at a time
+ADMISSION_LIMITS = os.getenv("ADMISSION_LIMITS", "reports=2,analysis=2,scrape=1")
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "4"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10"))
+DEFAULT_GROUP_LIMIT = 2
+# Weight of the latest request in the average service time
+SERVICE_TIME_SMOOTHING = 0.2
+
+
+def parse_limits(value: str) -> Dict[str, int]:
+    """``"reports=2,scrape=1"`` -> ``{"reports": 2, "scrape": 1}``"""
+    limits = {}
+    for item in value.split(","):
+        name, _, limit = item.partition("=")
+        if name.strip() and limit.strip():
+            limits[name.strip()] = max(1, int(limit))
+    return limits
+
+
+class Overloaded(Exception):
+    def __init__(self, group: str, retry_after: int, reason: str):
+        super().__init__(f"{group} is overloaded ({reason})")
+        self.group = group
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionGate:
+    """Concurrency limit plus a bounded, time-limited wait queue"""
+
+    def __init__(self, name: str, limit: int, queue_size: int = ADMISSION_QUEUE_SIZE,
+                 max_wait: float = ADMISSION_MAX_WAIT_SECONDS):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self._slots = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.avg_service_seconds: Optional[float] = None
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from the average service time"""
+        service = self.avg_service_seconds or 1.0
+        return max(1, math.ceil(service * (self.waiting + 1) / self.limit))
+
+    @contextlib.asynccontextmanager
+    async def admit(self):
+        """Hold a slot for the duration of the block; raises Overloaded"""
+        if not self._slots.locked():
+            # A slot is free: take it without counting as a waiter
+            await self._slots.acquire()
+        elif self.waiting >= self.queue_size:
+            self.rejected_queue_full += 1
+            raise Overloaded(self.name, self.retry_after(), "queue full")
+        else:
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.max_wait)
+            except asyncio.TimeoutError:
+                self.rejected_timeout += 1
+                raise Overloaded(self.name, self.retry_after(), "queue wait timed out")
+            finally:
+                self.waiting -= 1
+
+        self.admitted += 1
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.avg_service_seconds = (
+                elapsed if self.avg_service_seconds is None
+                else (1 - SERVICE_TIME_SMOOTHING) * self.avg_service_seconds + SERVICE_TIME_SMOOTHING * elapsed
+            )
+            self.in_flight -= 1
+            self._slots.release()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "max_wait_seconds": self.max_wait,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_service_seconds": round(self.avg_service_seconds, 3) if self.avg_service_seconds else None,
+        }
+
+
+class AdmissionController:
+    """Named gates shared by the routes of each group"""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None,
+                 queue_size: int = ADMISSION_QUEUE_SIZE, max_wait: float = ADMISSION_MAX_WAIT_SECONDS):
+        self.limits = dict(limits or {})
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.gates: Dict[str, AdmissionGate] = {}
+
+    def gate(self, group: str) -> AdmissionGate:
+        if group not in self.gates:
+            self.gates[group] = AdmissionGate(
+                group, self.limits.get(group, DEFAULT_GROUP_LIMIT), self.queue_size, self.max_wait
+            )
+        return self.gates[group]
+
+    def guard(self, group: str):
+        """Route dependency: ``dependencies=[admission_control.guard("reports")]``"""
+        gate = self.gate(group)
+
+        async def admitted():
+            try:
+                async with gate.admit():
+                    yield
+            except Overloaded as o:
+                logger.warning(f"Shedding load: {o}")
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Server busy ({o.reason}); retry later",
+                    headers={"Retry-After": str(o.retry_after)},
+                )
+
+        return Depends(admitted)
+
+    def status(self) -> Dict[str, Any]:
+        return {name: gate.status() for name, gate in self.gates.items()}
+
+    def metric_families(self):
+        """Gate gauges and counters for /metrics"""
+        gates = sorted(self.gates.items())
+        return [
+            ("admission_in_flight", "gauge", "Requests holding a slot",
+             [({"group": name}, gate.in_flight) for name, gate in gates]),
+            ("admission_waiting", "gauge", "Requests waiting for a slot",
+             [({"group": name}, gate.waiting) for name, gate in gates]),
+            ("admission_admitted_total", "counter", "Requests admitted",
+             [({"group": name}, gate.admitted) for name, gate in gates]),
+            ("admission_rejected_total", "counter", "Requests shed with 503",
+             [({"group": name, "reason": reason}, count) for name, gate in gates
+              for reason, count in (("queue_full", gate.rejected_queue_full),
+                                    ("timeout", gate.rejected_timeout))]),
+            ("admission_avg_service_seconds", "gauge", "Smoothed time a request holds a slot",
+             [({"group": name}, round(gate.avg_service_seconds or 0.0, 6)) for name, gate in gates]),
+        ]
+
+
+admission_control = AdmissionController(parse_limits(ADMISSION_LIMITS))
@@ -7,7 +7,7 @@ Comprehensive solution for bypassing Basketball-Reference anti-bot measures
 import asyncio
 import random
 import time
-from typing import List, Dict, Optional, Any
+from typing import TYPE_CHECKING, List, Dict, Optional, Any
 import json
 import os
 import logging
@@ -15,11 +15,11 @@ from datetime import datetime, timedelta
 from pathlib import Path
 
 import httpx
-import aiofiles
-from fake_useragent import UserAgent
-from bs4 import BeautifulSoup
-import cloudscraper
-from httpx_socks import AsyncProxyTransport
+
+# aiofiles, fake_useragent, bs4, cloudscraper and httpx_socks are imported
+# at first use; they dominate cold-start time on the Pi
+if TYPE_CHECKING:
+    from httpx_socks import AsyncProxyTransport
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -29,12 +29,11 @@ logger = logging.getLogger(__name__)
 class AntiBottingScraper:
     """Advanced scraper with multiple anti-detection strategies"""
     
+    _UA_UNSET = object()
+
     def __init__(self):
-        try:
-            self.ua = UserAgent(platforms=['pc'], browsers=['chrome', 'firefox', 'safari'])
-        except Exception:
-            # Fallback user agent if fake-useragent fails
-            self.ua = None
+        # UserAgent loads its browser database, so it is created on first request
+        self._ua = self._UA_UNSET
         
         self.session_cookies = {}
         self.request_delays = []
@@ -49,10 +48,22 @@ class AntiBottingScraper:
         self.session_cookies = {}
         self.request_delays = []
         
+    @property
+    def ua(self):
+        if self._ua is self._UA_UNSET:
+            try:
+                from fake_useragent import UserAgent
+                self._ua = UserAgent(platforms=['pc'], browsers=['chrome', 'firefox', 'safari'])
+            except Exception:
+                # Fallback user agent if fake-useragent fails
+                self._ua = None
+        return self._ua
+
     async def load_session_data(self):
         """Load persistent session data"""
         if self.session_file.exists():
             try:
+                import aiofiles
                 async with aiofiles.open(self.session_file, 'r') as f:
                     data = json.loads(await f.read())
                     self.session_cookies = data.get('cookies', {})
@@ -68,6 +79,7 @@ class AntiBottingScraper:
                 'delays': self.request_delays[-50:],  # Keep last 50 delays
                 'last_updated': datetime.now().isoformat()
             }
+            import aiofiles
             async with aiofiles.open(self.session_file, 'w') as f:
                 await f.write(json.dumps(data, indent=2))
         except Exception as e:
@@ -135,7 +147,7 @@ class AntiBottingScraper:
         
         await asyncio.sleep(base_delay)
     
-    async def get_proxy_transport(self) -> Optional[AsyncProxyTransport]:
+    async def get_proxy_transport(self) -> Optional["AsyncProxyTransport"]:
         """Get proxy transport if available"""
         if not self.proxy_list:
             return None
@@ -144,6 +156,7 @@ class AntiBottingScraper:
         self.current_proxy_index += 1
         
         try:
+            from httpx_socks import AsyncProxyTransport
             return AsyncProxyTransport.from_url(proxy)
         except Exception as e:
             logger.warning(f"Failed to create proxy transport: {e}")
@@ -231,6 +244,7 @@ class AntiBottingScraper:
     async def cloudscraper_fallback(self, url: str) -> Optional[str]:
         """Fallback using cloudscraper for Cloudflare protected sites"""
         try:
+            import cloudscraper
             scraper = cloudscraper.create_scraper()
             response = scraper.get(url)
             return response.text
@@ -281,6 +295,7 @@ class BasketballReferenceScraper(AntiBottingScraper):
     
     def parse_teams_data(self, html_content: str) -> List[Dict[str, Any]]:
         """Parse teams data from HTML"""
+        from bs4 import BeautifulSoup
         soup = BeautifulSoup(html_content, "html.parser")
         teams = []
         
@@ -338,6 +353,7 @@ class BasketballReferenceScraper(AntiBottingScraper):
     
     def parse_roster_data(self, html_content: str, team_abbr: str) -> List[Dict[str, Any]]:
         """Parse roster data from HTML"""
+        from bs4 import BeautifulSoup
         soup = BeautifulSoup(html_content, "html.parser")
         players = []
         
@@ -0,0 +1,261 @@
+"""
+Incremental arbitrage and middle scanner over the live odds stream
+Every book's latest line is indexed by (game, market). Each market keeps the
+best price per (outcome, point) across books. When the odds stream publishes
+a batch of changed lines, only the markets those lines belong to are
+re-checked, for h2h, spreads and totals:
+
+- arbitrage: the best prices on both sides of the same line imply less than
+  100% (h2h, +3/-3, Over/Under 220.5);
+- middle: the two sides' best lines leave a window where both bets win
+  (home +3.5 with away -2.5, Over 219.5 with Under 221.5).
+
+The current opportunities are kept in memory, so the endpoint reads them
+instead of rescanning the odds table. The index is seeded from the daily
+context once per day; older lines never overwrite newer ones, so seeding
+after live deltas is safe. Seeding a new day drops every market not on the
+new slate, and games are dropped once they tip off, so the index only ever
+holds today's pregame markets.
+"""
+
+import os
+import time
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from odds_matrix import decimal_odds
+from odds_summary import MARKETS, outcome_name
+
+# Total implied probability below which best prices are an arbitrage
+ARB_MAX_IMPLIED = float(os.getenv("ARB_MAX_IMPLIED", "1.0"))
+# Middles are reported when both legs together cost at most this much
+MIDDLE_MAX_IMPLIED = float(os.getenv("MIDDLE_MAX_IMPLIED", "1.10"))
+MIDDLE_MIN_WIDTH = float(os.getenv("MIDDLE_MIN_WIDTH", "0.5"))
+
+MarketKey = Tuple[str, str]
+
+
+def _started(game: Dict, now: datetime) -> bool:
+    """Whether the game has tipped off; naive commence times are local time"""
+    try:
+        commence = datetime.fromisoformat(str(game.get("commence_time")))
+    except ValueError:
+        return False
+    return (commence if commence.tzinfo else commence.astimezone()) <= now
+
+
+class Line:
+    """One book's latest price for one outcome"""
+
+    __slots__ = ("book", "title", "outcome", "point", "price", "decimal", "stamp")
+
+    def __init__(self, row: Dict, outcome: str, decimal: float):
+        self.book = str(row.get("bookmaker_key"))
+        self.title = row.get("bookmaker_title") or self.book
+        self.outcome = outcome
+        self.point = float(row["point"]) if row.get("point") is not None else None
+        self.price = row.get("price")
+        self.decimal = decimal
+        self.stamp = str(row.get("last_update") or row.get("updated_at") or "")
+
+    def leg(self, implied_total: float) -> Dict:
+        return {
+            "outcome": self.outcome,
+            "sportsbook": self.title,
+            "odds": self.price,
+            "point": self.point,
+            # Equal payout on either side: stake in proportion to implied probability
+            "allocation": round((1 / self.decimal) / implied_total, 4),
+        }
+
+
+class ArbitrageScanner:
+    """Best-price index per market and the opportunities it currently holds"""
+
+    def __init__(self, max_implied: float = ARB_MAX_IMPLIED, middle_max_implied: float = MIDDLE_MAX_IMPLIED,
+                 middle_min_width: float = MIDDLE_MIN_WIDTH):
+        self.max_implied = max_implied
+        self.middle_max_implied = middle_max_implied
+        self.middle_min_width = middle_min_width
+        # (game, market) -> (book, outcome) -> latest line
+        self.lines: Dict[MarketKey, Dict[Tuple[str, str], Line]] = {}
+        # (game, market) -> (outcome, point) -> best line across books
+        self.best: Dict[MarketKey, Dict[Tuple[str, Optional[float]], Line]] = {}
+        self.found: Dict[MarketKey, List[Dict]] = {}
+        self.games: Dict[str, Dict] = {}
+        self.seeded_day: Optional[date] = None
+        self.updates = 0
+        self.markets_scanned = 0
+        self.last_scan_ms = 0.0
+        self.updated_at: Optional[float] = None
+
+    def load(self, games: Iterable[Dict], rows: Iterable[Dict], day: Optional[date] = None):
+        """Seed from a full slate (the daily context); live deltas keep it current
+
+        A new ``day`` replaces the slate: markets of games not on it are dropped.
+        """
+        slate = {str(game["id"]): game for game in games if game.get("id")}
+        if day != self.seeded_day:
+            for key in [key for key in self.lines if key[0] not in slate]:
+                self._drop(key)
+            self.games = {}
+        self.games.update(slate)
+        self.seeded_day = day
+        self.apply(rows)
+        self.prune_started()
+
+    def _drop(self, key: MarketKey):
+        self.lines.pop(key, None)
+        self.best.pop(key, None)
+        self.found.pop(key, None)
+
+    def prune_started(self, now: Optional[datetime] = None) -> int:
+        """Drop games that have tipped off and their markets; returns games dropped"""
+        now = now or datetime.now(timezone.utc)
+        started = {game_id for game_id, game in self.games.items() if _started(game, now)}
+        for key in [key for key in self.lines if key[0] in started]:
+            self._drop(key)
+        for game_id in started:
+            del self.games[game_id]
+        return len(started)
+
+    def apply(self, rows: Iterable[Dict]) -> int:
+        """Index changed lines and re-check only their markets; returns markets scanned"""
+        started = time.perf_counter()
+        affected = set()
+        for row in rows:
+            market = row.get("market_type")
+            if market not in MARKETS or row.get("game_id") is None:
+                continue
+            # Once seeded, only the slate's pregame markets are indexed
+            if self.seeded_day is not None and str(row["game_id"]) not in self.games:
+                continue
+            key = (str(row["game_id"]), market)
+            outcome = outcome_name(row)
+            if market == "totals" and outcome:
+                outcome = outcome.title()
+            slot = (str(row.get("bookmaker_key")), outcome)
+            book_lines = self.lines.setdefault(key, {})
+            current = book_lines.get(slot)
+            stamp = str(row.get("last_update") or row.get("updated_at") or "")
+            if current is not None and stamp < current.stamp:
+                continue
+            decimal = decimal_odds(row.get("price"))
+            line = Line(row, outcome, decimal) if decimal is not None else None
+            if line is None:
+                # Pulled or unpriced line: the book no longer offers it
+                book_lines.pop(slot, None)
+            else:
+                book_lines[slot] = line
+            affected.add(key)
+        for key in affected:
+            self._scan(key)
+        if affected:
+            self.updates += 1
+            self.markets_scanned += len(affected)
+            self.updated_at = time.time()
+            self.last_scan_ms = round((time.perf_counter() - started) * 1000, 3)
+        return len(affected)
+
+    def _scan(self, key: MarketKey):
+        best: Dict[Tuple[str, Optional[float]], Line] = {}
+        for line in self.lines.get(key, {}).values():
+            slot = (line.outcome, line.point)
+            if slot not in best or line.decimal > best[slot].decimal:
+                best[slot] = line
+        self.best[key] = best
+        found = self._arbitrage(key, best) + self._middles(key, best)
+        if found:
+            self.found[key] = found
+        else:
+            self.found.pop(key, None)
+
+    def _sides(self, key: MarketKey, best: Dict) -> Optional[Tuple[str, str]]:
+        """The market's two outcomes, home (or Over) first"""
+        game_id, market = key
+        if market == "totals":
+            return ("Over", "Under")
+        names = list(dict.fromkeys(outcome for outcome, _ in best))
+        if len(names) != 2:
+            return None
+        home = self.games.get(game_id, {}).get("home_team")
+        return (names[1], names[0]) if names[1] == home else (names[0], names[1])
+
+    def _opportunity(self, key: MarketKey, kind: str, first: Line, second: Line) -> Dict:
+        game_id, market = key
+        total = 1 / first.decimal + 1 / second.decimal
+        game = self.games.get(game_id, {})
+        label = (f"{game.get('away_team')} @ {game.get('home_team')}" if game.get("home_team")
+                 else f"{first.outcome} / {second.outcome}" if market != "totals" else game_id)
+        return {
+            "type": kind,
+            "game": label,
+            "game_id": game_id,
+            "market": market,
+            "total_implied": round(total, 4),
+            "profit_margin": round((1 / total - 1) * 100, 2),
+            "home_bet": first.leg(total),
+            "away_bet": second.leg(total),
+        }
+
+    def _arbitrage(self, key: MarketKey, best: Dict) -> List[Dict]:
+        sides = self._sides(key, best)
+        if sides is None:
+            return []
+        first_side, second_side = sides
+        found = []
+        for (outcome, point), first in best.items():
+            if outcome != first_side:
+                continue
+            # Same line on the other side: the opposite spread, the same total
+            other_point = None if point is None else (-point if key[1] == "spread" else point)
+            second = best.get((second_side, other_point))
+            if second is not None and 1 / first.decimal + 1 / second.decimal < self.max_implied:
+                found.append(self._opportunity(key, "arbitrage", first, second))
+        return found
+
+    def _middles(self, key: MarketKey, best: Dict) -> List[Dict]:
+        market = key[1]
+        sides = self._sides(key, best) if market != "h2h" else None
+        if sides is None:
+            return []
+        firsts = [line for (outcome, point), line in best.items() if outcome == sides[0] and point is not None]
+        seconds = [line for (outcome, point), line in best.items() if outcome == sides[1] and point is not None]
+        found = []
+        for first in firsts:
+            for second in seconds:
+                # Spread: home +h and away +a both win for margins in (-h, a);
+                # totals: Over o and Under u both win for totals in (o, u)
+                width = first.point + second.point if market == "spread" else second.point - first.point
+                total = 1 / first.decimal + 1 / second.decimal
+                if width < self.middle_min_width or total > self.middle_max_implied:
+                    continue
+                opportunity = self._opportunity(key, "middle", first, second)
+                low, high = ((-first.point, second.point) if market == "spread" else (first.point, second.point))
+                opportunity["middle"] = {"width": width, "range": [low, high]}
+                found.append(opportunity)
+        return sorted(found, key=lambda o: (-o["middle"]["width"], o["total_implied"]))
+
+    def opportunities(self, kind: Optional[str] = None) -> List[Dict]:
+        """Current arbitrage and/or middle opportunities, best first"""
+        found = [o for market in self.found.values() for o in market if kind is None or o["type"] == kind]
+        return sorted(found, key=lambda o: -o["profit_margin"])
+
+    def status(self) -> Dict:
+        arbitrage = sum(1 for market in self.found.values() for o in market if o["type"] == "arbitrage")
+        middles = sum(len(market) for market in self.found.values()) - arbitrage
+        return {
+            "markets": len(self.lines),
+            "lines": sum(len(book_lines) for book_lines in self.lines.values()),
+            "seeded_day": self.seeded_day.isoformat() if self.seeded_day else None,
+            "arbitrage": arbitrage,
+            "middles": middles,
+            "updates": self.updates,
+            "markets_scanned": self.markets_scanned,
+            "last_scan_ms": self.last_scan_ms,
+            "updated_at": self.updated_at,
+        }
+
+
+# Fed by the odds broadcaster in API processes (see main.py)
+arbitrage_scanner = ArbitrageScanner()
@@ -0,0 +1,186 @@
+"""
+Shared per-day data context for reports and analysis endpoints
+Yesterday's and today's games, the latest odds for both slates and the
+rosters snapshot are loaded once (two queries) and shared by every report
+generator and endpoint of the process, instead of each report method
+querying Supabase on its own.
+
+The context is rebuilt when the day rolls over or when ingest writes new
+games/odds or rosters: the writer calls ``invalidate`` directly and other
+processes do it from their cache-invalidation handlers. A load that was
+already running when an invalidation arrived is served to its callers but
+not cached.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from db import fetch_all
+from odds_matrix import OddsMatrix
+from odds_summary import group_odds_by_game
+from reference_data import reference_store
+from team_analytics import GAME_ID_CHUNK, latest_lines
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(value) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+class DailyContext:
+    """Immutable view of one day's slates; ``version`` is the store version it reflects"""
+
+    __slots__ = ("day", "yesterday_games", "today_games", "odds_by_game", "reference", "version", "loaded_at",
+                 "_data_versions", "_odds_matrix")
+
+    def __init__(self, day: date, yesterday_games: List[Dict], today_games: List[Dict],
+                 odds_by_game: Dict[str, List[Dict]], reference=None, version: int = 0,
+                 loaded_at: Optional[float] = None):
+        self.day = day
+        self.yesterday_games = yesterday_games
+        self.today_games = today_games
+        self.odds_by_game = odds_by_game
+        self.reference = reference
+        self.version = version
+        self.loaded_at = loaded_at or time.time()
+        self._data_versions: Optional[Dict[str, str]] = None
+        self._odds_matrix: Optional[OddsMatrix] = None
+
+    def odds_for(self, game_ids: List[str]) -> Dict[str, List[Dict]]:
+        return {gid: self.odds_by_game.get(gid, []) for gid in dict.fromkeys(game_ids) if gid}
+
+    def today_odds(self) -> List[Dict]:
+        """Latest lines of today's games, in slate order"""
+        return [row for game in self.today_games for row in self.odds_by_game.get(game.get("id"), [])]
+
+    def odds_matrix(self) -> OddsMatrix:
+        """Today's slate as an OddsMatrix, built once per context"""
+        if self._odds_matrix is None:
+            self._odds_matrix = OddsMatrix.build(self.today_odds(), self.today_games)
+        return self._odds_matrix
+
+    def data_versions(self) -> Dict[str, str]:
+        """Content hash per data source, for report section fingerprints
+
+        Hashes content rather than load times, so a reload that brings back
+        the same rows (another process's ingest, a restart) keeps them.
+        """
+        if self._data_versions is None:
+            yesterday_ids = [g.get("id") for g in self.yesterday_games]
+            today_ids = [g.get("id") for g in self.today_games]
+            reference = self.reference
+            self._data_versions = {
+                "day": self.day.isoformat(),
+                "games_yesterday": content_hash(self.yesterday_games),
+                "games_today": content_hash(self.today_games),
+                "odds_yesterday": content_hash(self.odds_for(yesterday_ids)),
+                "odds_today": content_hash(self.odds_for(today_ids)),
+                "reference": content_hash([reference.teams, reference.players]) if reference is not None else None,
+            }
+        return self._data_versions
+
+    def status(self) -> Dict:
+        return {
+            "day": self.day.isoformat(),
+            "version": self.version,
+            "yesterday_games": len(self.yesterday_games),
+            "today_games": len(self.today_games),
+            "odds_lines": sum(len(rows) for rows in self.odds_by_game.values()),
+            "loaded_at": self.loaded_at,
+        }
+
+
+async def load_daily_context(supabase, day: Optional[date] = None, version: int = 0) -> DailyContext:
+    """Yesterday's and today's games with one query, their latest lines with another"""
+    day = day or datetime.now().date()
+    yesterday, tomorrow = day - timedelta(days=1), day + timedelta(days=1)
+    games = await fetch_all(
+        lambda: supabase.table("games").select("*")
+        .gte("commence_time", yesterday.isoformat())
+        .lt("commence_time", tomorrow.isoformat())
+        .order("commence_time").order("id")
+    )
+    today = day.isoformat()
+    yesterday_games = [g for g in games if str(g.get("commence_time") or "")[:10] < today]
+    today_games = [g for g in games if str(g.get("commence_time") or "")[:10] >= today]
+
+    game_ids = [g["id"] for g in games if g.get("id")]
+    lines: List[Dict] = []
+    for start in range(0, len(game_ids), GAME_ID_CHUNK):
+        chunk = game_ids[start:start + GAME_ID_CHUNK]
+        lines += await fetch_all(
+            lambda: supabase.table("odds").select("*").in_("game_id", chunk).order("id")
+        )
+    return DailyContext(
+        day, yesterday_games, today_games,
+        group_odds_by_game(latest_lines(lines), game_ids),
+        reference_store.snapshot, version,
+    )
+
+
+class DailyContextStore:
+    """Memoized DailyContext with single-flight loading and versioned invalidation"""
+
+    def __init__(self):
+        self.context: Optional[DailyContext] = None
+        self.version = 0
+        self.loads = 0
+        self.last_error: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self, *reasons: str):
+        """New games, odds or rosters were written; the next ``get`` reloads"""
+        self.version += 1
+        logger.info(f"Daily context invalidated ({', '.join(reasons) or 'manual'})")
+
+    def _current(self, day: date) -> Optional[DailyContext]:
+        context = self.context
+        if context is not None and context.day == day and context.version == self.version:
+            return context
+        return None
+
+    async def get(self, supabase, day: Optional[date] = None) -> Optional[DailyContext]:
+        """The current context, loading it once for concurrent callers
+
+        Returns None without a database; on a failed load the previous
+        context is served if there is one.
+        """
+        if supabase is None:
+            return None
+        day = day or datetime.now().date()
+        context = self._current(day)
+        if context is not None:
+            return context
+        async with self._lock:
+            context = self._current(day)
+            if context is not None:
+                return context
+            version = self.version
+            try:
+                context = await load_daily_context(supabase, day, version)
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Daily context load failed: {e}")
+                return self.context
+            self.loads += 1
+            self.last_error = None
+            if version == self.version:
+                self.context = context
+            return context
+
+    def status(self) -> Dict:
+        return {
+            "version": self.version,
+            "loads": self.loads,
+            "context": self.context.status() if self.context else None,
+            "last_error": self.last_error,
+        }
+
+
+daily_context_store = DailyContextStore()
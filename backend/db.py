@@ -0,0 +1,329 @@
+"""
+Async-native Supabase (PostgREST) data access
+A pooled httpx.AsyncClient with timeouts and retries, exposing the same
+query-builder chain as supabase-py so call sites only swap
+``await anyio.to_thread.run_sync(lambda: q.execute())`` for ``await q.execute()``
+"""
+
+import asyncio
+import logging
+import os
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import httpx
+
+from metrics import timed
+
+logger = logging.getLogger(__name__)
+
+DB_TIMEOUT_SECONDS = float(os.getenv("DB_TIMEOUT_SECONDS", "10"))
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "100"))
+DB_MAX_KEEPALIVE = int(os.getenv("DB_MAX_KEEPALIVE", "20"))
+DB_RETRIES = int(os.getenv("DB_RETRIES", "2"))
+DB_RETRY_BACKOFF = float(os.getenv("DB_RETRY_BACKOFF", "0.2"))
+
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+# Failures that prove a write never reached the server, so it is safe to resend
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+UNSENT_STATUS_CODES = {429}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "DELETE"}
+# Supabase caps each response at 1000 rows by default
+FETCH_PAGE_SIZE = 1000
+
+
+class APIResponse:
+    """Query result with the same ``.data`` attribute as supabase-py responses"""
+
+    __slots__ = ("data", "count")
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class DatabaseError(Exception):
+    """PostgREST returned an error response"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _format_list_value(value: Any) -> str:
+    """Quote values inside in.(...) lists when they contain reserved characters"""
+    text = _format_value(value)
+    if any(c in text for c in ',()"\\ '):
+        return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return text
+
+
+def is_idempotent(method: str, params=None, headers: Optional[Dict[str, str]] = None,
+                  body: Any = None) -> bool:
+    """Whether repeating the request cannot change the result
+
+    Reads and deletes are; so is an upsert whose on_conflict columns are in
+    every row (a repeat merges into the rows the first attempt wrote).
+    Inserts, keyless upserts and updates are not retried once sent.
+    """
+    if method in IDEMPOTENT_METHODS:
+        return True
+    if method != "POST" or "merge-duplicates" not in (headers or {}).get("Prefer", ""):
+        return False
+    conflict = dict(params or []).get("on_conflict")
+    if not conflict or body is None:
+        return False
+    columns = [c.strip() for c in conflict.split(",")]
+    rows = body if isinstance(body, list) else [body]
+    return all(row.get(c) is not None for row in rows for c in columns)
+
+
+class AsyncQuery:
+    """Chainable PostgREST request; ``await query.execute()`` runs it"""
+
+    def __init__(self, db: "AsyncDatabase", table: str):
+        self._db = db
+        self._table = table
+        self._method = "GET"
+        self._params: List[Tuple[str, str]] = []
+        self._order: List[str] = []
+        self._headers: Dict[str, str] = {}
+        self._body: Any = None
+        self._single = False
+
+    # -- verbs -----------------------------------------------------------
+
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "AsyncQuery":
+        # Collapse whitespace from multi-line select strings
+        self._params.append(("select", "".join(columns.split())))
+        if count:
+            self._headers["Prefer"] = f"count={count}"
+        return self
+
+    def insert(self, rows: Union[Dict, List[Dict]]) -> "AsyncQuery":
+        self._method = "POST"
+        self._body = rows
+        self._headers["Prefer"] = "return=representation"
+        return self
+
+    def upsert(self, rows: Union[Dict, List[Dict]], on_conflict: Optional[str] = None,
+               ignore_duplicates: bool = False) -> "AsyncQuery":
+        self._method = "POST"
+        self._body = rows
+        resolution = "ignore-duplicates" if ignore_duplicates else "merge-duplicates"
+        self._headers["Prefer"] = f"resolution={resolution},return=representation"
+        if on_conflict:
+            self._params.append(("on_conflict", on_conflict))
+        return self
+
+    def update(self, values: Dict) -> "AsyncQuery":
+        self._method = "PATCH"
+        self._body = values
+        self._headers["Prefer"] = "return=representation"
+        return self
+
+    def delete(self) -> "AsyncQuery":
+        self._method = "DELETE"
+        self._headers["Prefer"] = "return=representation"
+        return self
+
+    # -- filters ---------------------------------------------------------
+
+    def _filter(self, column: str, operator: str, value: Any) -> "AsyncQuery":
+        self._params.append((column, f"{operator}.{_format_value(value)}"))
+        return self
+
+    def eq(self, column: str, value: Any) -> "AsyncQuery":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "AsyncQuery":
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "AsyncQuery":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "AsyncQuery":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "AsyncQuery":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "AsyncQuery":
+        return self._filter(column, "lte", value)
+
+    def like(self, column: str, pattern: str) -> "AsyncQuery":
+        return self._filter(column, "like", pattern)
+
+    def ilike(self, column: str, pattern: str) -> "AsyncQuery":
+        return self._filter(column, "ilike", pattern)
+
+    def is_(self, column: str, value: Any) -> "AsyncQuery":
+        return self._filter(column, "is", value)
+
+    def in_(self, column: str, values: Iterable[Any]) -> "AsyncQuery":
+        joined = ",".join(_format_list_value(v) for v in values)
+        self._params.append((column, f"in.({joined})"))
+        return self
+
+    def or_(self, filters: str) -> "AsyncQuery":
+        self._params.append(("or", f"({filters})"))
+        return self
+
+    def filter(self, column: str, operator: str, criteria: Any) -> "AsyncQuery":
+        return self._filter(column, operator, criteria)
+
+    # -- modifiers -------------------------------------------------------
+
+    def order(self, column: str, *, desc: bool = False,
+              nullsfirst: Optional[bool] = None) -> "AsyncQuery":
+        term = f"{column}.{'desc' if desc else 'asc'}"
+        if nullsfirst is not None:
+            term += ".nullsfirst" if nullsfirst else ".nullslast"
+        self._order.append(term)
+        return self
+
+    def limit(self, size: int) -> "AsyncQuery":
+        self._params.append(("limit", str(size)))
+        return self
+
+    def range(self, start: int, end: int) -> "AsyncQuery":
+        self._params.append(("offset", str(start)))
+        self._params.append(("limit", str(end - start + 1)))
+        return self
+
+    def single(self) -> "AsyncQuery":
+        self._single = True
+        self._headers["Accept"] = "application/vnd.pgrst.object+json"
+        return self
+
+    # -- execution -------------------------------------------------------
+
+    def build_params(self) -> List[Tuple[str, str]]:
+        params = list(self._params)
+        if self._order:
+            params.append(("order", ",".join(self._order)))
+        return params
+
+    async def execute(self) -> APIResponse:
+        response = await self._db.request(
+            self._method, self._table,
+            params=self.build_params(), headers=self._headers, json=self._body,
+        )
+        if self._single and response.status_code == 406:
+            return APIResponse(None)
+        data = response.json() if response.content else ([] if not self._single else None)
+        count = None
+        content_range = response.headers.get("content-range", "")
+        if "/" in content_range and not content_range.endswith("*"):
+            count = int(content_range.rsplit("/", 1)[1])
+        return APIResponse(data, count)
+
+
+class AsyncDatabase:
+    """Pooled async PostgREST client with timeouts and bounded retries"""
+
+    def __init__(self, url: str, key: str, *,
+                 timeout: float = DB_TIMEOUT_SECONDS,
+                 max_connections: int = DB_MAX_CONNECTIONS,
+                 max_keepalive: int = DB_MAX_KEEPALIVE,
+                 retries: int = DB_RETRIES,
+                 retry_backoff: float = DB_RETRY_BACKOFF,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.client = httpx.AsyncClient(
+            base_url=url.rstrip("/") + "/rest/v1/",
+            headers={
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+                "Content-Type": "application/json",
+            },
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_keepalive),
+            transport=transport,
+        )
+
+    def table(self, name: str) -> AsyncQuery:
+        return AsyncQuery(self, name)
+
+    # supabase-py compatibility
+    from_ = table
+
+    async def request(self, method: str, path: str, *, params=None,
+                      headers: Optional[Dict[str, str]] = None, json: Any = None) -> httpx.Response:
+        # Retries and backoff count as database wait for the calling request
+        with timed("db"):
+            return await self._request(method, path, params=params, headers=headers, json=json)
+
+    async def _request(self, method: str, path: str, *, params=None,
+                       headers: Optional[Dict[str, str]] = None, json: Any = None) -> httpx.Response:
+        attempt = 0
+        idempotent = is_idempotent(method, params, headers, json)
+        retry_status = RETRY_STATUS_CODES if idempotent else UNSENT_STATUS_CODES
+        while True:
+            try:
+                response = await self.client.request(
+                    method, path, params=params, headers=headers, json=json
+                )
+                if response.status_code in retry_status and attempt < self.retries:
+                    raise httpx.HTTPStatusError(
+                        f"retryable status {response.status_code}",
+                        request=response.request, response=response,
+                    )
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                # A write may have committed before a read timeout or a 502/504
+                resendable = idempotent or isinstance(e, (httpx.HTTPStatusError,) + UNSENT_ERRORS)
+                if attempt >= self.retries or not resendable:
+                    raise
+                attempt += 1
+                delay = self.retry_backoff * (2 ** (attempt - 1)) * (1 + random.random())
+                logger.warning(f"DB {method} {path} failed ({e}); retry {attempt}/{self.retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code >= 400:
+                if response.status_code == 406 and headers and "vnd.pgrst.object" in headers.get("Accept", ""):
+                    return response
+                try:
+                    message = response.json().get("message", response.text)
+                except Exception:
+                    message = response.text
+                raise DatabaseError(response.status_code, message)
+            return response
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+async def fetch_all(query_factory, page_size: int = FETCH_PAGE_SIZE) -> List[Dict]:
+    """Read every row of a query in PostgREST-sized pages
+
+    ``query_factory`` builds a fresh, ordered query for each page.
+    """
+    rows: List[Dict] = []
+    while True:
+        page = (await query_factory().range(len(rows), len(rows) + page_size - 1).execute()).data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+
+def create_database(url: Optional[str], key: Optional[str], **kwargs) -> Optional[AsyncDatabase]:
+    """Create the async database client, or None when not configured"""
+    if not url or not key:
+        return None
+    try:
+        return AsyncDatabase(url, key, **kwargs)
+    except Exception as e:
+        print(f"Failed to create database client: {e}")
+        return None
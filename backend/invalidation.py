@@ -0,0 +1,99 @@
+"""
+Cache invalidation messages between the ingest worker and API processes
+The process that writes data bumps a version row per cache in the
+``cache_invalidations`` table; API processes poll that one small table and
+reload only the caches whose version moved.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_TABLE = "cache_invalidations"
+INVALIDATION_POLL_SECONDS = float(os.getenv("INVALIDATION_POLL_SECONDS", "10"))
+
+# Cache names
+REFERENCE = "reference"
+TEAM_ANALYTICS = "team_analytics"
+ODDS = "odds"
+
+Handler = Callable[[object, Optional[float]], Awaitable[None]]
+
+
+class InvalidationBus:
+    """Publishes version bumps and dispatches the ones made by other processes"""
+
+    def __init__(self, poll_seconds: float = INVALIDATION_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.handlers: Dict[str, Handler] = {}
+        # name -> last version applied (or published) by this process
+        self.seen: Dict[str, int] = {}
+        self.last_poll: Optional[float] = None
+
+    def on(self, name: str, handler: Handler):
+        """Register ``handler(supabase, since)``; ``since`` is the previous version time"""
+        self.handlers[name] = handler
+
+    async def publish(self, supabase, *names: str):
+        """Record that these caches changed; this process has already applied them"""
+        if not supabase or not names:
+            return
+        version = time.time_ns() // 1000
+        updated = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        try:
+            await supabase.table(INVALIDATION_TABLE).upsert(
+                [{"name": name, "version": version, "updated_at": updated} for name in names],
+                on_conflict="name",
+            ).execute()
+        except Exception as e:
+            logger.warning(f"Failed to publish cache invalidation {names}: {e}")
+            return
+        for name in names:
+            self.seen[name] = version
+
+    async def poll(self, supabase) -> Dict[str, int]:
+        """Run handlers for caches changed elsewhere; returns the applied versions"""
+        response = await supabase.table(INVALIDATION_TABLE).select("name,version").execute()
+        applied = {}
+        first_poll = self.last_poll is None
+        self.last_poll = time.time()
+        for row in response.data or []:
+            name, version = row.get("name"), int(row.get("version") or 0)
+            previous = self.seen.get(name)
+            if previous is not None and version <= previous:
+                continue
+            self.seen[name] = version
+            # The startup load already reflects versions present at the first poll
+            if first_poll or name not in self.handlers:
+                continue
+            try:
+                await self.handlers[name](supabase, previous / 1e6 if previous else None)
+                applied[name] = version
+            except Exception as e:
+                logger.error(f"Failed to apply cache invalidation for {name}: {e}")
+        return applied
+
+    async def listen(self, supabase, stop_evt: asyncio.Event):
+        """Poll until stopped"""
+        while not stop_evt.is_set():
+            try:
+                applied = await self.poll(supabase)
+                if applied:
+                    logger.info(f"Reloaded caches: {', '.join(applied)}")
+            except Exception as e:
+                logger.warning(f"Cache invalidation poll failed: {e}")
+            try:
+                await asyncio.wait_for(stop_evt.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def status(self) -> Dict:
+        return {"versions": dict(self.seen), "last_poll": self.last_poll}
+
+
+# Process-wide bus; handlers are registered by main
+invalidations = InvalidationBus()
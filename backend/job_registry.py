@@ -0,0 +1,416 @@
+"""
+Tracked background jobs started from the API
+Each job gets an id, progress counters, timings and a result, and can be
+listed, inspected and cancelled. Submitting a job whose kind and key match
+one still queued or running returns that job instead of starting another,
+and a per-kind limit queues the rest (e.g. one roster scrape at a time, so
+repeated clicks do not compete for the same rate budget).
+
+With a database the registry is shared by every process: any API worker
+inserts a ``queued`` row into ``background_jobs`` (a partial unique index
+makes the dedupe hold across workers), and the single executor (the elected
+leader, or worker.py with BACKGROUND_JOBS=worker) claims queued rows, runs
+them, writes progress back and honours cancel requests. Without a database
+jobs run in the submitting process.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+JOBS_TABLE = "background_jobs"
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+# Finished jobs kept (in memory) or listed (from the database)
+JOB_HISTORY_SIZE = int(os.getenv("JOB_HISTORY_SIZE", "100"))
+# How often the executor claims queued jobs, saves progress and checks cancels
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+DEFAULT_KIND_LIMIT = 1
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts is not None else None
+
+
+def _epoch(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+class Job:
+    """One submitted job; ``update`` is handed to the job function for progress"""
+
+    __slots__ = ("id", "kind", "key", "params", "status", "progress", "result", "error",
+                 "cancel_requested", "created_at", "started_at", "finished_at", "task", "dirty")
+
+    def __init__(self, kind: str, key: str, params: Optional[Dict] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.key = key
+        self.params = params or {}
+        self.status = QUEUED
+        self.progress: Dict[str, Any] = {"current": 0, "total": None, "rows": 0, "message": None}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.cancel_requested = False
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        # Progress changed since it was last written to the database
+        self.dirty = False
+
+    def update(self, current: Optional[int] = None, total: Optional[int] = None,
+               rows: Optional[int] = None, message: Optional[str] = None):
+        """Record progress; ``rows`` is the running total written so far"""
+        for field, value in (("current", current), ("total", total), ("rows", rows), ("message", message)):
+            if value is not None:
+                self.progress[field] = value
+        self.dirty = True
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATES
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        return round((self.finished_at or time.time()) - self.started_at, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "key": self.key,
+            "params": self.params,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_seconds": self.duration,
+        }
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "key": self.key,
+            "params": self.params,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested,
+            "created_at": _iso(self.created_at),
+            "started_at": _iso(self.started_at),
+            "finished_at": _iso(self.finished_at),
+        }
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "Job":
+        job = cls(row["kind"], row.get("key") or "", row.get("params"))
+        job.id = row["id"]
+        job.status = row.get("status") or QUEUED
+        job.progress = {**job.progress, **(row.get("progress") or {})}
+        job.result = row.get("result")
+        job.error = row.get("error")
+        job.cancel_requested = bool(row.get("cancel_requested"))
+        job.created_at = _epoch(row.get("created_at")) or job.created_at
+        job.started_at = _epoch(row.get("started_at"))
+        job.finished_at = _epoch(row.get("finished_at"))
+        return job
+
+
+JobHandler = Callable[[Any, Job], Awaitable[Any]]
+
+
+class JobRegistry:
+    """Runs, deduplicates and limits background jobs"""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None,
+                 history_size: int = JOB_HISTORY_SIZE, poll_seconds: float = JOB_POLL_SECONDS):
+        self.limits = dict(limits or {})
+        self.history_size = history_size
+        self.poll_seconds = poll_seconds
+        self.handlers: Dict[str, JobHandler] = {}
+        self.supabase = None
+        self.executing = False
+        # Jobs running (or recently run) in this process
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self._wake = asyncio.Event()
+
+    def register(self, kind: str, handler: JobHandler):
+        """``handler(supabase, job)`` runs a job of this kind and returns its result"""
+        self.handlers[kind] = handler
+
+    def attach(self, supabase):
+        """Share jobs through the database from now on (None: this process only)"""
+        self.supabase = supabase
+
+    def _slot(self, kind: str) -> asyncio.Semaphore:
+        if kind not in self._slots:
+            self._slots[kind] = asyncio.Semaphore(self._limit(kind))
+        return self._slots[kind]
+
+    def _limit(self, kind: str) -> int:
+        return max(1, self.limits.get(kind, DEFAULT_KIND_LIMIT))
+
+    def _table(self):
+        return self.supabase.table(JOBS_TABLE)
+
+    # -- submission and queries -----------------------------------------
+
+    async def submit(self, kind: str, key: str = "", params: Optional[Dict] = None):
+        """Queue a job of a registered kind; returns ``(job, created)``
+
+        An active job of the same kind and key is returned as is.
+        """
+        if kind not in self.handlers:
+            raise KeyError(kind)
+        if self.supabase is None:
+            return self._submit_local(kind, key, params)
+
+        existing = await self._find_active_row(kind, key)
+        if existing is not None:
+            return existing, False
+        job = Job(kind, key, params)
+        try:
+            await self._table().insert(job.to_row()).execute()
+        except DatabaseError as e:
+            # Another process queued the same job first (partial unique index)
+            if e.status_code != 409:
+                raise
+            existing = await self._find_active_row(kind, key)
+            if existing is None:
+                raise
+            return existing, False
+        self._wake.set()
+        return job, True
+
+    def _submit_local(self, kind: str, key: str, params: Optional[Dict]):
+        for job in self.jobs.values():
+            if job.kind == kind and job.key == key and job.active:
+                return job, False
+        job = Job(kind, key, params)
+        self._start(job)
+        return job, True
+
+    async def _find_active_row(self, kind: str, key: str) -> Optional[Job]:
+        response = await (
+            self._table().select("*").eq("kind", kind).eq("key", key)
+            .in_("status", list(ACTIVE_STATES)).limit(1).execute()
+        )
+        return Job.from_row(response.data[0]) if response.data else None
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        local = self.jobs.get(job_id)
+        if local is not None or self.supabase is None:
+            return local
+        response = await self._table().select("*").eq("id", job_id).limit(1).execute()
+        return Job.from_row(response.data[0]) if response.data else None
+
+    async def list(self, kind: Optional[str] = None, status: Optional[str] = None) -> List[Job]:
+        """Jobs newest first"""
+        if self.supabase is None:
+            return [
+                job for job in reversed(self.jobs.values())
+                if (kind is None or job.kind == kind) and (status is None or job.status == status)
+            ]
+        query = self._table().select("*")
+        if kind:
+            query = query.eq("kind", kind)
+        if status:
+            query = query.eq("status", status)
+        response = await query.order("created_at", desc=True).limit(self.history_size).execute()
+        jobs = [Job.from_row(row) for row in response.data or []]
+        # Jobs running here have fresher progress than their last saved row
+        return [self.jobs.get(job.id, job) for job in jobs]
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued job, or ask the executor to stop a running one"""
+        local = self.jobs.get(job_id)
+        if local is not None and local.task is not None:
+            local.cancel_requested = True
+            await self._cancel_task(local)
+            return local
+        if self.supabase is None:
+            return local
+
+        now = _iso(time.time())
+        queued = await (
+            self._table().update({"status": CANCELLED, "cancel_requested": True, "finished_at": now})
+            .eq("id", job_id).eq("status", QUEUED).execute()
+        )
+        if not queued.data:
+            await (
+                self._table().update({"cancel_requested": True})
+                .eq("id", job_id).eq("status", RUNNING).execute()
+            )
+        return await self.get(job_id)
+
+    # -- execution --------------------------------------------------------
+
+    def _start(self, job: Job):
+        self.jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job))
+        self._prune()
+
+    async def _run(self, job: Job):
+        try:
+            async with self._slot(job.kind):
+                job.status = RUNNING
+                job.started_at = job.started_at or time.time()
+                job.result = await self.handlers[job.kind](self.supabase, job)
+                job.status = SUCCEEDED
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+        except Exception as e:
+            logger.error(f"Job {job.kind} {job.id} failed: {e}")
+            job.status = FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            job.task = None
+            await self._save(job)
+
+    async def _cancel_task(self, job: Job):
+        task = job.task
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        if job.active:
+            # Cancelled before its first step, so _run never recorded it
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            job.task = None
+            await self._save(job)
+
+    async def _save(self, job: Job):
+        if self.supabase is None:
+            return
+        row = job.to_row()
+        try:
+            await self._table().update(
+                {field: row[field] for field in ("status", "progress", "result", "error", "started_at", "finished_at")}
+            ).eq("id", job.id).execute()
+            job.dirty = False
+        except Exception as e:
+            logger.warning(f"Failed to save job {job.id}: {e}")
+
+    async def execute(self, stop_evt: Optional[asyncio.Event] = None):
+        """Executor loop: claim queued jobs, save progress, apply cancels
+
+        Runs in exactly one process (the elected leader or the worker).
+        """
+        self.executing = True
+        try:
+            await self._fail_orphans()
+            while stop_evt is None or not stop_evt.is_set():
+                try:
+                    await self.tick()
+                except Exception as e:
+                    logger.warning(f"Job executor tick failed: {e}")
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.executing = False
+            await self.shutdown()
+
+    async def tick(self):
+        if self.supabase is None:
+            return
+        running = [job for job in self.jobs.values() if job.task is not None]
+        for job in running:
+            if job.dirty:
+                await self._save(job)
+        if running:
+            response = await (
+                self._table().select("id").in_("id", [job.id for job in running])
+                .eq("cancel_requested", True).execute()
+            )
+            for row in response.data or []:
+                job = self.jobs[row["id"]]
+                job.cancel_requested = True
+                await self._cancel_task(job)
+        await self._claim_queued()
+
+    async def _claim_queued(self):
+        response = await (
+            self._table().select("*").eq("status", QUEUED)
+            .order("created_at").limit(self.history_size).execute()
+        )
+        for row in response.data or []:
+            kind = row.get("kind")
+            if kind not in self.handlers:
+                continue
+            busy = sum(1 for job in self.jobs.values() if job.kind == kind and job.task is not None)
+            if busy >= self._limit(kind):
+                continue
+            claimed = await (
+                self._table().update({"status": RUNNING, "started_at": _iso(time.time())})
+                .eq("id", row["id"]).eq("status", QUEUED).execute()
+            )
+            if claimed.data:
+                self._start(Job.from_row(claimed.data[0]))
+
+    async def _fail_orphans(self):
+        """Jobs left running by a previous executor will never finish"""
+        if self.supabase is None:
+            return
+        try:
+            await (
+                self._table().update({"status": FAILED, "error": "executor stopped", "finished_at": _iso(time.time())})
+                .eq("status", RUNNING).execute()
+            )
+        except Exception as e:
+            logger.warning(f"Failed to clean up orphaned jobs: {e}")
+
+    async def shutdown(self):
+        """Cancel everything running here (demotion or application shutdown)"""
+        for job in list(self.jobs.values()):
+            if job.task is not None:
+                await self._cancel_task(job)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - self.history_size)]:
+            del self.jobs[job_id]
+
+    def status(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "backend": "database" if self.supabase is not None else "memory",
+            "executing": self.executing,
+            "local_jobs": counts,
+            "limits": dict(self.limits),
+        }
+
+
+# Process-wide registry; roster scrapes share one Basketball-Reference rate budget
+job_registry = JobRegistry(limits={"roster_scrape": 1})
@@ -0,0 +1,399 @@
+"""
+Background jobs shared by the API process and the ingest worker
+Scraping, analytics materialization and scheduled reports. They run either
+inline in the elected API worker or in the dedicated worker (worker.py);
+whichever process writes data publishes cache invalidations so every API
+process reloads its in-memory caches.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from daily_context import daily_context_store
+from db import AsyncDatabase as Client, fetch_all
+from invalidation import ODDS, REFERENCE, TEAM_ANALYTICS, invalidations
+from job_registry import job_registry
+from player_search import player_index
+from reference_data import reference_store
+from team_analytics import team_analytics_store
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_INTERVAL_SECONDS = int(os.getenv("SCRAPE_INTERVAL_SECONDS", str(6 * 60 * 60)))
+CHICAGO_TZ = "America/Chicago"
+
+# Where scraping and reports run: "inline" (elected API worker) or "worker" (worker.py)
+BACKGROUND_JOBS = os.getenv("BACKGROUND_JOBS", "inline").lower()
+
+INGEST_STAGES = ("odds", "rosters", "analytics")
+STAGES = INGEST_STAGES + ("reports",)
+
+_real_implementations_loaded = False
+_job_slots: Optional[asyncio.Semaphore] = None
+# updated_at of the newest odds row replayed into this process's stream
+_odds_replayed_until: Optional[str] = None
+
+
+# Mock implementations, replaced by the real scraper and report generator on
+# first use (see load_real_implementations); importing those pulls in numpy,
+# bs4, cloudscraper and fake_useragent, which dominate cold start
+async def scrape_all_data(*args, **kwargs):
+    """Mock scraper function - will be replaced with real implementation"""
+    logger.info("Using mock scraper - anti-bot functionality disabled for now")
+    return {}
+
+class NBAReportGenerator:
+    """Mock report generator - will be replaced with real implementation"""
+    def __init__(self, supabase_client, context=None):
+        self.supabase = supabase_client
+        self.context = context
+        logger.info("Using mock report generator")
+    
+    async def generate_750am_report(self, sections=None):
+        return {"report_type": "750am_mock", "timestamp": datetime.now().isoformat()}
+    
+    async def generate_800am_report(self, sections=None):
+        return {"report_type": "800am_mock", "timestamp": datetime.now().isoformat()}
+    
+    async def generate_1100am_report(self, sections=None):
+        return {"report_type": "1100am_mock", "timestamp": datetime.now().isoformat()}
+    
+    async def _bulls_gameday_analysis(self):
+        return {"mock": "bulls_analysis"}
+    
+    async def _comprehensive_betting_strategy(self):
+        return {"mock": "betting_strategy"}
+    
+    def calculate_kelly_criterion(self, prob, odds):
+        return max(0, min((prob * odds - 1) / (odds - 1) * 0.25, 0.25))
+    
+    def format_betting_slip(self, bets, stake):
+        return {"mock": "betting_slip", "total_stake": stake}
+    
+    async def save_report(self, report, report_type):
+        """Mock save report"""
+        logger.info(f"Mock saving report: {report_type}")
+        return True
+        
+        def calculate_roi_projection(self, history):
+            return {"roi": 0, "total_bets": 0, "win_rate": 0}
+        
+        async def identify_arbitrage_opportunities(self, odds):
+            return []
+
+
+def load_real_implementations():
+    """Swap the mock scraper/report generator for the real ones (once)"""
+    global scrape_all_data, NBAReportGenerator, _real_implementations_loaded
+    if not _real_implementations_loaded:
+        _real_implementations_loaded = True
+        try:
+            from scrapers import scrape_all_data as real_scrape_all_data
+            from reports import NBAReportGenerator as RealNBAReportGenerator
+            scrape_all_data = real_scrape_all_data
+            NBAReportGenerator = RealNBAReportGenerator
+            print("✅ Anti-bot scraping system loaded")
+        except ImportError as ie:
+            print(f"⚠️ Scrapers not available: {ie}")
+
+
+def get_report_generator(supabase: Client, context=None):
+    """Report generator for this client; the real one needs a database"""
+    if supabase is not None:
+        load_real_implementations()
+    return NBAReportGenerator(supabase, context)
+
+
+async def daily_report_generator(supabase: Client):
+    """Report generator reading the shared daily context instead of its own queries"""
+    return get_report_generator(supabase, await daily_context_store.get(supabase))
+
+
+def configure_concurrency(limit: int):
+    """Cap how many background jobs (ingest cycles, reports) run at once"""
+    global _job_slots
+    _job_slots = asyncio.Semaphore(max(1, limit))
+
+
+@contextlib.asynccontextmanager
+async def job_slot():
+    if _job_slots is None:
+        yield
+        return
+    async with _job_slots:
+        yield
+
+
+async def run_ingest_cycle(supabase: Client, stages: Iterable[str] = INGEST_STAGES):
+    """Scrape and materialize the selected stages, then invalidate API caches"""
+    stages = set(stages)
+    changed = []
+    async with job_slot():
+        load_real_implementations()
+        if "odds" in stages:
+            await scrape_all_data(supabase, include_rosters="rosters" in stages)
+            daily_context_store.invalidate(ODDS)
+            changed.append(ODDS)
+        elif "rosters" in stages:
+            from scrapers import scrape_all_team_rosters
+            await scrape_all_team_rosters(supabase)
+        if stages & {"odds", "rosters"}:
+            await refresh_reference_data(supabase)
+            changed.append(REFERENCE)
+        if "analytics" in stages:
+            await refresh_team_analytics(supabase)
+            changed.append(TEAM_ANALYTICS)
+    await invalidations.publish(supabase, *changed)
+
+
+async def refresh_reference_data(supabase: Client):
+    """Reload the teams/players snapshot and rebuild the player search index"""
+    snapshot = await reference_store.refresh(supabase)
+    daily_context_store.invalidate(REFERENCE)
+    if snapshot is not None:
+        player_index.build(snapshot.players, built_at=snapshot.loaded_at)
+        logger.info(f"Player search index built with {len(player_index)} players")
+
+
+async def refresh_team_analytics(supabase: Client):
+    """Re-materialize per-team analytics from the current games and lines"""
+    snapshot = reference_store.snapshot
+    if snapshot is not None:
+        await team_analytics_store.refresh(supabase, snapshot.teams, snapshot.players_by_team)
+
+
+async def scrape_rosters_and_refresh(supabase: Client, season: str = "2025", job=None):
+    """Scrape all rosters, then refresh the reference snapshot and search index
+
+    ``job`` (a tracked job from job_registry) receives per-team progress.
+    """
+    from scrapers import scrape_all_team_rosters
+
+    def progress(current, total, rows, team):
+        job.update(current=current, total=total, rows=rows, message=f"Scraped {team}")
+
+    summary = await scrape_all_team_rosters(supabase, season, progress if job else None)
+    if job:
+        job.update(message="Refreshing reference data")
+    await refresh_reference_data(supabase)
+    await invalidations.publish(supabase, REFERENCE)
+    return summary
+
+
+async def run_roster_scrape(supabase: Client, job):
+    """Job handler: roster scrape for ``job.params["season"]``"""
+    return await scrape_rosters_and_refresh(supabase, job.params.get("season", "2025"), job)
+
+
+async def run_bulls_scrape(supabase: Client, job):
+    """Job handler: Bulls players scrape, then a reference data refresh"""
+    from scrapers import get_bulls_players_data, save_bulls_players
+
+    job.update(message="Scraping Bulls players")
+    players = await get_bulls_players_data()
+    if not players:
+        raise RuntimeError("No Bulls players found or scraping failed")
+    await save_bulls_players(supabase, players)
+    job.update(message="Refreshing reference data")
+    await refresh_reference_data(supabase)
+    await invalidations.publish(supabase, REFERENCE)
+    return {"players_count": len(players)}
+
+
+def register_job_handlers():
+    job_registry.register("roster_scrape", run_roster_scrape)
+    job_registry.register("bulls_scrape", run_bulls_scrape)
+
+
+async def scrape_loop(supabase: Client, stop_evt: asyncio.Event,
+                      stages: Iterable[str] = INGEST_STAGES,
+                      interval: float = SCRAPE_INTERVAL_SECONDS,
+                      run_first: bool = True):
+    """Background loop to scrape data at regular intervals
+
+    With ``run_first`` false the first cycle waits one interval.
+    """
+    try:
+        if not run_first:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stop_evt.wait(), timeout=interval)
+        while not stop_evt.is_set():
+            try:
+                await run_ingest_cycle(supabase, stages)
+            except Exception as e:
+                logger.error(f"Ingest cycle failed: {e}")
+            try:
+                await asyncio.wait_for(stop_evt.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+    except asyncio.CancelledError:
+        print("Scrape loop cancelled")
+        raise
+
+
+async def generate_750am_report(supabase: Client):
+    """Generate 7:50 AM report"""
+    try:
+        print(f"[{datetime.now().isoformat()}] Generating 7:50 AM report...")
+        async with job_slot():
+            generator = await daily_report_generator(supabase)
+            report = await generator.generate_750am_report()
+            await generator.save_report(report, "750am_previous_day")
+        print(f"[{datetime.now().isoformat()}] 7:50 AM report completed")
+    except Exception as e:
+        print(f"Error generating 7:50 AM report: {e}")
+
+
+async def generate_800am_report(supabase: Client):
+    """Generate 8:00 AM report"""
+    try:
+        print(f"[{datetime.now().isoformat()}] Generating 8:00 AM report...")
+        async with job_slot():
+            generator = await daily_report_generator(supabase)
+            report = await generator.generate_800am_report()
+            await generator.save_report(report, "800am_morning")
+        print(f"[{datetime.now().isoformat()}] 8:00 AM report completed")
+    except Exception as e:
+        print(f"Error generating 8:00 AM report: {e}")
+
+
+async def generate_1100am_report(supabase: Client):
+    """Generate 11:00 AM report"""
+    try:
+        print(f"[{datetime.now().isoformat()}] Generating 11:00 AM report...")
+        async with job_slot():
+            generator = await daily_report_generator(supabase)
+            report = await generator.generate_1100am_report()
+            await generator.save_report(report, "1100am_gameday")
+        print(f"[{datetime.now().isoformat()}] 11:00 AM report completed")
+    except Exception as e:
+        print(f"Error generating 11:00 AM report: {e}")
+
+
+def create_report_scheduler(supabase: Client):
+    """APScheduler with the three daily Chicago-time reports (not started)"""
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from apscheduler.triggers.cron import CronTrigger
+    import pytz
+
+    chicago_tz = pytz.timezone(CHICAGO_TZ)
+    scheduler = AsyncIOScheduler(timezone=chicago_tz)
+
+    scheduler.add_job(
+        generate_750am_report,
+        CronTrigger(hour=7, minute=50, timezone=chicago_tz),
+        args=[supabase],
+        id="report_750am"
+    )
+
+    scheduler.add_job(
+        generate_800am_report,
+        CronTrigger(hour=8, minute=0, timezone=chicago_tz),
+        args=[supabase],
+        id="report_800am"
+    )
+
+    scheduler.add_job(
+        generate_1100am_report,
+        CronTrigger(hour=11, minute=0, timezone=chicago_tz),
+        args=[supabase],
+        id="report_1100am"
+    )
+    return scheduler
+
+
+async def start_background_jobs(state, stages: Iterable[str] = STAGES,
+                                interval: float = SCRAPE_INTERVAL_SECONDS,
+                                scrape_on_start: bool = True):
+    """Start the report scheduler, scrape loop and job executor (leader only)
+
+    ``state`` is ``app.state`` in the API process or the worker's state.
+    ``scrape_on_start`` runs an ingest cycle right away: the loop's first
+    cycle, or a single cycle when no ingest stage is selected.
+    """
+    stages = set(stages)
+    state.scheduler = None
+    state.scrape_task = None
+    state.job_executor = None
+
+    # Jobs queued by any API process (roster scrapes, ...) run here
+    if job_registry.supabase is not None:
+        state.job_executor = asyncio.create_task(job_registry.execute())
+
+    if "reports" in stages:
+        state.scheduler = create_report_scheduler(state.supabase)
+        state.scheduler.start()
+        print(f"✅ Scheduler running in this process (pid {os.getpid()})")
+
+    ingest_stages = [stage for stage in INGEST_STAGES if stage in stages]
+    if state.supabase and ingest_stages:
+        state.stop_evt = asyncio.Event()
+        state.scrape_task = asyncio.create_task(
+            scrape_loop(state.supabase, state.stop_evt, ingest_stages, interval, scrape_on_start)
+        )
+        print(f"✅ Background scraping task started ({', '.join(ingest_stages)})")
+    elif ingest_stages:
+        print("⚠️ Background scraping disabled - no Supabase connection")
+    elif scrape_on_start and state.supabase:
+        state.scrape_task = asyncio.create_task(run_ingest_cycle(state.supabase))
+        print("✅ Startup scrape started")
+
+
+async def stop_background_jobs(state):
+    """Stop the scheduler, scrape loop and job executor when leadership is lost or on shutdown"""
+    if getattr(state, "stop_evt", None):
+        state.stop_evt.set()
+    for name in ("scrape_task", "job_executor"):
+        task = getattr(state, name, None)
+        if task:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        setattr(state, name, None)
+    scheduler = getattr(state, "scheduler", None)
+    if scheduler:
+        scheduler.shutdown(wait=False)
+    state.scheduler = None
+
+
+# -- cache invalidation handlers (API processes) ----------------------------
+
+async def reload_reference_data(supabase: Client, since: Optional[float]):
+    await refresh_reference_data(supabase)
+
+
+async def reload_team_analytics(supabase: Client, since: Optional[float]):
+    await team_analytics_store.load(supabase)
+
+
+async def replay_odds_changes(supabase: Client, since: Optional[float]):
+    """Feed lines written by the worker into this process's odds stream
+
+    Reads resume from the newest row already replayed; rows sharing that
+    timestamp are read again and dropped by the broadcaster as unchanged.
+    """
+    global _odds_replayed_until
+    from odds_stream import odds_broadcaster
+    from odds_summary import SUMMARY_COLUMNS
+
+    now = datetime.now(timezone.utc)
+    start = datetime.fromtimestamp(since, timezone.utc) if since else now - timedelta(hours=1)
+    start = _odds_replayed_until or start.isoformat()
+    rows = await fetch_all(
+        lambda: supabase.table("odds").select(f"{SUMMARY_COLUMNS},updated_at")
+        .gte("updated_at", start).order("updated_at").order("id")
+    )
+    if rows:
+        _odds_replayed_until = max(str(row.get("updated_at") or "") for row in rows) or _odds_replayed_until
+    odds_broadcaster.publish(rows)
+    daily_context_store.invalidate(ODDS)
+
+
+def register_invalidation_handlers():
+    invalidations.on(REFERENCE, reload_reference_data)
+    invalidations.on(TEAM_ANALYTICS, reload_team_analytics)
+    invalidations.on(ODDS, replay_odds_changes)
@@ -0,0 +1,159 @@
+"""
+Batch and portfolio Kelly sizing
+Functions take arrays of win probabilities and decimal odds; ``size_bets``
+validates raw input (decimal or American odds) for the batch endpoint.
+
+``fractional_kelly`` sizes every bet on its own, vectorized over arrays of
+win probabilities and odds (the same quarter-Kelly, 25%-capped rule as
+NBAReportGenerator.calculate_kelly_criterion).
+
+``simultaneous_kelly`` sizes bets that are open at the same time from one
+bankroll. It maximizes the second-order expansion of expected log growth,
+
+    E[log(1 + f.r)] ~= f.mu - 1/2 f'(D + mu mu')f
+
+for independent bets with per-unit return r_i (b_i on a win, -1 on a loss),
+mean mu_i and variance D_ii, subject to f >= 0 and sum(f) <= max_exposure.
+The mu mu' term is what couples the bets: the more +EV bets run together,
+the less each one gets. The rank-one structure makes every solve O(n)
+(Sherman-Morrison), so hundreds of bets take about a millisecond.
+"""
+
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Sequence
+
+from odds_matrix import to_decimal
+
+# numpy is imported on first use, not at API startup
+if TYPE_CHECKING:
+    import numpy as np
+
+KELLY_FRACTION = 0.25
+MAX_BET_FRACTION = 0.25
+MAX_EXPOSURE = 0.5
+MAX_KELLY_BETS = 1000
+MODES = ("independent", "simultaneous")
+
+
+def _arrays(probs: Sequence[float], odds: Sequence[float]):
+    """Validated probability and decimal-odds arrays; odds may be decimal or American"""
+    import numpy as np
+
+    p = np.asarray(probs, dtype=float)
+    if p.shape != np.shape(odds) or p.ndim != 1:
+        raise ValueError("probs and odds must be flat arrays of the same length")
+    if len(p) > MAX_KELLY_BETS:
+        raise ValueError(f"At most {MAX_KELLY_BETS} bets per request")
+    if np.any(np.isnan(p)) or np.any((p < 0) | (p > 1)):
+        raise ValueError("probs must be between 0 and 1")
+    return p, to_decimal(np.asarray(odds, dtype=float))
+
+
+def full_kelly(p: "np.ndarray", decimal: "np.ndarray") -> "np.ndarray":
+    """Kelly fraction (bp - q) / b per bet; 0 for no edge or invalid odds"""
+    import numpy as np
+
+    b = decimal - 1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        kelly = (b * p - (1 - p)) / b
+    return np.where(np.isnan(kelly), 0.0, np.maximum(kelly, 0.0))
+
+
+def fractional_kelly(p: "np.ndarray", decimal: "np.ndarray", fraction: float = KELLY_FRACTION,
+                     max_bet: float = MAX_BET_FRACTION) -> "np.ndarray":
+    """Independent fractional-Kelly stake (share of bankroll) for every bet"""
+    import numpy as np
+
+    return np.minimum(full_kelly(p, decimal) * fraction, max_bet)
+
+
+def _solve(mu: "np.ndarray", var: "np.ndarray", active: "np.ndarray", rhs: "np.ndarray") -> "np.ndarray":
+    """(D + mu mu')^-1 rhs restricted to the active bets (Sherman-Morrison), 0 elsewhere"""
+    import numpy as np
+
+    inv_var = np.where(active, 1 / np.where(active, var, 1.0), 0.0)
+    y = inv_var * rhs
+    z = inv_var * mu
+    return y - z * (mu @ y) / (1 + mu @ z)
+
+
+def simultaneous_kelly(p: "np.ndarray", decimal: "np.ndarray", fraction: float = KELLY_FRACTION,
+                       max_exposure: float = MAX_EXPOSURE) -> "np.ndarray":
+    """Joint stakes for concurrent independent bets under a total-exposure cap
+
+    Full-Kelly weights are optimized with the cap scaled up by ``fraction``
+    and then scaled down, so the returned stakes never exceed
+    ``max_exposure`` in total.
+    """
+    import numpy as np
+
+    b = np.where(np.isnan(decimal), 0.0, decimal - 1)
+    mu = p * b - (1 - p)
+    var = p * (1 - p) * (b + 1) ** 2
+    cap = max_exposure / fraction
+    active = (mu > 0) & (var > 0)
+    ones = np.ones_like(mu)
+    # Active-set iteration: solve the KKT system for the bets still in play,
+    # drop any the exposure multiplier pushes below zero, repeat
+    while active.any():
+        f = _solve(mu, var, active, mu)
+        if f.sum() > cap:
+            # Stakes are linear in the multiplier lam: f(lam) = f(0) - lam M^-1 1
+            shrink = _solve(mu, var, active, ones)
+            f = f - shrink * (f.sum() - cap) / shrink.sum()
+        negative = active & (f < 0)
+        if not negative.any():
+            return np.where(active, f, 0.0) * fraction
+        active &= ~negative
+    return np.zeros_like(mu)
+
+
+def expected_log_growth(p: "np.ndarray", decimal: "np.ndarray", stakes: "np.ndarray") -> float:
+    """Second-order expected log growth of the bankroll for the given stakes"""
+    import numpy as np
+
+    b = np.where(np.isnan(decimal), 0.0, decimal - 1)
+    mu = p * b - (1 - p)
+    var = p * (1 - p) * (b + 1) ** 2
+    return float(stakes @ mu - 0.5 * (stakes ** 2 @ var + (stakes @ mu) ** 2))
+
+
+def size_bets(probs: Sequence[float], odds: Sequence[float], mode: str = "independent",
+              fraction: float = KELLY_FRACTION, max_exposure: Optional[float] = MAX_EXPOSURE,
+              bankroll: Optional[float] = None) -> Dict:
+    """Stakes for a batch of bets; raises ValueError for bad input"""
+    import numpy as np
+
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}'; choose from {', '.join(MODES)}")
+    if not 0 < fraction <= 1:
+        raise ValueError("fraction must be in (0, 1]")
+    if max_exposure is not None and max_exposure <= 0:
+        raise ValueError("max_exposure must be positive")
+    started = time.perf_counter()
+    p, decimal = _arrays(probs, odds)
+    if mode == "independent":
+        stakes = fractional_kelly(p, decimal, fraction)
+        # Independent sizing ignores the shared bankroll; the cap only scales it down
+        total = stakes.sum()
+        if max_exposure is not None and total > max_exposure:
+            stakes = stakes * (max_exposure / total)
+    else:
+        stakes = simultaneous_kelly(p, decimal, fraction, max_exposure if max_exposure is not None else np.inf)
+    edges = np.where(np.isnan(decimal), 0.0, p * decimal - 1)
+    result = {
+        "mode": mode,
+        "fraction": fraction,
+        "max_exposure": max_exposure,
+        "count": len(p),
+        "stakes": np.round(stakes, 6).tolist(),
+        "full_kelly": np.round(full_kelly(p, decimal), 6).tolist(),
+        "edges": np.round(edges, 6).tolist(),
+        "total_exposure": round(float(stakes.sum()), 6),
+        "expected_log_growth": round(expected_log_growth(p, decimal, stakes), 8),
+    }
+    if bankroll is not None:
+        result["bankroll"] = bankroll
+        result["amounts"] = np.round(stakes * bankroll, 2).tolist()
+    result["compute_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return result
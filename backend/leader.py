@@ -0,0 +1,193 @@
+"""
+Leader election for background jobs across uvicorn workers
+Exactly one process runs the report scheduler and scrape loop. The default
+lease is an flock on the data volume, released by the OS when the holder
+dies; LEADER_BACKEND=redis uses a Redis key with a renewed TTL instead, for
+workers spread over several hosts. Followers keep retrying, so a new leader
+takes over automatically.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LEADER_BACKEND = os.getenv("LEADER_BACKEND", "file").lower()
+LEADER_LOCK_FILE = Path(os.getenv("DATA_DIR") or Path(__file__).resolve().parent / "data") / "scheduler.lock"
+LEADER_REDIS_KEY = os.getenv("LEADER_REDIS_KEY", "nba:scheduler:leader")
+LEADER_LEASE_SECONDS = float(os.getenv("LEADER_LEASE_SECONDS", "30"))
+LEADER_RETRY_SECONDS = float(os.getenv("LEADER_RETRY_SECONDS", "5"))
+
+
+def process_identity() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class FileLease:
+    """Exclusive flock on a file; the kernel drops it when the process exits"""
+
+    name = "file"
+
+    def __init__(self, path: Path = LEADER_LOCK_FILE, identity: Optional[str] = None):
+        self.path = path
+        self.identity = identity or process_identity()
+        self._fd: Optional[int] = None
+
+    async def acquire(self) -> bool:
+        import fcntl
+
+        if self._fd is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, self.identity.encode())
+        self._fd = fd
+        return True
+
+    async def renew(self) -> bool:
+        # An flock cannot expire while the descriptor is open
+        return self._fd is not None
+
+    async def release(self):
+        import fcntl
+
+        if self._fd is None:
+            return
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    async def holder(self) -> Optional[str]:
+        try:
+            return self.path.read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+
+# Only the current holder may extend or delete the key
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLease:
+    """SET NX with a TTL, renewed by the holder before it expires"""
+
+    name = "redis"
+
+    def __init__(self, redis_url: str, key: str = LEADER_REDIS_KEY,
+                 lease_seconds: float = LEADER_LEASE_SECONDS, identity: Optional[str] = None):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(redis_url, decode_responses=True)
+        self.key = key
+        self.lease_ms = int(lease_seconds * 1000)
+        self.identity = identity or process_identity()
+
+    async def acquire(self) -> bool:
+        return bool(await self.client.set(self.key, self.identity, nx=True, px=self.lease_ms))
+
+    async def renew(self) -> bool:
+        return bool(await self.client.eval(_RENEW_SCRIPT, 1, self.key, self.identity, self.lease_ms))
+
+    async def release(self):
+        try:
+            await self.client.eval(_RELEASE_SCRIPT, 1, self.key, self.identity)
+        finally:
+            await self.client.aclose()
+
+    async def holder(self) -> Optional[str]:
+        return await self.client.get(self.key)
+
+
+def create_lease(redis_url: Optional[str] = None):
+    """Lease for LEADER_BACKEND; falls back to the file lock if Redis is unavailable"""
+    if LEADER_BACKEND == "redis" and redis_url:
+        try:
+            return RedisLease(redis_url)
+        except ImportError as ie:
+            logger.warning(f"Redis leader lease unavailable ({ie}); using file lock")
+    return FileLease()
+
+
+class LeaderElection:
+    """Campaign for a lease and run callbacks on election and demotion"""
+
+    def __init__(self, lease, lease_seconds: float = LEADER_LEASE_SECONDS,
+                 retry_seconds: float = LEADER_RETRY_SECONDS):
+        self.lease = lease
+        # Renew well inside the lease so one slow renewal does not lose it
+        self.renew_seconds = lease_seconds / 3
+        self.retry_seconds = retry_seconds
+        self.is_leader = False
+        self.elected_at: Optional[float] = None
+        self.terms = 0
+
+    async def campaign(self, on_elected: Callable[[], Awaitable[None]],
+                       on_demoted: Callable[[], Awaitable[None]]):
+        """Run until cancelled; leadership is given up on cancellation"""
+        try:
+            while True:
+                if not self.is_leader:
+                    try:
+                        acquired = await self.lease.acquire()
+                    except Exception as e:
+                        logger.warning(f"Leader lease acquire failed: {e}")
+                        acquired = False
+                    if acquired:
+                        self.is_leader = True
+                        self.elected_at = time.time()
+                        self.terms += 1
+                        logger.info(f"Elected leader ({self.lease.name} lease, {self.lease.identity})")
+                        await on_elected()
+                        continue
+                    await asyncio.sleep(self.retry_seconds)
+                else:
+                    await asyncio.sleep(self.renew_seconds)
+                    try:
+                        renewed = await self.lease.renew()
+                    except Exception as e:
+                        logger.warning(f"Leader lease renewal failed: {e}")
+                        renewed = False
+                    if not renewed:
+                        # Step down before another process can take the lease
+                        logger.warning("Lost leader lease; stopping background jobs")
+                        self.is_leader = False
+                        await on_demoted()
+        finally:
+            if self.is_leader:
+                self.is_leader = False
+                await on_demoted()
+            await self.lease.release()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "backend": self.lease.name,
+            "identity": self.lease.identity,
+            "is_leader": self.is_leader,
+            "elected_at": self.elected_at,
+            "terms": self.terms,
+        }
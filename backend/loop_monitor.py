@@ -0,0 +1,204 @@
+"""
+Event-loop lag watchdog with blocking-call attribution
+A heartbeat task sleeps for a fixed interval and measures how late it wakes
+up: that scheduling delay is the loop lag every other coroutine saw. While
+the loop is stuck the heartbeat cannot run, so a watchdog thread notices the
+missing beat and grabs the loop thread's stack at that moment, pointing at
+the blocking call (a sync query, BeautifulSoup parsing, ...). When the beat
+finally lands, the stall's duration is charged to that stack.
+
+Offenders are grouped by their innermost frames in this code base and kept
+with counts and total blocked time for /api/status and /metrics.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100"))
+# Offenders kept; the one with the least blocked time is dropped beyond this
+MAX_OFFENDERS = 100
+TOP_OFFENDERS = 10
+# Innermost app frames that name an offender
+OFFENDER_FRAMES = 3
+LAG_SMOOTHING = 0.1
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+UNATTRIBUTED = "unattributed"
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+def attribute(frame) -> Tuple[str, List[str]]:
+    """(offender key, leaf-first stack) for the loop thread's current frame
+
+    The key is the innermost frames that belong to this code base, so a
+    stall inside httpx or bs4 is charged to the app code that called it.
+    """
+    stack, app_frames = [], []
+    while frame is not None:
+        label = frame_label(frame)
+        stack.append(label)
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(APP_DIR) and os.path.basename(filename) != os.path.basename(__file__):
+            app_frames.append(label)
+        frame = frame.f_back
+    key_frames = app_frames[:OFFENDER_FRAMES] or stack[:1]
+    return (" <- ".join(key_frames) if key_frames else UNATTRIBUTED), stack
+
+
+class Offender:
+    __slots__ = ("key", "count", "blocked_seconds", "max_seconds", "last_seen", "stack")
+
+    def __init__(self, key: str, stack: List[str]):
+        self.key = key
+        self.stack = stack
+        self.count = 0
+        self.blocked_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seen = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "offender": self.key,
+            "count": self.count,
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "max_seconds": round(self.max_seconds, 3),
+            "last_seen": self.last_seen,
+            "stack": self.stack,
+        }
+
+
+class LoopMonitor:
+    """Measures loop lag continuously and attributes stalls to a stack"""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL_MS / 1000,
+                 threshold: float = LOOP_LAG_THRESHOLD_MS / 1000):
+        self.interval = interval
+        self.threshold = threshold
+        self.beats = 0
+        self.last_beat: Optional[float] = None
+        self.last_lag = 0.0
+        self.avg_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.blocked_seconds = 0.0
+        self.offenders: Dict[str, Offender] = {}
+        self.running = False
+        self._loop_thread: Optional[int] = None
+        # (beat number, key, stack) captured by the watchdog during a stall
+        self._captured: Optional[Tuple[int, str, List[str]]] = None
+        self._stop = threading.Event()
+
+    async def run(self, stop_evt: Optional[asyncio.Event] = None):
+        """Heartbeat until cancelled (or ``stop_evt`` is set); starts the watchdog thread"""
+        self._loop_thread = threading.get_ident()
+        self.last_beat = time.perf_counter()
+        self._stop.clear()
+        watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        watchdog.start()
+        self.running = True
+        try:
+            while stop_evt is None or not stop_evt.is_set():
+                expected = time.perf_counter() + self.interval
+                await asyncio.sleep(self.interval)
+                self.beat(max(0.0, time.perf_counter() - expected))
+        finally:
+            self.running = False
+            self._stop.set()
+
+    def beat(self, lag: float):
+        now = time.perf_counter()
+        self.last_lag = lag
+        self.avg_lag = (1 - LAG_SMOOTHING) * self.avg_lag + LAG_SMOOTHING * lag
+        self.max_lag = max(self.max_lag, lag)
+        if lag >= self.threshold:
+            captured = self._captured
+            if captured is not None and captured[0] == self.beats:
+                _, key, stack = captured
+            else:
+                key, stack = UNATTRIBUTED, []
+            self.record_stall(key, stack, lag)
+        self._captured = None
+        self.beats += 1
+        self.last_beat = now
+
+    def _watch(self):
+        """Watchdog thread: snapshot the loop thread's stack once per stall"""
+        # Halfway into the threshold the loop is still inside any stall that
+        # will exceed it, so the captured stack is the blocking one
+        poll = max(self.threshold / 4, 0.005)
+        while not self._stop.wait(poll):
+            last, captured = self.last_beat, self._captured
+            if last is None or (captured is not None and captured[0] == self.beats):
+                continue
+            if time.perf_counter() - last > self.interval + self.threshold / 2:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    key, stack = attribute(frame)
+                    self._captured = (self.beats, key, stack)
+
+    def record_stall(self, key: str, stack: List[str], seconds: float):
+        self.stalls += 1
+        self.blocked_seconds += seconds
+        offender = self.offenders.get(key)
+        if offender is None:
+            if len(self.offenders) >= MAX_OFFENDERS:
+                smallest = min(self.offenders.values(), key=lambda o: o.blocked_seconds)
+                del self.offenders[smallest.key]
+            offender = self.offenders[key] = Offender(key, stack)
+        offender.count += 1
+        offender.blocked_seconds += seconds
+        offender.max_seconds = max(offender.max_seconds, seconds)
+        offender.last_seen = time.time()
+        if stack:
+            offender.stack = stack
+        logger.warning(f"Event loop blocked for {seconds * 1000:.0f}ms by {key}")
+
+    def top_offenders(self, limit: int = TOP_OFFENDERS) -> List[Offender]:
+        return sorted(self.offenders.values(), key=lambda o: -o.blocked_seconds)[:limit]
+
+    def status(self) -> Dict:
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "lag_ms": round(self.last_lag * 1000, 1),
+            "avg_lag_ms": round(self.avg_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stalls": self.stalls,
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "top_offenders": [o.to_dict() for o in self.top_offenders()],
+        }
+
+    def metric_families(self):
+        """Lag gauges, stall counters and per-offender blocked time for /metrics"""
+        top = self.top_offenders()
+        return [
+            ("event_loop_lag_seconds", "gauge", "Scheduling delay of the last heartbeat",
+             [({}, round(self.last_lag, 6))]),
+            ("event_loop_max_lag_seconds", "gauge", "Largest scheduling delay seen",
+             [({}, round(self.max_lag, 6))]),
+            ("event_loop_stalls_total", "counter", "Heartbeats later than the threshold",
+             [({}, self.stalls)]),
+            ("event_loop_blocked_seconds_total", "counter", "Time the loop spent blocked in stalls",
+             [({}, round(self.blocked_seconds, 6))]),
+            ("event_loop_offender_blocked_seconds_total", "counter", "Blocked time by offending stack",
+             [({"offender": o.key}, round(o.blocked_seconds, 6)) for o in top]),
+            ("event_loop_offender_stalls_total", "counter", "Stalls by offending stack",
+             [({"offender": o.key}, o.count) for o in top]),
+        ]
+
+
+loop_monitor = LoopMonitor()
@@ -4,63 +4,68 @@ import contextlib
 import logging
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-import anyio
-# Import supabase through isolated client to avoid conflicts
-from supabase_client import create_isolated_supabase_client, get_supabase_config
-from typing import Any as Client  # Use Any as Client placeholder to fix typing
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from supabase_client import get_supabase_config
+from db import create_database, fetch_all
+from player_queries import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    apply_keyset,
+    build_player_select,
+    paginate,
+    project_row,
+)
+from player_search import DEFAULT_SEARCH_LIMIT, player_index
+from reference_data import reference_store
+from odds_summary import SUMMARY_COLUMNS, group_odds_by_game, parse_game_ids
+from odds_matrix import OddsMatrix
+from odds_stream import odds_broadcaster, parse_last_event_id
+from arbitrage import arbitrage_scanner
+from kelly import KELLY_FRACTION, MAX_EXPOSURE, size_bets
+from monte_carlo import (
+    MC_DAYS,
+    MC_PATHS,
+    MC_RUIN_LEVEL,
+    MC_SEED,
+    MC_SIMULATIONS,
+    simulate_bankroll,
+    simulate_parlays,
+)
+from team_analytics import detail_view, team_analytics_store
+from leader import LeaderElection, create_lease
+from invalidation import invalidations
+from job_registry import job_registry
+from admission import admission_control
+from daily_context import daily_context_store
+from report_sections import parse_sections, section_memo
+from metrics import (
+    METRICS_ENABLED,
+    PROMETHEUS_CONTENT_TYPE,
+    MetricsMiddleware,
+    TimedJSONResponse,
+    metrics_registry,
+    run_sync,
+)
+from profiler import ProfileRequestMiddleware, sampling_profiler
+from loop_monitor import LOOP_MONITOR_ENABLED, loop_monitor
+from jobs import (
+    BACKGROUND_JOBS,
+    SCRAPE_INTERVAL_SECONDS,
+    STAGES,
+    daily_report_generator,
+    get_report_generator,
+    refresh_reference_data,
+    refresh_team_analytics,
+    register_invalidation_handlers,
+    register_job_handlers,
+    start_background_jobs,
+    stop_background_jobs,
+)
 from dotenv import load_dotenv
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
-import pytz
-
-# Temporarily use mock implementations to avoid httpx_socks conflicts with supabase
-# These will be loaded dynamically when needed
-def scrape_all_data(*args, **kwargs):
-    """Mock scraper function - will be replaced with real implementation"""
-    logger.info("Using mock scraper - anti-bot functionality disabled for now")
-    return {}
-
-class NBAReportGenerator:
-    """Mock report generator - will be replaced with real implementation"""
-    def __init__(self, supabase_client):
-        self.supabase = supabase_client
-        logger.info("Using mock report generator")
-    
-    async def generate_750am_report(self):
-        return {"report_type": "750am_mock", "timestamp": datetime.now().isoformat()}
-    
-    async def generate_800am_report(self):
-        return {"report_type": "800am_mock", "timestamp": datetime.now().isoformat()}
-    
-    async def generate_1100am_report(self):
-        return {"report_type": "1100am_mock", "timestamp": datetime.now().isoformat()}
-    
-    async def _bulls_gameday_analysis(self):
-        return {"mock": "bulls_analysis"}
-    
-    async def _comprehensive_betting_strategy(self):
-        return {"mock": "betting_strategy"}
-    
-    def calculate_kelly_criterion(self, prob, odds):
-        return max(0, min((prob * odds - 1) / (odds - 1) * 0.25, 0.25))
-    
-    def format_betting_slip(self, bets, stake):
-        return {"mock": "betting_slip", "total_stake": stake}
-    
-    async def save_report(self, report, report_type):
-        """Mock save report"""
-        logger.info(f"Mock saving report: {report_type}")
-        return True
-        
-        def calculate_roi_projection(self, history):
-            return {"roi": 0, "total_bets": 0, "win_rate": 0}
-        
-        async def identify_arbitrage_opportunities(self, odds):
-            return []
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -72,64 +77,12 @@ SUPABASE_URL = os.getenv("SUPABASE_URL") or os.getenv("VITE_SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("VITE_SUPABASE_ANON_KEY")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_SERVICE_KEY")
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
-SCRAPE_INTERVAL_SECONDS = 6 * 60 * 60
-CHICAGO_TZ = pytz.timezone("America/Chicago")
-
-
-async def scrape_loop(supabase: Client, stop_evt: asyncio.Event):
-    """Background loop to scrape data at regular intervals"""
-    try:
-        while not stop_evt.is_set():
-            await scrape_all_data(supabase)
-            try:
-                await asyncio.wait_for(stop_evt.wait(), timeout=SCRAPE_INTERVAL_SECONDS)
-            except asyncio.TimeoutError:
-                pass
-    except asyncio.CancelledError:
-        print("Scrape loop cancelled")
-        raise
-
-
-async def generate_750am_report(supabase: Client):
-    """Generate 7:50 AM report"""
-    try:
-        print(f"[{datetime.now().isoformat()}] Generating 7:50 AM report...")
-        generator = NBAReportGenerator(supabase)
-        report = await generator.generate_750am_report()
-        await generator.save_report(report, "750am_previous_day")
-        print(f"[{datetime.now().isoformat()}] 7:50 AM report completed")
-    except Exception as e:
-        print(f"Error generating 7:50 AM report: {e}")
-
-
-async def generate_800am_report(supabase: Client):
-    """Generate 8:00 AM report"""
-    try:
-        print(f"[{datetime.now().isoformat()}] Generating 8:00 AM report...")
-        generator = NBAReportGenerator(supabase)
-        report = await generator.generate_800am_report()
-        await generator.save_report(report, "800am_morning")
-        print(f"[{datetime.now().isoformat()}] 8:00 AM report completed")
-    except Exception as e:
-        print(f"Error generating 8:00 AM report: {e}")
-
-
-async def generate_1100am_report(supabase: Client):
-    """Generate 11:00 AM report"""
-    try:
-        print(f"[{datetime.now().isoformat()}] Generating 11:00 AM report...")
-        generator = NBAReportGenerator(supabase)
-        report = await generator.generate_1100am_report()
-        await generator.save_report(report, "1100am_gameday")
-        print(f"[{datetime.now().isoformat()}] 11:00 AM report completed")
-    except Exception as e:
-        print(f"Error generating 11:00 AM report: {e}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage app lifecycle - startup and shutdown"""
-    # Initialize Supabase client first  
+    # Initialize the async Supabase (PostgREST) client first
     try:
         config = get_supabase_config()
         
@@ -138,7 +91,9 @@ async def lifespan(app: FastAPI):
             
         # Use SERVICE_ROLE_KEY for backend operations (has elevated privileges)
         service_key = config["service_key"] or config["anon_key"]
-        supabase = create_isolated_supabase_client(config["url"], service_key)
+        supabase = create_database(config["url"], service_key)
+        if supabase is None:
+            raise ValueError("Failed to create database client")
         app.state.supabase = supabase
         
         if config["service_key"]:
@@ -146,88 +101,81 @@ async def lifespan(app: FastAPI):
         else:
             print("⚠️ Starting application with Supabase (Anon Key - limited permissions)")
         
-        # Import scrapers after Supabase client is created to avoid conflicts
-        try:
-            from scrapers import scrape_all_data as real_scrape_all_data
-            from reports import NBAReportGenerator as RealNBAReportGenerator
-            
-            # Replace mock functions with real implementations
-            global scrape_all_data, NBAReportGenerator
-            scrape_all_data = real_scrape_all_data
-            NBAReportGenerator = RealNBAReportGenerator
-            print("✅ Anti-bot scraping system loaded")
-            
-        except ImportError as ie:
-            print(f"⚠️ Scrapers not available: {ie}")
-        
-        # Start data scraping on startup (only if enabled)
-        if os.getenv("AUTO_SCRAPE_ON_START", "false").lower() == "true":
-            await scrape_all_data(supabase)
-        else:
-            print("Automatic scraping on startup disabled. Use /api/scrape endpoints to trigger manually.")
+        # Load the teams/players snapshot and the in-memory player search index
+        await refresh_reference_data(supabase)
+
+        # Serve the last materialized team analytics; compute them if there are
+        # none, unless the worker owns them
+        if await team_analytics_store.load(supabase) is None and BACKGROUND_JOBS == "inline":
+            await refresh_team_analytics(supabase)
             
     except Exception as e:
         print(f"❌ Error initializing Supabase: {e}")
         print("Running in development mode without Supabase...")
         app.state.supabase = None
-
-    # Set up scheduler for reports if scheduling is enabled (even without Supabase in dev mode)
+        # Serve the last persisted teams/players snapshot, if any
+        await refresh_reference_data(None)
+
+    # Loop lag watchdog: stalls are logged and charged to the blocking stack
+    monitor = asyncio.create_task(loop_monitor.run()) if LOOP_MONITOR_ENABLED else None
+
+    # Jobs submitted here are queued in the database for the executor
+    job_registry.attach(app.state.supabase)
+    register_job_handlers()
+
+    # Reload in-memory caches when another process (worker or leader) writes data
+    register_invalidation_handlers()
+    app.state.invalidation_stop = asyncio.Event()
+    listener = (
+        asyncio.create_task(invalidations.listen(app.state.supabase, app.state.invalidation_stop))
+        if app.state.supabase else None
+    )
+
+    # Reports, scraping (including the startup scrape) and queued jobs run in
+    # exactly one process, the elected leader, unless BACKGROUND_JOBS=worker
+    # hands them to worker.py
     scheduler_enabled = os.getenv("ENABLE_SCHEDULER", "false").lower() == "true"
+    scrape_on_start = os.getenv("AUTO_SCRAPE_ON_START", "false").lower() == "true"
     
-    if scheduler_enabled:
-        scheduler = AsyncIOScheduler(timezone=CHICAGO_TZ)
-
-        scheduler.add_job(
-            generate_750am_report,
-            CronTrigger(hour=7, minute=50, timezone=CHICAGO_TZ),
-            args=[app.state.supabase],
-            id="report_750am"
-        )
-
-        scheduler.add_job(
-            generate_800am_report,
-            CronTrigger(hour=8, minute=0, timezone=CHICAGO_TZ),
-            args=[app.state.supabase],
-            id="report_800am"
-        )
-
-        scheduler.add_job(
-            generate_1100am_report,
-            CronTrigger(hour=11, minute=0, timezone=CHICAGO_TZ),
-            args=[app.state.supabase],
-            id="report_1100am"
-        )
-
-        scheduler.start()
-        print("✅ Scheduler enabled and running")
-
-        if app.state.supabase:
-            app.state.stop_evt = asyncio.Event()
-            task = asyncio.create_task(scrape_loop(app.state.supabase, app.state.stop_evt))
-            print("✅ Background scraping task started")
-        else:
-            print("⚠️ Background scraping disabled - no Supabase connection")
-            task = None
-    else:
+    if not scheduler_enabled:
         print("❌ Scheduler disabled - set ENABLE_SCHEDULER=true to enable")
-        scheduler = None
-        task = None
+    if not scrape_on_start:
+        print("Automatic scraping on startup disabled. Use /api/scrape endpoints to trigger manually.")
+
+    if BACKGROUND_JOBS == "inline" and (scheduler_enabled or scrape_on_start or app.state.supabase):
+        stages = STAGES if scheduler_enabled else ()
+        app.state.leader = LeaderElection(create_lease(REDIS_URL))
+        campaign = asyncio.create_task(app.state.leader.campaign(
+            lambda: start_background_jobs(app.state, stages, scrape_on_start=scrape_on_start),
+            lambda: stop_background_jobs(app.state),
+        ))
+        print(f"✅ Campaigning for background-job leadership ({app.state.leader.lease.name} lease)")
+    else:
+        if BACKGROUND_JOBS == "worker":
+            print("ℹ️ Background jobs run in worker.py; this process only serves reads")
+        app.state.leader = None
+        campaign = None
 
     try:
         yield
     finally:
         print("Shutting down application...")
-        if hasattr(app.state, 'stop_evt') and app.state.stop_evt:
-            app.state.stop_evt.set()
-        if task:
-            task.cancel()
+        await job_registry.shutdown()
+        if campaign:
+            campaign.cancel()
             with contextlib.suppress(asyncio.CancelledError):
-                await task
-        if scheduler:
-            scheduler.shutdown(wait=False)
+                await campaign
+        app.state.invalidation_stop.set()
+        for task in (listener, monitor):
+            if task:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        if getattr(app.state, "supabase", None):
+            await app.state.supabase.aclose()
 
 
-app = FastAPI(title="NBA Analysis API", lifespan=lifespan)
+app = FastAPI(title="NBA Analysis API", lifespan=lifespan, default_response_class=TimedJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -235,8 +183,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-Id"],
 )
 
+# Outermost, so the Server-Timing breakdown covers CORS and error handling too
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+metrics_registry.add_collector(admission_control.metric_families)
+metrics_registry.add_collector(loop_monitor.metric_families)
+odds_broadcaster.on_change(arbitrage_scanner.apply)
+# Per-request profiling (X-Profile header) only exists when PROFILER_TOKEN is set
+if sampling_profiler.enabled:
+    app.add_middleware(ProfileRequestMiddleware, profiler=sampling_profiler)
+
 
 @app.get("/health")
 async def health():
@@ -248,76 +207,143 @@ async def health():
 async def get_teams():
     """Get all teams"""
     try:
+        snapshot = reference_store.snapshot
+        if snapshot is not None:
+            return {"teams": list(snapshot.teams)}
+
         supabase = app.state.supabase
-        response = await anyio.to_thread.run_sync(
-            lambda: supabase.table("teams").select("*").execute()
-        )
+        response = await supabase.table("teams").select("*").execute()
         return {"teams": response.data}
     except Exception as e:
         return {"error": str(e)}, 500
 
 
 @app.get("/api/games/today")
-async def get_today_games():
-    """Get today's games"""
+async def get_today_games(include: Optional[str] = None):
+    """Get today's games (include=odds_summary embeds best line and consensus per market)"""
+    if include not in (None, "", "odds_summary"):
+        raise HTTPException(status_code=400, detail=f"Unknown include option: {include}")
     try:
         supabase = app.state.supabase
         today = datetime.now().date()
         tomorrow = today + timedelta(days=1)
 
-        response = await anyio.to_thread.run_sync(
-            lambda: supabase.table("games")
+        response = await (
+            supabase.table("games")
             .select("*")
             .gte("commence_time", today.isoformat())
             .lt("commence_time", tomorrow.isoformat())
             .execute()
         )
-        return {"games": response.data}
+        games = response.data
+
+        if include == "odds_summary" and games:
+            game_ids = [g["id"] for g in games]
+            # Paged: the odds table is append-only, so a slate easily passes one page
+            rows = await fetch_all(
+                lambda: supabase.table("odds").select(SUMMARY_COLUMNS).in_("game_id", game_ids).order("id")
+            )
+            matrix = OddsMatrix.build(rows, games)
+            games = [{**game, "odds_summary": matrix.summary(game["id"])} for game in games]
+
+        return {"games": games}
     except Exception as e:
         return {"error": str(e)}, 500
 
 
+@app.get("/api/odds")
+async def get_odds_batch(game_ids: str):
+    """Get odds for several games with one query, grouped by game id"""
+    try:
+        ids = parse_game_ids(game_ids)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    try:
+        supabase = app.state.supabase
+        rows = await fetch_all(lambda: supabase.table("odds").select("*").in_("game_id", ids).order("id"))
+        grouped = group_odds_by_game(rows, ids)
+        return {"odds": grouped, "count": len(grouped)}
+    except Exception as e:
+        logger.error(f"Error fetching batched odds: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch odds")
+
+
+@app.get("/api/stream/odds")
+async def stream_odds(
+    last_event_id: Optional[str] = Header(None),
+    since: Optional[str] = Query(None, description="Resume after this event id (EventSource fallback)"),
+):
+    """Server-Sent Events stream of changed odds lines"""
+    resume_from = parse_last_event_id(last_event_id or since)
+
+    async def events():
+        async for event in odds_broadcaster.subscribe(resume_from):
+            yield event.sse
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/ws/odds")
+async def odds_websocket(websocket: WebSocket, last_event_id: Optional[str] = None):
+    """WebSocket stream of changed odds lines"""
+    await websocket.accept()
+    try:
+        async for event in odds_broadcaster.subscribe(parse_last_event_id(last_event_id)):
+            await websocket.send_text(event.ws)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+
+
 @app.get("/api/odds/{game_id}")
 async def get_game_odds(game_id: str):
     """Get odds for a specific game"""
     try:
         supabase = app.state.supabase
-        response = await anyio.to_thread.run_sync(
-            lambda: supabase.table("odds").select("*").eq("game_id", game_id).execute()
-        )
+        response = await supabase.table("odds").select("*").eq("game_id", game_id).execute()
         return {"odds": response.data}
     except Exception as e:
         return {"error": str(e)}, 500
 
 
 @app.get("/api/players")
-async def get_all_players(team: str = None, position: str = None, active: bool = True):
-    """Get all players with optional filters"""
+async def get_all_players(
+    team: str = None,
+    position: str = None,
+    active: bool = True,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+):
+    """Get players with optional filters, keyset pagination and field projection"""
     try:
         supabase = app.state.supabase
-        
-        query = supabase.table("players").select("""
-            *,
-            teams!players_team_id_fkey (
-                abbreviation,
-                full_name,
-                city,
-                name
-            )
-        """)
-        
-        if team:
-            query = query.eq("team_abbreviation", team.upper())
-        if position:
-            query = query.ilike("position", f"%{position}%")
-        if active is not None:
-            query = query.eq("is_active", active)
-            
-        # Order by team, then by jersey number
-        query = query.order("team_abbreviation").order("jersey_number")
-        
-        response = await anyio.to_thread.run_sync(lambda: query.execute())
-        return {"players": response.data, "count": len(response.data)}
+
+        try:
+            select = build_player_select(fields, include)
+            query = supabase.table("players").select(select)
+
+            if team:
+                query = query.eq("team_abbreviation", team.upper())
+            if position:
+                query = query.ilike("position", f"%{position}%")
+            if active is not None:
+                query = query.eq("is_active", active)
+
+            # Order by team, then by jersey number (id breaks ties for the cursor)
+            query = apply_keyset(query, cursor, limit)
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
+
+        response = await query.execute()
+        players, next_cursor = paginate(response.data, limit)
+        return {"players": players, "count": len(players), "next_cursor": next_cursor}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching players: {e}")
         return {"error": str(e)}, 500
@@ -327,10 +353,19 @@ async def get_all_players(team: str = None, position: str = None, active: bool =
 async def get_team_players(team_abbrev: str):
     """Get all players for a specific team"""
     try:
+        snapshot = reference_store.snapshot
+        if snapshot is not None:
+            if snapshot.team(team_abbrev) is None:
+                raise HTTPException(status_code=404, detail=f"Team '{team_abbrev}' not found")
+            players = snapshot.team_players(team_abbrev)
+            if not players:
+                return {"players": [], "count": 0, "message": f"No active players found for {team_abbrev}"}
+            return {"team": team_abbrev.upper(), "players": players, "count": len(players)}
+
         supabase = app.state.supabase
         
-        response = await anyio.to_thread.run_sync(
-            lambda: supabase.table("players")
+        response = await (
+            supabase.table("players")
             .select("""
                 *,
                 teams!players_team_id_fkey (
@@ -348,8 +383,8 @@ async def get_team_players(team_abbrev: str):
         
         if not response.data:
             # Check if team exists
-            team_check = await anyio.to_thread.run_sync(
-                lambda: supabase.table("teams")
+            team_check = await (
+                supabase.table("teams")
                 .select("abbreviation")
                 .eq("abbreviation", team_abbrev.upper())
                 .execute()
@@ -376,10 +411,17 @@ async def get_team_players(team_abbrev: str):
 async def get_player_details(player_id: str):
     """Get detailed information for a specific player"""
     try:
+        snapshot = reference_store.snapshot
+        if snapshot is not None:
+            player = snapshot.player(player_id)
+            if player is None:
+                raise HTTPException(status_code=404, detail=f"Player with ID '{player_id}' not found")
+            return {"player": player}
+
         supabase = app.state.supabase
         
-        response = await anyio.to_thread.run_sync(
-            lambda: supabase.table("players")
+        response = await (
+            supabase.table("players")
             .select("""
                 *,
                 teams!players_team_id_fkey (
@@ -405,111 +447,229 @@ async def get_player_details(player_id: str):
 
 
 @app.get("/api/players/search/{name}")
-async def search_players_by_name(name: str):
-    """Search players by name"""
+async def search_players_by_name(
+    name: str,
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+):
+    """Search players by name (in-memory index, database fallback until it is built)"""
     try:
+        if player_index.ready and not cursor:
+            try:
+                players = [
+                    {**project_row(player, fields, include), "score": score}
+                    for player, score in player_index.search(name, limit)
+                ]
+            except ValueError as ve:
+                raise HTTPException(status_code=400, detail=str(ve))
+            return {
+                "query": name,
+                "players": players,
+                "count": len(players),
+                "next_cursor": None,
+                "source": "index"
+            }
+
         supabase = app.state.supabase
-        
-        response = await anyio.to_thread.run_sync(
-            lambda: supabase.table("players")
-            .select("""
-                *,
-                teams!players_team_id_fkey (
-                    abbreviation,
-                    full_name,
-                    city,
-                    name
-                )
-            """)
-            .ilike("name", f"%{name}%")
-            .eq("is_active", True)
-            .order("name")
-            .execute()
-        )
-        
+
+        try:
+            query = (
+                supabase.table("players")
+                .select(build_player_select(fields, include))
+                .ilike("name", f"%{name}%")
+                .eq("is_active", True)
+            )
+            query = apply_keyset(query, cursor, limit)
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
+
+        response = await query.execute()
+        players, next_cursor = paginate(response.data, limit)
         return {
             "query": name,
-            "players": response.data, 
-            "count": len(response.data)
+            "players": players,
+            "count": len(players),
+            "next_cursor": next_cursor,
+            "source": "database"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error searching players: {e}")
         return {"error": str(e)}, 500
 
 
-@app.post("/api/scrape/rosters")
+@app.post("/api/scrape/rosters", dependencies=[admission_control.guard("scrape")])
 async def trigger_roster_scrape(season: str = "2025"):
-    """Manually trigger roster scraping for all teams"""
+    """Manually trigger roster scraping for all teams
+
+    Queues a tracked job for the executor (elected leader or worker); a
+    scrape already queued or running for the same season is returned
+    instead of starting another one.
+    """
+    supabase = app.state.supabase
+    if supabase is None:
+        raise HTTPException(status_code=503, detail="Database is not available")
     try:
-        from scrapers import scrape_all_team_rosters
-        
-        supabase = app.state.supabase
-        
-        # Run roster scraping in background
-        asyncio.create_task(scrape_all_team_rosters(supabase, season))
-        
+        job, created = await job_registry.submit("roster_scrape", key=season, params={"season": season})
         return {
-            "message": f"Roster scraping initiated for season {season}",
+            "message": f"Roster scraping {'initiated' if created else 'already in progress'} for season {season}",
             "timestamp": datetime.now().isoformat(),
-            "status": "in_progress"
+            "status": job.status,
+            "job_id": job.id,
+            "created": created,
+            "job": job.to_dict(),
         }
     except Exception as e:
         logger.error(f"Error triggering roster scrape: {e}")
         raise HTTPException(status_code=500, detail="Failed to trigger roster scraping")
 
 
+@app.get("/api/jobs")
+async def list_jobs(kind: Optional[str] = None, status: Optional[str] = None):
+    """Background jobs, newest first"""
+    try:
+        jobs = await job_registry.list(kind=kind, status=status)
+    except Exception as e:
+        logger.error(f"Error listing jobs: {e}")
+        raise HTTPException(status_code=500, detail="Failed to list jobs")
+    return {"jobs": [job.to_dict() for job in jobs], "count": len(jobs)}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Progress, timings and result of one job"""
+    job = await job_registry.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job.to_dict()
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued job, or ask the executor to stop a running one"""
+    job = await job_registry.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job.to_dict()
+
+
 @app.get("/api/status")
 async def get_status():
     """Get application status"""
     return {
         "status": "running",
         "scrape_interval_hours": SCRAPE_INTERVAL_SECONDS / 3600,
+        "reference_data": reference_store.status(),
+        "odds_stream": odds_broadcaster.status(),
+        "arbitrage": arbitrage_scanner.status(),
+        "team_analytics": team_analytics_store.status(),
+        "background_jobs": BACKGROUND_JOBS,
+        "leader": app.state.leader.status() if getattr(app.state, "leader", None) else None,
+        "cache_invalidation": invalidations.status(),
+        "tracked_jobs": job_registry.status(),
+        "admission": admission_control.status(),
+        "profiler": sampling_profiler.status(),
+        "event_loop": loop_monitor.status(),
+        "daily_context": daily_context_store.status(),
+        "report_sections": section_memo.status(),
         "timestamp": datetime.now().isoformat(),
     }
 
 
-@app.get("/api/reports/750am")
-async def get_750am_report():
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus scrape endpoint: per-route latency histograms and admission gauges"""
+    return Response(metrics_registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def require_profiler(token: Optional[str]):
+    """404 while profiling is off (the default), 403 for a wrong token"""
+    if not sampling_profiler.enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not sampling_profiler.authorized(token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/api/admin/profile", include_in_schema=False)
+async def capture_profile(
+    seconds: float = Query(10, gt=0),
+    interval_ms: Optional[float] = Query(None, ge=1, le=1000),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Sample every thread's stack for N seconds; returns collapsed stacks for flamegraphs"""
+    require_profiler(x_admin_token)
+    if seconds > sampling_profiler.max_seconds:
+        raise HTTPException(status_code=400, detail=f"At most {sampling_profiler.max_seconds:g} seconds per capture")
+    output = await sampling_profiler.capture(seconds, interval_ms)
+    if output is None:
+        raise HTTPException(status_code=409, detail="A profile capture is already running")
+    return PlainTextResponse(output)
+
+
+@app.get("/api/admin/profile/{profile_id}", include_in_schema=False)
+async def get_request_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Collapsed stacks of a request sent with ``X-Profile: <token>``"""
+    require_profiler(x_admin_token)
+    output = sampling_profiler.recent.get(profile_id)
+    if output is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return PlainTextResponse(output)
+
+
+SECTIONS_HELP = "Comma separated report sections to compute, e.g. slate_overview,betting_strategy"
+
+
+@app.get("/api/reports/750am", dependencies=[admission_control.guard("reports")])
+async def get_750am_report(sections: Optional[str] = Query(None, description=SECTIONS_HELP)):
     """Get 7:50 AM report (previous day analysis)"""
     try:
         supabase = app.state.supabase
-        generator = NBAReportGenerator(supabase)
-        report = await generator.generate_750am_report()
+        generator = await daily_report_generator(supabase)
+        report = await generator.generate_750am_report(parse_sections(sections))
         return report
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         return {"error": str(e)}, 500
 
 
-@app.get("/api/reports/800am")
-async def get_800am_report():
+@app.get("/api/reports/800am", dependencies=[admission_control.guard("reports")])
+async def get_800am_report(sections: Optional[str] = Query(None, description=SECTIONS_HELP)):
     """Get 8:00 AM report (morning summary)"""
     try:
         supabase = app.state.supabase
-        generator = NBAReportGenerator(supabase)
-        report = await generator.generate_800am_report()
+        generator = await daily_report_generator(supabase)
+        report = await generator.generate_800am_report(parse_sections(sections))
         return report
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         return {"error": str(e)}, 500
 
 
-@app.get("/api/reports/1100am")
-async def get_1100am_report():
+@app.get("/api/reports/1100am", dependencies=[admission_control.guard("reports")])
+async def get_1100am_report(sections: Optional[str] = Query(None, description=SECTIONS_HELP)):
     """Get 11:00 AM report (game-day scouting)"""
     try:
         supabase = app.state.supabase
-        generator = NBAReportGenerator(supabase)
-        report = await generator.generate_1100am_report()
+        generator = await daily_report_generator(supabase)
+        report = await generator.generate_1100am_report(parse_sections(sections))
         return report
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         return {"error": str(e)}, 500
 
 
-@app.get("/api/bulls-analysis")
+@app.get("/api/bulls-analysis", dependencies=[admission_control.guard("analysis")])
 async def get_bulls_analysis():
     """Get Bulls-focused analysis and recommendations"""
     try:
         supabase = app.state.supabase
-        generator = NBAReportGenerator(supabase)
+        generator = await daily_report_generator(supabase)
         analysis = await generator._bulls_gameday_analysis()
         return analysis
     except Exception as e:
@@ -517,47 +677,39 @@ async def get_bulls_analysis():
         raise HTTPException(status_code=500, detail="Failed to generate Bulls analysis")
 
 
-@app.post("/api/scrape/bulls-players")
+@app.post("/api/scrape/bulls-players", dependencies=[admission_control.guard("scrape")])
 async def scrape_bulls_players_endpoint():
-    """Manually trigger Bulls players scraping with anti-bot protection"""
+    """Manually trigger Bulls players scraping with anti-bot protection
+
+    Queued like the roster scrape, so with BACKGROUND_JOBS=worker the
+    worker does the scraping and writing, not the API process.
+    """
+    supabase = app.state.supabase
+    if supabase is None:
+        raise HTTPException(status_code=503, detail="Database is not available")
     try:
-        from scrapers import get_bulls_players_data, save_bulls_players
-        
         logger.info("Manual Bulls players scraping triggered")
-        supabase = app.state.supabase
-        
-        # Scrape Bulls players using advanced anti-bot protection
-        players = await get_bulls_players_data()
-        
-        if players:
-            await save_bulls_players(supabase, players)
-            logger.info(f"Successfully scraped and saved {len(players)} Bulls players")
-            return {
-                "success": True,
-                "message": f"Successfully scraped {len(players)} Bulls players",
-                "players_count": len(players),
-                "timestamp": datetime.now().isoformat()
-            }
-        else:
-            logger.warning("No Bulls players scraped")
-            return {
-                "success": False,
-                "message": "No Bulls players found or scraping failed",
-                "players_count": 0,
-                "timestamp": datetime.now().isoformat()
-            }
-            
+        job, created = await job_registry.submit("bulls_scrape", key="bulls")
+        return {
+            "success": True,
+            "message": f"Bulls players scraping {'initiated' if created else 'already in progress'}",
+            "timestamp": datetime.now().isoformat(),
+            "status": job.status,
+            "job_id": job.id,
+            "created": created,
+            "job": job.to_dict(),
+        }
     except Exception as e:
         logger.error(f"Error scraping Bulls players: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to scrape Bulls players: {str(e)}")
 
 
-@app.get("/api/betting-recommendations")
+@app.get("/api/betting-recommendations", dependencies=[admission_control.guard("analysis")])
 async def get_betting_recommendations():
     """Get current betting recommendations"""
     try:
         supabase = app.state.supabase
-        generator = NBAReportGenerator(supabase)
+        generator = await daily_report_generator(supabase)
         recommendations = await generator._comprehensive_betting_strategy()
         return recommendations
     except Exception as e:
@@ -565,16 +717,23 @@ async def get_betting_recommendations():
         raise HTTPException(status_code=500, detail="Failed to generate betting recommendations")
 
 
-@app.get("/api/arbitrage-opportunities")
-async def get_arbitrage_opportunities():
-    """Find arbitrage betting opportunities"""
+@app.get("/api/arbitrage-opportunities", dependencies=[admission_control.guard("analysis")])
+async def get_arbitrage_opportunities(middles: bool = True):
+    """Current arbitrage (and middle) opportunities from the live odds index"""
     try:
-        supabase = app.state.supabase
-        generator = NBAReportGenerator(supabase)
-        # Mock odds data - replace with real API integration
-        odds_data = []
-        opportunities = await generator.identify_arbitrage_opportunities(odds_data)
-        return {"opportunities": opportunities, "count": len(opportunities)}
+        # Seed the index once per day; the odds stream keeps it current after that
+        today = datetime.now().date()
+        if arbitrage_scanner.seeded_day != today:
+            context = await daily_context_store.get(app.state.supabase)
+            if context is not None:
+                arbitrage_scanner.load(context.today_games, context.today_odds(), context.day)
+        arbitrage_scanner.prune_started()
+        opportunities = arbitrage_scanner.opportunities("arbitrage")
+        result = {"opportunities": opportunities, "count": len(opportunities)}
+        if middles:
+            result["middles"] = arbitrage_scanner.opportunities("middle")
+        result["updated_at"] = arbitrage_scanner.updated_at
+        return result
     except Exception as e:
         logger.error(f"Error finding arbitrage opportunities: {e}")
         raise HTTPException(status_code=500, detail="Failed to find arbitrage opportunities")
@@ -585,7 +744,7 @@ async def generate_betting_slip(bets: List[dict], total_stake: float = 100):
     """Generate professional betting slip with Kelly criterion sizing"""
     try:
         supabase = app.state.supabase
-        generator = NBAReportGenerator(supabase)
+        generator = get_report_generator(supabase)
         formatted_slip = generator.format_betting_slip(bets, total_stake)
         return formatted_slip
     except Exception as e:
@@ -598,7 +757,7 @@ async def calculate_kelly(estimated_prob: float, decimal_odds: float):
     """Calculate Kelly Criterion bet sizing"""
     try:
         supabase = app.state.supabase
-        generator = NBAReportGenerator(supabase)
+        generator = get_report_generator(supabase)
         kelly_fraction = generator.calculate_kelly_criterion(estimated_prob, decimal_odds)
         return {
             "kelly_fraction": kelly_fraction,
@@ -610,12 +769,63 @@ async def calculate_kelly(estimated_prob: float, decimal_odds: float):
         raise HTTPException(status_code=500, detail="Failed to calculate Kelly criterion")
 
 
+@app.post("/api/kelly-calculator/batch")
+async def calculate_kelly_batch(
+    probs: List[float] = Body(..., description="Win probability per bet"),
+    odds: List[float] = Body(..., description="Decimal (1.91) or American (-110) odds per bet"),
+    mode: str = Query("independent", description="independent or simultaneous"),
+    fraction: float = Query(KELLY_FRACTION, description="Kelly multiplier (0.25 = quarter Kelly)"),
+    max_exposure: Optional[float] = Query(MAX_EXPOSURE, description="Cap on the total share of bankroll staked"),
+    bankroll: Optional[float] = None,
+):
+    """Size many bets at once; simultaneous mode splits one bankroll across concurrent bets"""
+    try:
+        return size_bets(probs, odds, mode, fraction, max_exposure, bankroll)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+
+@app.post("/api/monte-carlo/parlays", dependencies=[admission_control.guard("analysis")])
+async def simulate_parlay_legs(
+    probs: List[float] = Body(..., description="Win probability per leg"),
+    odds: List[float] = Body(..., description="Decimal or American odds per leg"),
+    parlays: Optional[List[List[int]]] = Body(None, description="Leg indices per parlay; all legs when omitted"),
+    correlation: Optional[List[List[float]]] = Body(None, description="Pairwise leg correlation matrix"),
+    simulations: int = Query(MC_SIMULATIONS, ge=1, le=10 * MC_SIMULATIONS),
+    seed: int = MC_SEED,
+):
+    """Monte Carlo hit rate, EV and legs-hit distribution per parlay (reproducible for a seed)"""
+    try:
+        parlays = parlays if parlays is not None else [list(range(len(probs)))]
+        return await run_sync(simulate_parlays, probs, odds, parlays, correlation, simulations, seed)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+
+@app.post("/api/monte-carlo/bankroll", dependencies=[admission_control.guard("analysis")])
+async def simulate_bankroll_risk(
+    probs: List[float] = Body(..., description="Win probability per bet"),
+    odds: List[float] = Body(..., description="Decimal or American odds per bet"),
+    stakes: List[float] = Body(..., description="Share of bankroll staked per bet"),
+    correlation: Optional[List[List[float]]] = Body(None, description="Pairwise bet correlation matrix"),
+    days: int = Query(MC_DAYS, ge=1, le=10 * MC_DAYS),
+    paths: int = Query(MC_PATHS, ge=1, le=10 * MC_PATHS),
+    ruin_level: float = Query(MC_RUIN_LEVEL, gt=0, lt=1, description="Share of the starting bankroll that counts as ruin"),
+    seed: int = MC_SEED,
+):
+    """Final bankroll, drawdown and risk-of-ruin distributions from replaying a slate of stakes"""
+    try:
+        return await run_sync(simulate_bankroll, probs, odds, stakes, correlation, days, paths, ruin_level, seed)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+
 @app.get("/api/performance-metrics")
 async def get_performance_metrics():
     """Get betting performance and ROI metrics"""
     try:
         supabase = app.state.supabase
-        generator = NBAReportGenerator(supabase)
+        generator = get_report_generator(supabase)
         # Mock bet history - replace with real database
         bet_history = []
         metrics = generator.calculate_roi_projection(bet_history)
@@ -625,174 +835,71 @@ async def get_performance_metrics():
         raise HTTPException(status_code=500, detail="Failed to calculate performance metrics")
 
 
+async def current_team_analytics():
+    """Materialized team analytics, loading (or computing) them on first use
+
+    With BACKGROUND_JOBS=worker the worker owns the analytics, so API
+    processes only load what it materialized.
+    """
+    if not team_analytics_store.ready:
+        reference = reference_store.snapshot
+        if BACKGROUND_JOBS == "inline" and reference is not None:
+            await team_analytics_store.ensure(app.state.supabase, reference.teams, reference.players_by_team)
+        else:
+            await team_analytics_store.ensure(app.state.supabase)
+    if not team_analytics_store.ready:
+        raise HTTPException(status_code=503, detail="Team analytics are not available yet")
+    return team_analytics_store.snapshot
+
+
 @app.get("/api/teams/analysis")
 async def get_teams_analysis():
     """Get comprehensive analysis for all NBA teams"""
     try:
-        supabase = app.state.supabase
-        
-        # Get all teams with basic info
-        teams_response = await anyio.to_thread.run_sync(
-            lambda: supabase.table("teams").select("*").order("abbreviation").execute()
-        )
-        
-        # Generate mock analysis data for each team (in production, this would come from real data)
-        teams_analysis = []
-        conferences = {
-            'Eastern': ['ATL', 'BOS', 'BKN', 'CHA', 'CHI', 'CLE', 'DET', 'IND', 'MIA', 'MIL', 'NYK', 'ORL', 'PHI', 'TOR', 'WAS'],
-            'Western': ['DAL', 'DEN', 'GSW', 'HOU', 'LAC', 'LAL', 'MEM', 'MIN', 'NOP', 'OKC', 'PHX', 'POR', 'SAC', 'SAS', 'UTA']
-        }
-        
-        divisions = {
-            'Atlantic': ['BOS', 'BKN', 'NYK', 'PHI', 'TOR'],
-            'Central': ['CHI', 'CLE', 'DET', 'IND', 'MIL'],
-            'Southeast': ['ATL', 'CHA', 'MIA', 'ORL', 'WAS'],
-            'Northwest': ['DEN', 'MIN', 'OKC', 'POR', 'UTA'],
-            'Pacific': ['GSW', 'LAC', 'LAL', 'PHX', 'SAC'],
-            'Southwest': ['DAL', 'HOU', 'MEM', 'NOP', 'SAS']
-        }
-        
-        for team in teams_response.data:
-            abbr = team['abbreviation']
-            
-            # Determine conference and division
-            conference = 'Eastern' if abbr in conferences['Eastern'] else 'Western'
-            division = next((div for div, teams in divisions.items() if abbr in teams), 'Unknown')
-            
-            # Mock statistics (in production, fetch from games/odds tables)
-            import random
-            wins = random.randint(15, 45)
-            losses = random.randint(15, 45)
-            
-            team_analysis = {
-                **team,
-                'conference': conference,
-                'division': division,
-                'season_stats': {
-                    'wins': wins,
-                    'losses': losses,
-                    'win_percentage': round(wins / (wins + losses), 3),
-                    'points_per_game': round(random.uniform(105, 125), 1),
-                    'points_allowed': round(random.uniform(105, 125), 1),
-                    'offensive_rating': round(random.uniform(105, 125), 1),
-                    'defensive_rating': round(random.uniform(105, 125), 1),
-                    'net_rating': round(random.uniform(-15, 15), 1)
-                },
-                'recent_form': {
-                    'last_10': f"{random.randint(3, 8)}-{random.randint(2, 7)}",
-                    'last_5': f"{random.randint(1, 5)}-{random.randint(0, 4)}",
-                    'home_record': f"{random.randint(8, 25)}-{random.randint(5, 20)}",
-                    'away_record': f"{random.randint(5, 20)}-{random.randint(10, 25)}",
-                    'vs_conference': f"{random.randint(10, 25)}-{random.randint(10, 25)}"
-                },
-                'betting_stats': {
-                    'ats_record': f"{random.randint(25, 35)}-{random.randint(20, 30)}",
-                    'ats_percentage': round(random.uniform(0.45, 0.60), 3),
-                    'over_under': f"{random.randint(25, 35)}-{random.randint(20, 30)}",
-                    'ou_percentage': round(random.uniform(0.45, 0.60), 3),
-                    'avg_total': round(random.uniform(210, 235), 1)
-                },
-                'key_players': [
-                    f"Player {random.randint(1, 50)}",
-                    f"Player {random.randint(1, 50)}",
-                    f"Player {random.randint(1, 50)}"
-                ],
-                'strength_rating': random.randint(65, 95),
-                'last_updated': datetime.now().isoformat()
-            }
-            
-            teams_analysis.append(team_analysis)
-        
-        return {
-            'teams': teams_analysis,
-            'count': len(teams_analysis),
-            'conferences': {
-                'Eastern': [t for t in teams_analysis if t['conference'] == 'Eastern'],
-                'Western': [t for t in teams_analysis if t['conference'] == 'Western']
-            }
-        }
-        
+        snapshot = await current_team_analytics()
+        return snapshot.listing()
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching teams analysis: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch teams analysis")
 
 
+@app.get("/api/teams/compare")
+async def compare_teams(
+    team1: Optional[str] = None,
+    team2: Optional[str] = None,
+    team3: Optional[str] = None,
+    teams: Optional[str] = Query(None, description="Comma separated abbreviations, e.g. CHI,BOS,LAL"),
+):
+    """Compare 2..N teams side by side; deltas are relative to the first team"""
+    abbrevs = [a for a in (team1, team2, team3) if a]
+    abbrevs += [a.strip() for a in (teams or "").split(",") if a.strip()]
+    abbrevs = list(dict.fromkeys(a.upper() for a in abbrevs))
+    if len(abbrevs) < 2:
+        raise HTTPException(status_code=400, detail="At least two teams are required")
+    try:
+        snapshot = await current_team_analytics()
+        return snapshot.compare(abbrevs)
+    except KeyError as ke:
+        raise HTTPException(status_code=404, detail=f"Unknown team(s): {ke.args[0]}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error comparing teams {abbrevs}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to compare teams")
+
+
 @app.get("/api/teams/{team_abbrev}/analysis")
 async def get_team_analysis(team_abbrev: str):
     """Get detailed analysis for a specific team"""
     try:
-        supabase = app.state.supabase
         team_abbrev = team_abbrev.upper()
-        
-        # Get team basic info
-        team_response = await anyio.to_thread.run_sync(
-            lambda: supabase.table("teams")
-            .select("*")
-            .eq("abbreviation", team_abbrev)
-            .single()
-            .execute()
-        )
-        
-        if not team_response.data:
+        snapshot = await current_team_analytics()
+        team = snapshot.team(team_abbrev)
+        if team is None:
             raise HTTPException(status_code=404, detail=f"Team '{team_abbrev}' not found")
-        
-        team = team_response.data
-        
-        # Generate comprehensive team analysis
-        import random
-        from datetime import datetime, timedelta
-        
-        # Mock recent games
-        recent_games = []
-        for i in range(5):
-            game_date = datetime.now() - timedelta(days=(i+1)*3)
-            opponent = random.choice(['LAL', 'BOS', 'GSW', 'MIA', 'PHX'])
-            is_home = random.choice([True, False])
-            team_score = random.randint(95, 130)
-            opp_score = random.randint(95, 130)
-            
-            recent_games.append({
-                'date': game_date.strftime('%Y-%m-%d'),
-                'opponent': opponent,
-                'home': is_home,
-                'team_score': team_score,
-                'opponent_score': opp_score,
-                'result': 'W' if team_score > opp_score else 'L',
-                'margin': abs(team_score - opp_score)
-            })
-        
-        # Generate detailed analysis
-        analysis = {
-            **team,
-            'season_record': {
-                'wins': random.randint(20, 45),
-                'losses': random.randint(15, 40),
-                'win_percentage': round(random.uniform(0.35, 0.75), 3)
-            },
-            'advanced_stats': {
-                'offensive_rating': round(random.uniform(105, 125), 1),
-                'defensive_rating': round(random.uniform(105, 125), 1),
-                'net_rating': round(random.uniform(-10, 15), 1),
-                'pace': round(random.uniform(95, 105), 1),
-                'effective_fg_percentage': round(random.uniform(0.50, 0.60), 3),
-                'true_shooting_percentage': round(random.uniform(0.52, 0.62), 3)
-            },
-            'recent_games': recent_games,
-            'form_analysis': {
-                'last_10_games': f"{random.randint(4, 8)}-{random.randint(2, 6)}",
-                'home_form': f"{random.randint(10, 20)}-{random.randint(5, 15)}",
-                'away_form': f"{random.randint(8, 18)}-{random.randint(7, 17)}"
-            },
-            'betting_trends': {
-                'ats_home': f"{random.randint(10, 20)}-{random.randint(8, 18)}",
-                'ats_away': f"{random.randint(8, 18)}-{random.randint(10, 20)}",
-                'over_under_home': f"{random.randint(12, 22)}-{random.randint(8, 18)}"
-            },
-            'last_updated': datetime.now().isoformat()
-        }
-        
-        return analysis
-        
+        return detail_view(team)
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,284 @@
+"""
+Per-route latency metrics with a Server-Timing breakdown
+An ASGI middleware times every HTTP request and splits it into phases:
+``db`` (waiting on PostgREST), ``queue`` (waiting for a thread-pool worker),
+``serialize`` (rendering the JSON body) and ``compute`` (everything else).
+The breakdown is sent back as a ``Server-Timing`` header and aggregated into
+per-route histograms served in Prometheus text format at ``/metrics``.
+
+Phases are recorded on the event loop thread only (thread-pool work is timed
+by the awaiting coroutine), so the counters are plain ints with no locks.
+Concurrent database calls (``asyncio.gather``) can add up to more than the
+request's wall time; ``compute`` is clamped at zero in that case.
+"""
+
+import contextvars
+import logging
+import os
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import anyio
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers cached reads (~1ms) up to report generation
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PHASES = ("db", "queue", "compute", "serialize")
+UNMATCHED_ROUTE = "unmatched"
+
+# A family is (name, type, help, [(labels, value), ...])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+class RequestTiming:
+    """Phase durations (seconds) accumulated while one request is handled"""
+
+    __slots__ = ("started", "phases", "calls")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+
+    def breakdown(self, total: float) -> Dict[str, float]:
+        """All phases plus ``compute`` (the remainder) and ``total``"""
+        phases = {phase: self.phases.get(phase, 0.0) for phase in PHASES if phase != "compute"}
+        phases["compute"] = max(0.0, total - sum(phases.values()))
+        phases["total"] = total
+        return phases
+
+
+_current: contextvars.ContextVar[Optional[RequestTiming]] = contextvars.ContextVar("request_timing", default=None)
+
+
+def record(phase: str, seconds: float):
+    """Add time to a phase of the current request (no-op outside a request)"""
+    timing = _current.get()
+    if timing is not None:
+        timing.add(phase, seconds)
+
+
+class timed:
+    """``with timed("db"):`` adds the block's duration to the current request"""
+
+    __slots__ = ("phase", "started")
+
+    def __init__(self, phase: str):
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.phase, time.perf_counter() - self.started)
+        return False
+
+
+async def run_sync(func: Callable, *args) -> Any:
+    """``anyio.to_thread.run_sync`` that records the wait for a free thread
+
+    The time the function itself runs in the thread stays in ``compute``.
+    """
+    submitted = time.perf_counter()
+    started = None
+
+    def call():
+        nonlocal started
+        started = time.perf_counter()
+        return func(*args)
+
+    try:
+        return await anyio.to_thread.run_sync(call)
+    finally:
+        record("queue", (started or time.perf_counter()) - submitted)
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that attributes body rendering to ``serialize``"""
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialize"):
+            return super().render(content)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a label tuple"""
+
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        # labels -> [per-bucket counts (+Inf last), count, sum]
+        self.series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += 1
+        series[2] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, count, total) in sorted(self.series.items()):
+            base = dict(zip(self.label_names, labels))
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{format_labels({**base, 'le': le})} {cumulative}")
+            lines.append(f"{self.name}_count{format_labels(base)} {count}")
+            lines.append(f"{self.name}_sum{format_labels(base)} {total:.6f}")
+        return lines
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def render_family(family: Family) -> List[str]:
+    name, kind, help, samples = family
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{format_labels(labels)} {value}" for labels, value in samples)
+    return lines
+
+
+class MetricsRegistry:
+    """Request histograms and counters, plus collectors for other modules' stats"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.duration = Histogram(
+            "http_request_duration_seconds", "Request latency until the response starts",
+            ("method", "route"), buckets,
+        )
+        self.phases = Histogram(
+            "http_request_phase_seconds", "Request latency by phase (db, queue, compute, serialize)",
+            ("method", "route", "phase"), buckets,
+        )
+        self.db_calls: Dict[Tuple[str, str], int] = {}
+        self.collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]):
+        """``collector()`` returns metric families rendered on every scrape"""
+        self.collectors.append(collector)
+
+    def observe(self, method: str, route: str, status: int, timing: RequestTiming, total: float):
+        key = (method, route, str(status))
+        self.requests[key] = self.requests.get(key, 0) + 1
+        self.duration.observe((method, route), total)
+        breakdown = timing.breakdown(total)
+        for phase in PHASES:
+            self.phases.observe((method, route, phase), breakdown[phase])
+        db_calls = timing.calls.get("db", 0)
+        if db_calls:
+            self.db_calls[(method, route)] = self.db_calls.get((method, route), 0) + db_calls
+
+    def render(self) -> str:
+        lines = render_family((
+            "http_requests_total", "counter", "Requests by route and status",
+            [({"method": m, "route": r, "status": s}, n) for (m, r, s), n in sorted(self.requests.items())],
+        ))
+        lines += self.duration.render()
+        lines += self.phases.render()
+        lines += render_family((
+            "http_request_db_calls_total", "counter", "Database requests made while serving each route",
+            [({"method": m, "route": r}, n) for (m, r), n in sorted(self.db_calls.items())],
+        ))
+        for collector in self.collectors:
+            try:
+                for family in collector():
+                    lines += render_family(family)
+            except Exception as e:
+                logger.error(f"Metrics collector {collector} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+def server_timing(breakdown: Dict[str, float], db_calls: int = 0) -> str:
+    """``db;dur=12.1;desc="3 calls", queue;dur=0.0, ...`` in milliseconds"""
+    parts = []
+    for phase, seconds in breakdown.items():
+        part = f"{phase};dur={seconds * 1000:.1f}"
+        if phase == "db" and db_calls:
+            part += f';desc="{db_calls} calls"'
+        parts.append(part)
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: times each request, adds Server-Timing, records histograms"""
+
+    def __init__(self, app, registry: "MetricsRegistry" = None):
+        self.app = app
+        self.registry = registry or metrics_registry
+        self._route_paths: Dict[Any, str] = {}
+
+    def route_template(self, scope) -> str:
+        """Path template (``/api/odds/{game_id}``) so labels stay low-cardinality"""
+        route = scope.get("route")
+        if route is not None and getattr(route, "path", None):
+            return route.path
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        if not self._route_paths:
+            app = scope.get("app")
+            for r in getattr(app, "routes", ()):
+                if getattr(r, "endpoint", None) is not None:
+                    self._route_paths.setdefault(r.endpoint, r.path)
+        return self._route_paths.get(endpoint, UNMATCHED_ROUTE)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+        responded = False
+
+        async def send_with_timing(message):
+            nonlocal responded
+            if message["type"] == "http.response.start" and not responded:
+                responded = True
+                total = time.perf_counter() - timing.started
+                breakdown = timing.breakdown(total)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(breakdown, timing.calls.get("db", 0)).encode()))
+                message = {**message, "headers": headers}
+                self.registry.observe(scope["method"], self.route_template(scope),
+                                      message["status"], timing, total)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception:
+            if not responded:
+                self.registry.observe(scope["method"], self.route_template(scope), 500,
+                                      timing, time.perf_counter() - timing.started)
+            raise
+        finally:
+            _current.reset(token)
+
+
+metrics_registry = MetricsRegistry()
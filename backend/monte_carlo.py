@@ -0,0 +1,232 @@
+"""
+Monte Carlo simulation of parlays and bankroll risk
+Legs are win/lose events with a probability each and, optionally, a pairwise
+correlation matrix (a Gaussian copula: leg i wins when z_i < Phi^-1(p_i),
+z ~ N(0, correlation)). Outcomes are drawn with NumPy in fixed-size chunks,
+each from its own child of one SeedSequence, so a given seed gives the same
+result whether the chunks run in this process or in a process pool.
+
+``simulate_parlays`` draws every leg once per trial and counts each win/loss
+pattern of the legs (a bitmask, so at most MAX_LEGS legs). Any parlay over
+those legs is then read off the pattern counts: hit rate, EV and how many
+of its legs land, for dozens of parlays from one set of draws.
+
+``simulate_bankroll`` plays the same slate of stakes (shares of the current
+bankroll) day after day and reports final bankroll, maximum drawdown, worst
+day and risk-of-ruin distributions.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence
+
+from kelly import fractional_kelly
+from odds_matrix import to_american, to_decimal
+
+# numpy is imported on first use, not at API startup
+if TYPE_CHECKING:
+    import numpy as np
+
+MC_SIMULATIONS = int(os.getenv("MC_SIMULATIONS", "1000000"))
+# Leg outcomes drawn per chunk; bounds memory per worker
+MC_CHUNK = int(os.getenv("MC_CHUNK", "4000000"))
+# > 1 runs chunks in a process pool
+MC_WORKERS = int(os.getenv("MC_WORKERS", "1"))
+MC_SEED = int(os.getenv("MC_SEED", "0"))
+MC_DAYS = int(os.getenv("MC_DAYS", "100"))
+MC_PATHS = int(os.getenv("MC_PATHS", "20000"))
+# Falling to this share of the starting bankroll counts as ruin
+MC_RUIN_LEVEL = float(os.getenv("MC_RUIN_LEVEL", "0.5"))
+MAX_LEGS = 16
+# Parlays evaluated per call, each a pass over the 2^legs pattern table
+MAX_PARLAYS = int(os.getenv("MC_MAX_PARLAYS", "500"))
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def _legs(probs: Sequence[float], correlation: Optional[Sequence[Sequence[float]]]):
+    """Validated leg probabilities and the copula factor (None for independent legs)"""
+    import numpy as np
+
+    p = np.asarray(probs, dtype=float)
+    if p.ndim != 1 or not 0 < len(p) <= MAX_LEGS:
+        raise ValueError(f"Between 1 and {MAX_LEGS} legs are supported")
+    if np.any(np.isnan(p)) or np.any((p < 0) | (p > 1)):
+        raise ValueError("Leg probabilities must be between 0 and 1")
+    if correlation is None:
+        return p, None
+    corr = np.asarray(correlation, dtype=float)
+    if corr.shape != (len(p), len(p)):
+        raise ValueError("correlation must be a square matrix with one row per leg")
+    if (not np.allclose(corr, corr.T) or not np.allclose(np.diag(corr), 1)
+            or np.any(np.abs(corr) > 1)):
+        raise ValueError("correlation must be symmetric with a unit diagonal and entries in [-1, 1]")
+    values, vectors = np.linalg.eigh(corr)
+    if values.min() < -1e-8:
+        raise ValueError("correlation matrix must be positive semi-definite")
+    if np.allclose(corr, np.eye(len(p))):
+        return p, None
+    return p, vectors * np.sqrt(np.clip(values, 0, None))
+
+
+def _thresholds(p: "np.ndarray") -> "np.ndarray":
+    import numpy as np
+
+    normal = NormalDist()
+    return np.array([-np.inf if q <= 0 else np.inf if q >= 1 else normal.inv_cdf(q) for q in p])
+
+
+def _draw(rng, n: int, p: "np.ndarray", factor: Optional["np.ndarray"], shape=()) -> "np.ndarray":
+    """Boolean leg outcomes, shape ``(n, *shape, legs)``"""
+    size = (n, *shape, len(p))
+    if factor is None:
+        return rng.random(size) < p
+    z = rng.standard_normal(size) @ factor.T
+    return z < _thresholds(p)
+
+
+def _chunks(total: int, per_chunk: int, seed: int):
+    """``(seed_sequence, size)`` per chunk; the split depends only on the arguments"""
+    import numpy as np
+
+    per_chunk = max(1, per_chunk)
+    sizes = [min(per_chunk, total - start) for start in range(0, total, per_chunk)]
+    return list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+
+
+def _map(func: Callable, tasks: List[tuple], workers: int) -> list:
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            return list(pool.map(func, *zip(*tasks)))
+    return [func(*task) for task in tasks]
+
+
+def _pattern_counts(seed, n: int, p: "np.ndarray", factor: Optional["np.ndarray"]) -> "np.ndarray":
+    """How often each win/loss pattern of the legs (bit i = leg i won) came up"""
+    import numpy as np
+
+    wins = _draw(np.random.default_rng(seed), n, p, factor)
+    codes = wins @ (1 << np.arange(len(p)))
+    return np.bincount(codes, minlength=1 << len(p))
+
+
+def simulate_parlays(probs: Sequence[float], odds: Sequence[float], parlays: Sequence[Sequence[int]],
+                     correlation: Optional[Sequence[Sequence[float]]] = None,
+                     simulations: int = MC_SIMULATIONS, seed: int = MC_SEED,
+                     chunk: int = MC_CHUNK, workers: int = MC_WORKERS) -> Dict:
+    """Hit rate, EV and legs-hit distribution for parlays over one set of legs
+
+    ``odds`` are per leg (decimal or American); each parlay lists the
+    indices of its legs. Raises ValueError for bad input.
+    """
+    import numpy as np
+
+    started = time.perf_counter()
+    p, factor = _legs(probs, correlation)
+    decimal = to_decimal(np.asarray(odds, dtype=float))
+    if decimal.shape != p.shape or np.any(np.isnan(decimal)):
+        raise ValueError("Every leg needs valid odds")
+    if simulations <= 0:
+        raise ValueError("simulations must be positive")
+    if len(parlays) > MAX_PARLAYS:
+        raise ValueError(f"At most {MAX_PARLAYS} parlays per simulation")
+    tasks = [(child, size, p, factor) for child, size in _chunks(simulations, chunk // len(p), seed)]
+    counts = np.sum(_map(_pattern_counts, tasks, workers), axis=0)
+    # bits[c, i]: leg i won in pattern c
+    bits = (np.arange(len(counts))[:, None] >> np.arange(len(p))) & 1
+
+    results = []
+    for legs in parlays:
+        legs = sorted(set(int(i) for i in legs))
+        if not legs or legs[0] < 0 or legs[-1] >= len(p):
+            raise ValueError(f"Parlay legs must be indices between 0 and {len(p) - 1}")
+        landed = bits[:, legs].sum(axis=1)
+        distribution = np.bincount(landed, weights=counts, minlength=len(legs) + 1) / simulations
+        hit_rate = float(distribution[-1])
+        price = float(np.prod(decimal[legs]))
+        results.append({
+            "legs": legs,
+            "decimal_odds": round(price, 4),
+            "american_odds": int(to_american(np.array(price))),
+            "hit_rate": round(hit_rate, 6),
+            "independent_hit_rate": round(float(np.prod(p[legs])), 6),
+            "fair_decimal_odds": round(1 / hit_rate, 4) if hit_rate else None,
+            # Per unit staked, with the Monte Carlo standard error
+            "ev": round(hit_rate * price - 1, 6),
+            "ev_stderr": round(float(np.sqrt(hit_rate * (1 - hit_rate) / simulations)) * price, 6),
+            "kelly_fraction": round(float(fractional_kelly(np.array(hit_rate), np.array(price))), 6),
+            "legs_hit": [round(float(share), 6) for share in distribution],
+        })
+    return {
+        "simulations": simulations,
+        "seed": seed,
+        "chunks": len(tasks),
+        "parlays": results,
+        "compute_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def _bankroll_paths(seed, paths: int, days: int, p: "np.ndarray", factor: Optional["np.ndarray"],
+                    payout: "np.ndarray", exposure: float, ruin_level: float):
+    """Final bankroll, max drawdown, worst day and ruin flag per simulated path"""
+    import numpy as np
+
+    wins = _draw(np.random.default_rng(seed), paths, p, factor, (days,))
+    daily = wins @ payout - exposure
+    with np.errstate(divide="ignore"):
+        wealth = np.exp(np.cumsum(np.log1p(daily), axis=1))
+    peak = np.maximum.accumulate(np.maximum(wealth, 1.0), axis=1)
+    drawdown = (1 - wealth / peak).max(axis=1)
+    return wealth[:, -1], drawdown, daily.min(axis=1), wealth.min(axis=1) <= ruin_level
+
+
+def _percentiles(values: "np.ndarray", digits: int = 4) -> Dict[str, float]:
+    import numpy as np
+
+    return {f"p{q}": round(float(v), digits) for q, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def simulate_bankroll(probs: Sequence[float], odds: Sequence[float], stakes: Sequence[float],
+                      correlation: Optional[Sequence[Sequence[float]]] = None,
+                      days: int = MC_DAYS, paths: int = MC_PATHS, ruin_level: float = MC_RUIN_LEVEL,
+                      seed: int = MC_SEED, chunk: int = MC_CHUNK, workers: int = MC_WORKERS) -> Dict:
+    """Bankroll paths from betting the same slate ``days`` days in a row
+
+    ``stakes`` are shares of the current bankroll per bet. Bankrolls are
+    relative to a start of 1.0; raises ValueError for bad input.
+    """
+    import numpy as np
+
+    started = time.perf_counter()
+    p, factor = _legs(probs, correlation)
+    decimal = to_decimal(np.asarray(odds, dtype=float))
+    f = np.asarray(stakes, dtype=float)
+    if decimal.shape != p.shape or f.shape != p.shape or np.any(np.isnan(decimal)):
+        raise ValueError("Every bet needs valid odds and a stake")
+    if np.any(f < 0) or f.sum() > 1:
+        raise ValueError("Stakes must be non-negative and add up to at most the bankroll")
+    if days <= 0 or paths <= 0 or not 0 < ruin_level < 1:
+        raise ValueError("days and paths must be positive and ruin_level in (0, 1)")
+    tasks = [
+        (child, size, days, p, factor, f * decimal, float(f.sum()), ruin_level)
+        for child, size in _chunks(paths, chunk // (days * len(p)), seed)
+    ]
+    final, drawdown, worst_day, ruined = (np.concatenate(part) for part in zip(*_map(_bankroll_paths, tasks, workers)))
+    with np.errstate(divide="ignore"):
+        growth = np.log(final) / days
+    return {
+        "paths": paths,
+        "days": days,
+        "seed": seed,
+        "exposure": round(float(f.sum()), 6),
+        "final_bankroll": _percentiles(final),
+        "max_drawdown": _percentiles(drawdown),
+        "worst_day": _percentiles(worst_day),
+        "mean_final_bankroll": round(float(final.mean()), 4),
+        "median_daily_log_growth": round(float(np.median(growth)), 6),
+        "prob_loss": round(float((final < 1).mean()), 6),
+        "ruin_level": ruin_level,
+        "risk_of_ruin": round(float(ruined.mean()), 6),
+        "compute_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
@@ -0,0 +1,423 @@
+"""
+Vectorized odds matrix for a slate
+Latest lines are laid out once per snapshot as arrays indexed by game x
+bookmaker x market x outcome. Price conversion, implied probability, the
+no-vig fair price, each outcome's best line and the consensus line are then
+computed for the whole slate with a handful of NumPy operations, instead of
+every report section and endpoint scanning lists of odds dicts.
+
+Outcome slots: 0 = home team and 1 = away team for h2h/spread, 0 = Over and
+1 = Under for totals; unmatched names get further slots. Prices may be
+decimal (as ingested) or American; both are normalized to decimal.
+"""
+
+import time
+import warnings
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from odds_summary import MARKETS, outcome_name
+
+# numpy is imported when a matrix is first built, not at API startup
+if TYPE_CHECKING:
+    import numpy as np
+
+MARKET_INDEX = {market: m for m, market in enumerate(MARKETS)}
+TOTALS_OUTCOMES = ("Over", "Under")
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value) if value is not None else float("nan")
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _value(value, digits: Optional[int] = None):
+    """Plain float for JSON (None for NaN)"""
+    value = float(value)
+    if value != value:
+        return None
+    return round(value, digits) if digits is not None else value
+
+
+def decimal_odds(price: Any) -> Optional[float]:
+    """Scalar version of ``to_decimal`` for single lines (None when invalid)"""
+    price = _float(price)
+    if abs(price) >= 100:
+        price = 1 + price / 100 if price > 0 else 1 + 100 / abs(price)
+    return price if price > 1 else None
+
+
+def to_decimal(prices: "np.ndarray") -> "np.ndarray":
+    """Decimal odds from decimal or American prices; NaN where invalid
+
+    Magnitudes of 100 or more are read as American (-110, +150).
+    """
+    import numpy as np
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        american = np.abs(prices) >= 100
+        converted = np.where(prices > 0, 1 + prices / 100, 1 + 100 / np.abs(prices))
+        decimal = np.where(american, converted, prices)
+        return np.where(decimal > 1, decimal, np.nan)
+
+
+def median_over_books(values: "np.ndarray") -> "np.ndarray":
+    """Median along the bookmaker axis ignoring NaN (several times faster than np.nanmedian)"""
+    import numpy as np
+
+    ordered = np.sort(values, axis=1)
+    count = (~np.isnan(values)).sum(axis=1)
+    low = np.take_along_axis(ordered, np.maximum((count - 1) // 2, 0)[:, None], axis=1)[:, 0]
+    high = np.take_along_axis(ordered, (count // 2)[:, None], axis=1)[:, 0]
+    with np.errstate(invalid="ignore"):
+        return np.where(count > 0, (low + high) / 2, np.nan)
+
+
+def to_american(decimal: "np.ndarray") -> "np.ndarray":
+    import numpy as np
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(decimal >= 2, (decimal - 1) * 100, -100 / (decimal - 1))
+
+
+class OddsMatrix:
+    """Latest line per game, bookmaker, market and outcome, with derived arrays"""
+
+    def __init__(self, games: Sequence[Dict], bookmakers: List[str], titles: List[str],
+                 outcomes: List[List[List[Optional[str]]]], price: "np.ndarray", point: "np.ndarray",
+                 listed: "np.ndarray"):
+        self.games = list(games)
+        self.game_ids = [g.get("id") for g in self.games]
+        self.position = {gid: g for g, gid in enumerate(self.game_ids)}
+        self.bookmakers = bookmakers
+        self.titles = titles
+        # outcomes[game][market][slot] -> outcome name (None for unused slots)
+        self.outcomes = outcomes
+        # Raw prices as ingested and points, NaN where a book has no line
+        self.price = price
+        self.point = point
+        # Book lists the market (even without a usable price)
+        self.listed = listed
+        self.compute_seconds = 0.0
+        self._compute()
+
+    @classmethod
+    def build(cls, rows: Sequence[Dict], games: Optional[Sequence[Dict]] = None) -> "OddsMatrix":
+        """Matrix over ``games`` (default: the games in ``rows``)
+
+        Rows for other games or markets are ignored. When a book has several
+        rows for one line (the odds table is append-only), the latest wins.
+        """
+        import numpy as np
+
+        if games is None:
+            games = [{"id": gid} for gid in dict.fromkeys(r.get("game_id") for r in rows)]
+        position = {g.get("id"): i for i, g in enumerate(games)}
+        slots: List[List[Dict[str, int]]] = []
+        for game in games:
+            sides = {name: o for o, name in enumerate((game.get("home_team"), game.get("away_team"))) if name}
+            slots.append([dict(sides), dict(sides), {name: o for o, name in enumerate(TOTALS_OUTCOMES)}])
+
+        books: Dict[str, int] = {}
+        titles: List[str] = []
+        cells: Dict[Tuple[int, int, int, int], Tuple[str, float, float]] = {}
+        listed = set()
+        for row in rows:
+            g = position.get(row.get("game_id"))
+            m = MARKET_INDEX.get(row.get("market_type"))
+            if g is None or m is None:
+                continue
+            key = row.get("bookmaker_key") or row.get("bookmaker_title") or row.get("bookmaker")
+            b = books.get(key)
+            if b is None:
+                b = books[key] = len(titles)
+                titles.append(row.get("bookmaker_title") or row.get("bookmaker") or key)
+            name = outcome_name(row)
+            if m == MARKET_INDEX["totals"] and name:
+                name = name.title()
+            names = slots[g][m]
+            o = names.setdefault(name, max(names.values(), default=-1) + 1)
+            listed.add((g, b, m))
+            stamp = str(row.get("last_update") or row.get("updated_at") or "")
+            current = cells.get((g, b, m, o))
+            if current is None or stamp >= current[0]:
+                cells[(g, b, m, o)] = (stamp, _float(row.get("price")), _float(row.get("point")))
+
+        n_outcomes = max([2] + [len(names) for game in slots for names in game])
+        shape = (len(games), max(len(books), 1), len(MARKETS), n_outcomes)
+        price = np.full(shape, np.nan)
+        point = np.full(shape, np.nan)
+        if cells:
+            index = tuple(np.array(list(cells), dtype=np.int64).T)
+            values = np.array([(p, pt) for _, p, pt in cells.values()], dtype=float)
+            price[index] = values[:, 0]
+            point[index] = values[:, 1]
+        listed_mask = np.zeros(shape[:3], dtype=bool)
+        if listed:
+            listed_mask[tuple(np.array(list(listed), dtype=np.int64).T)] = True
+
+        outcomes = []
+        for game in slots:
+            outcomes.append([[None] * n_outcomes for _ in game])
+            for m, names in enumerate(game):
+                for name, o in names.items():
+                    outcomes[-1][m][o] = name
+        return cls(games, list(books), titles, outcomes, price, point, listed_mask)
+
+    def _compute(self):
+        """Derived arrays for the whole slate, all vectorized"""
+        import numpy as np
+
+        started = time.perf_counter()
+        self.decimal = to_decimal(self.price)
+        self.valid = ~np.isnan(self.decimal)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.implied = 1 / self.decimal
+            # Bookmaker margin per game, book and market (needs both sides)
+            sides = self.valid.sum(axis=3)
+            self.overround = np.where(sides >= 2, np.nansum(self.implied, axis=3), np.nan)
+            self.fair_prob = self.implied / self.overround[..., None]
+            self.fair_price = 1 / self.fair_prob
+
+        # Best line: better point first (more points on a spread, a lower
+        # Over / higher Under total), then the better price at that point
+        direction = np.zeros(self.price.shape[2:])
+        direction[MARKET_INDEX["spread"], :] = 1
+        direction[MARKET_INDEX["totals"], 0] = -1
+        direction[MARKET_INDEX["totals"], 1] = 1
+        primary = np.where(direction == 0, 0.0, self.point * direction)
+        primary = np.where(self.valid & ~np.isnan(primary), primary, -np.inf)
+        at_best_point = self.valid & (primary == primary.max(axis=1, keepdims=True))
+        best_key = np.where(at_best_point, self.decimal, -np.inf)
+        worst_key = np.where(at_best_point, self.decimal, np.inf)
+        self.best_book = best_key.argmax(axis=1)
+        self.worst_book = worst_key.argmin(axis=1)
+        self.books = self.valid.sum(axis=1)
+        has_line = self.books > 0
+
+        def at(values: "np.ndarray", book: "np.ndarray") -> "np.ndarray":
+            picked = np.take_along_axis(values, book[:, None], axis=1)[:, 0]
+            return np.where(has_line, picked, np.nan)
+
+        self.best_price = at(self.price, self.best_book)
+        self.best_decimal = at(self.decimal, self.best_book)
+        self.best_point = at(self.point, self.best_book)
+        self.worst_decimal = at(self.decimal, self.worst_book)
+        self.worst_price = at(self.price, self.worst_book)
+
+        self.consensus_price = median_over_books(np.where(self.valid, self.price, np.nan))
+        self.consensus_point = median_over_books(np.where(self.valid, self.point, np.nan))
+        fair_books = (~np.isnan(self.fair_prob)).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.consensus_fair_prob = np.where(
+                fair_books > 0, np.nansum(self.fair_prob, axis=1) / fair_books, np.nan
+            )
+        self.market_books = self.listed.sum(axis=1)
+        self.compute_seconds = time.perf_counter() - started
+
+    def label(self, g: int) -> str:
+        game = self.games[g]
+        if game.get("home_team") or game.get("away_team"):
+            return f"{game.get('away_team')} @ {game.get('home_team')}"
+        return str(game.get("id"))
+
+    def outcome_label(self, g: int, m: int, o: int) -> str:
+        name = self.outcomes[g][m][o]
+        return name if name is not None else f"outcome {o}"
+
+    def line(self, game_id: str, market: str, outcome: int = 0) -> Optional[Dict]:
+        """Consensus and best line for one outcome (slot), None without a price"""
+        g, m = self.position.get(game_id), MARKET_INDEX[market]
+        if g is None or not self.books[g, m, outcome]:
+            return None
+        return {
+            "point": _value(self.consensus_point[g, m, outcome]),
+            "price": _value(self.consensus_price[g, m, outcome]),
+            "best_point": _value(self.best_point[g, m, outcome]),
+            "best_price": _value(self.best_price[g, m, outcome]),
+            "best_bookmaker": self.titles[self.best_book[g, m, outcome]],
+            "fair_prob": _value(self.consensus_fair_prob[g, m, outcome], 4),
+            "books": int(self.books[g, m, outcome]),
+        }
+
+    def summary(self, game_id: str) -> Dict:
+        """Best line and consensus for each outcome of each market of one game"""
+        g = self.position.get(game_id)
+        summary = {}
+        if g is None:
+            return summary
+        for m, market in enumerate(MARKETS):
+            if not self.market_books[g, m]:
+                continue
+            outcomes = {}
+            for o in range(self.price.shape[3]):
+                if not self.books[g, m, o]:
+                    continue
+                outcomes[self.outcome_label(g, m, o)] = {
+                    "best_price": _value(self.best_price[g, m, o]),
+                    "best_point": _value(self.best_point[g, m, o]),
+                    "best_bookmaker": self.titles[self.best_book[g, m, o]],
+                    "consensus_price": _value(self.consensus_price[g, m, o], 2),
+                    "consensus_point": _value(self.consensus_point[g, m, o], 2),
+                    "implied_prob": _value(1 / self.best_decimal[g, m, o], 4),
+                    "fair_prob": _value(self.consensus_fair_prob[g, m, o], 4),
+                    "books": int(self.books[g, m, o]),
+                }
+            summary[market] = {"bookmakers": int(self.market_books[g, m]), "outcomes": outcomes}
+        return summary
+
+    def arbitrage(self, max_total_implied: float = 1.0) -> List[Dict]:
+        """Two-way markets whose best prices across books sum below ``max_total_implied``
+
+        Spread and totals sides only pair up when the best lines are the same
+        line (+3/-3, Over/Under 220.5); mismatched lines are middles.
+        """
+        import numpy as np
+
+        home, away = self.best_decimal[..., 0], self.best_decimal[..., 1]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            total = 1 / home + 1 / away
+        same_line = np.ones(total.shape, dtype=bool)
+        spread, totals = MARKET_INDEX["spread"], MARKET_INDEX["totals"]
+        same_line[:, spread] = self.best_point[:, spread, 0] == -self.best_point[:, spread, 1]
+        same_line[:, totals] = self.best_point[:, totals, 0] == self.best_point[:, totals, 1]
+        hits = np.argwhere(same_line & (total < max_total_implied))
+
+        opportunities = []
+        for g, m in hits:
+            legs = []
+            for o in (0, 1):
+                implied = 1 / self.best_decimal[g, m, o]
+                legs.append({
+                    "outcome": self.outcome_label(g, m, o),
+                    "sportsbook": self.titles[self.best_book[g, m, o]],
+                    "odds": _value(self.best_price[g, m, o]),
+                    "point": _value(self.best_point[g, m, o]),
+                    # Equal payout on either side: stake in proportion to implied probability
+                    "allocation": round(float(implied / total[g, m]), 4),
+                })
+            opportunities.append({
+                "game": self.label(g),
+                "game_id": self.game_ids[g],
+                "market": MARKETS[m],
+                "total_implied": round(float(total[g, m]), 4),
+                "profit_margin": round(float((1 / total[g, m] - 1) * 100), 2),
+                "home_bet": legs[0],
+                "away_bet": legs[1],
+            })
+        return sorted(opportunities, key=lambda o: -o["profit_margin"])
+
+    def line_shopping(self, min_savings: float = 1.0, limit: int = 10) -> List[Dict]:
+        """Outcomes where the best book pays at least ``min_savings`` more per $100 than the worst, same line"""
+        import numpy as np
+
+        savings = (self.best_decimal - self.worst_decimal) * 100
+        found = np.argwhere((self.books >= 2) & (savings >= min_savings))
+        found = sorted(found, key=lambda idx: -savings[tuple(idx)])[:limit]
+        return [
+            {
+                "game": self.label(g),
+                "bet": self._bet_label(g, m, o),
+                "best_line": {"book": self.titles[self.best_book[g, m, o]], "odds": _value(self.best_price[g, m, o])},
+                "worst_line": {"book": self.titles[self.worst_book[g, m, o]], "odds": _value(self.worst_price[g, m, o])},
+                "savings": f"~${savings[g, m, o]:.2f} per $100 bet",
+                "savings_per_100": round(float(savings[g, m, o]), 2),
+            }
+            for g, m, o in found
+        ]
+
+    def best_lines(self, limit: int = 5) -> List[Dict]:
+        """Best prices ranked by edge over the consensus no-vig probability"""
+        import numpy as np
+
+        with np.errstate(invalid="ignore"):
+            edge = (self.best_decimal * self.consensus_fair_prob - 1) * 100
+        found = np.argwhere(~np.isnan(edge))
+        found = sorted(found, key=lambda idx: -edge[tuple(idx)])[:limit]
+        return [
+            {
+                "game": self.label(g),
+                "bet": self._bet_label(g, m, o),
+                "book": self.titles[self.best_book[g, m, o]],
+                "line": _value(self.best_price[g, m, o]),
+                "fair_price": _value(1 / self.consensus_fair_prob[g, m, o], 3),
+                "edge": f"{edge[g, m, o]:.1f}%",
+            }
+            for g, m, o in found
+        ]
+
+    def fair_prob_at_best_point(self) -> "np.ndarray":
+        """Consensus no-vig probability from only the books quoting each outcome's best point
+
+        A spread or total priced at a different point is a different bet,
+        so its probability cannot score the best line's price.
+        """
+        import numpy as np
+
+        same = self.valid & ~np.isnan(self.fair_prob) & (
+            (self.point == self.best_point[:, None]) | (np.isnan(self.point) & np.isnan(self.best_point)[:, None])
+        )
+        books = same.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(books > 0, np.where(same, self.fair_prob, 0.0).sum(axis=1) / books, np.nan)
+
+    def value_legs(self, limit: int = 6, min_edge: float = 0.0) -> List[Dict]:
+        """The best-priced outcome of each game whose edge over the no-vig probability beats ``min_edge``
+
+        The probability comes from books quoting the same point as the best
+        line. One leg per game, so the legs are independent events (parlay legs).
+        """
+        import numpy as np
+
+        fair_prob = self.fair_prob_at_best_point()
+        with np.errstate(invalid="ignore"):
+            edge = self.best_decimal * fair_prob - 1
+        edge = np.where(np.isnan(edge), -np.inf, edge)
+        legs = []
+        for g in range(len(self.game_ids)):
+            m, o = np.unravel_index(edge[g].argmax(), edge[g].shape)
+            if edge[g, m, o] > min_edge:
+                legs.append({
+                    "game": self.label(g),
+                    "game_id": self.game_ids[g],
+                    "market": MARKETS[m],
+                    "bet": self._bet_label(g, m, o),
+                    "book": self.titles[self.best_book[g, m, o]],
+                    "odds": _value(self.best_price[g, m, o]),
+                    "point": _value(self.best_point[g, m, o]),
+                    "decimal": float(self.best_decimal[g, m, o]),
+                    "fair_prob": float(fair_prob[g, m, o]),
+                    "edge": float(edge[g, m, o]),
+                })
+        return sorted(legs, key=lambda leg: -leg["edge"])[:limit]
+
+    def _bet_label(self, g: int, m: int, o: int) -> str:
+        name, point = self.outcome_label(g, m, o), self.best_point[g, m, o]
+        if MARKETS[m] == "h2h" or point != point:
+            return f"{name} ML" if MARKETS[m] == "h2h" else name
+        return f"{name} {point:+g}" if MARKETS[m] == "spread" else f"{name} {point:g}"
+
+    def book_margins(self) -> List[Dict]:
+        """Average bookmaker margin over the slate, lowest (reduced juice) first"""
+        import numpy as np
+
+        counts = (~np.isnan(self.overround)).sum(axis=(0, 2))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            margins = (np.nanmean(self.overround, axis=(0, 2)) - 1) * 100
+        return sorted(
+            (
+                {"book": self.titles[b], "avg_margin_pct": round(float(margins[b]), 2), "markets": int(counts[b])}
+                for b in range(len(self.titles)) if counts[b]
+            ),
+            key=lambda entry: entry["avg_margin_pct"],
+        )
+
+    def status(self) -> Dict:
+        return {
+            "games": len(self.game_ids),
+            "bookmakers": len(self.titles),
+            "lines": int(self.valid.sum()),
+            "compute_ms": round(self.compute_seconds * 1000, 3),
+        }
@@ -0,0 +1,201 @@
+"""
+Odds delta broadcaster for Server-Sent Events and WebSocket clients
+The odds ingester publishes every batch it writes; only lines whose point or
+price changed are broadcast. Each event is serialized once and shared by all
+subscribers, kept in a short replay buffer so clients can resume with
+Last-Event-ID, and idle connections receive heartbeats. The latest line per
+key is kept for diffing and snapshots, capped at the most recently changed
+ODDS_STREAM_MAX_LINES lines so a long-running process does not grow forever. Event ids are
+``<epoch>-<seq>``, where the epoch identifies this process; an id from another
+worker or from before a restart cannot be resumed and gets a snapshot.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from odds_summary import outcome_name
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = float(os.getenv("ODDS_STREAM_HEARTBEAT_SECONDS", "15"))
+REPLAY_BUFFER_SIZE = int(os.getenv("ODDS_STREAM_REPLAY_SIZE", "500"))
+# A slate is ~1000 lines; older games' lines are evicted past this
+MAX_LATEST_LINES = int(os.getenv("ODDS_STREAM_MAX_LINES", "20000"))
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Fields sent to clients for each changed line
+DELTA_FIELDS = ("game_id", "bookmaker_key", "bookmaker_title", "market_type",
+                "team", "outcome_name", "point", "price", "last_update")
+
+LineKey = Tuple[str, str, str, str]
+
+
+def line_key(row: Dict) -> LineKey:
+    """Identity of a line: one outcome of one market at one bookmaker"""
+    return (
+        str(row.get("game_id")), str(row.get("bookmaker_key")),
+        str(row.get("market_type")), str(outcome_name(row)),
+    )
+
+
+class StreamEvent:
+    """A broadcast event, serialized once for every subscriber"""
+
+    __slots__ = ("id", "seq", "event", "data", "sse", "ws")
+
+    def __init__(self, epoch: str, seq: int, event: str, payload: Dict):
+        self.id = f"{epoch}-{seq}"
+        self.seq = seq
+        self.event = event
+        self.data = json.dumps(payload, separators=(",", ":"), default=str)
+        self.sse = f"id: {self.id}\nevent: {event}\ndata: {self.data}\n\n".encode()
+        self.ws = f'{{"id":"{self.id}","event":"{event}","data":{self.data}}}'
+
+
+class HeartbeatEvent:
+    """Keep-alive sent when a subscriber has been idle"""
+
+    __slots__ = ()
+    id = None
+    seq = None
+    event = "heartbeat"
+    data = "{}"
+    sse = b": heartbeat\n\n"
+    ws = '{"id":null,"event":"heartbeat","data":{}}'
+
+
+HEARTBEAT = HeartbeatEvent()
+
+
+class _Subscriber:
+    __slots__ = ("queue", "overflowed")
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+
+class OddsBroadcaster:
+    """Tracks the latest line per key and fans out changes to subscribers"""
+
+    def __init__(self, replay_size: int = REPLAY_BUFFER_SIZE, max_lines: int = MAX_LATEST_LINES):
+        # Least recently changed first, so eviction drops finished games' lines
+        self.latest: "OrderedDict[LineKey, Dict]" = OrderedDict()
+        self.max_lines = max_lines
+        # Sequence numbers are only meaningful within one process lifetime
+        self.epoch = uuid.uuid4().hex[:8]
+        self.last_event_id = 0
+        self.replay: Deque[StreamEvent] = deque(maxlen=replay_size)
+        self.subscribers: Set[_Subscriber] = set()
+        # In-process consumers of every batch of changed lines
+        self.listeners: List[Callable[[List[Dict]], None]] = []
+
+    def on_change(self, listener: Callable[[List[Dict]], None]):
+        """Call ``listener(changed_lines)`` for every published batch"""
+        self.listeners.append(listener)
+
+    def diff(self, rows: Iterable[Dict]) -> List[Dict]:
+        """Return (and record) the rows whose point or price changed"""
+        changed = []
+        for row in rows:
+            key = line_key(row)
+            previous = self.latest.get(key)
+            if previous is not None and previous.get("point") == row.get("point") \
+                    and previous.get("price") == row.get("price"):
+                continue
+            delta = {field: row.get(field) for field in DELTA_FIELDS}
+            if previous is not None:
+                delta["previous_point"] = previous.get("point")
+                delta["previous_price"] = previous.get("price")
+            self.latest[key] = delta
+            self.latest.move_to_end(key)
+            changed.append(delta)
+        while len(self.latest) > self.max_lines:
+            self.latest.popitem(last=False)
+        return changed
+
+    def publish(self, rows: Iterable[Dict]) -> Optional[StreamEvent]:
+        """Broadcast changed lines from an ingested batch; no-op if nothing moved"""
+        changed = self.diff(rows)
+        if not changed:
+            return None
+        for listener in self.listeners:
+            try:
+                listener(changed)
+            except Exception as e:
+                logger.error(f"Odds listener {listener} failed: {e}")
+        self.last_event_id += 1
+        event = StreamEvent(self.epoch, self.last_event_id, "odds", {"changes": changed, "ts": time.time()})
+        self.replay.append(event)
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and resync it with a snapshot
+                subscriber.overflowed = True
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+        return event
+
+    def snapshot_event(self) -> StreamEvent:
+        """Full current state, sent when a client cannot be resumed from the buffer"""
+        return StreamEvent(self.epoch, self.last_event_id, "snapshot", {"lines": list(self.latest.values()), "ts": time.time()})
+
+    def _replay_since(self, last_event_id: Optional[str]) -> List[StreamEvent]:
+        if last_event_id is None:
+            return [self.snapshot_event()] if self.latest else []
+        epoch, _, seq = last_event_id.rpartition("-")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self.last_event_id:
+            # Issued by another worker or an earlier process: resync
+            return [self.snapshot_event()]
+        seq = int(seq)
+        if seq == self.last_event_id:
+            return []
+        oldest = self.replay[0].seq if self.replay else self.last_event_id + 1
+        if seq + 1 < oldest:
+            return [self.snapshot_event()]
+        return [e for e in self.replay if e.seq > seq]
+
+    async def subscribe(self, last_event_id: Optional[str] = None,
+                        heartbeat: float = HEARTBEAT_SECONDS) -> AsyncIterator:
+        """Yield missed events, then live events, with heartbeats while idle"""
+        subscriber = _Subscriber()
+        self.subscribers.add(subscriber)
+        try:
+            for event in self._replay_since(last_event_id):
+                yield event
+            while True:
+                if subscriber.overflowed:
+                    subscriber.overflowed = False
+                    yield self.snapshot_event()
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                yield event
+        finally:
+            self.subscribers.discard(subscriber)
+
+    def status(self) -> Dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "lines": len(self.latest),
+            "last_event_id": f"{self.epoch}-{self.last_event_id}",
+        }
+
+
+def parse_last_event_id(value: Optional[str]) -> Optional[str]:
+    """Normalize a Last-Event-ID header/query value; blank means a fresh client"""
+    value = (value or "").strip()
+    return value or None
+
+
+# Process-wide broadcaster fed by scrapers.process_odds_data
+odds_broadcaster = OddsBroadcaster()
@@ -0,0 +1,49 @@
+"""
+Odds grouping and per-market summaries (best line + consensus)
+Used to serve a whole slate of odds from one batched query; the summaries
+themselves are computed by odds_matrix
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+MARKETS = ("h2h", "spread", "totals")
+
+# Narrow select for summaries; the full row is only needed by /api/odds
+SUMMARY_COLUMNS = "game_id,bookmaker_key,bookmaker_title,market_type,team,outcome_name,point,price,last_update"
+
+MAX_BATCH_GAMES = 100
+
+
+def parse_game_ids(game_ids: str) -> List[str]:
+    """Parse a comma separated ?game_ids= value (deduplicated, order kept)"""
+    ids = list(dict.fromkeys(g.strip() for g in (game_ids or "").split(",") if g.strip()))
+    if not ids:
+        raise ValueError("game_ids must contain at least one game id")
+    if len(ids) > MAX_BATCH_GAMES:
+        raise ValueError(f"At most {MAX_BATCH_GAMES} game ids per request")
+    return ids
+
+
+def group_odds_by_game(rows: Iterable[Dict], game_ids: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+    """Group odds rows by game_id; requested ids with no odds map to []"""
+    grouped: Dict[str, List[Dict]] = {gid: [] for gid in (game_ids or [])}
+    for row in rows:
+        grouped.setdefault(row.get("game_id"), []).append(row)
+    return grouped
+
+
+def outcome_name(row: Dict) -> Optional[str]:
+    """Outcome label: team for h2h/spread, Over/Under for totals"""
+    if row.get("market_type") == "totals":
+        return row.get("outcome_name")
+    return row.get("team")
+
+
+def summarize_game_odds(rows: List[Dict]) -> Dict:
+    """Per-market summary for a single game (see OddsMatrix.summary)"""
+    from odds_matrix import OddsMatrix
+
+    if not rows:
+        return {}
+    matrix = OddsMatrix.build(rows)
+    return matrix.summary(matrix.game_ids[0])
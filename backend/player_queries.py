@@ -0,0 +1,142 @@
+"""
+Player query helpers: field projection and keyset (cursor) pagination
+Keeps /api/players responses narrow and bounded instead of select("*") + join
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Columns of the players table that may be requested via ?fields=
+PLAYER_FIELDS = (
+    "id", "name", "jersey_number", "team_id", "team_abbreviation",
+    "position", "height", "weight", "birth_date", "experience", "college",
+    "basketball_reference_id", "basketball_reference_url",
+    "is_active", "season_year", "created_at", "updated_at",
+)
+
+# Compact list view used when ?fields= is not given
+DEFAULT_PLAYER_FIELDS = ("id", "name", "team_abbreviation", "jersey_number", "position")
+
+# Keyset ordering; these columns are always selected so a cursor can be built
+KEYSET_FIELDS = ("team_abbreviation", "jersey_number", "id")
+
+# Embedded team columns returned with ?include=team
+TEAM_EMBED = "teams!players_team_id_fkey(abbreviation,full_name,city,name)"
+INCLUDE_OPTIONS = ("team",)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Parse a comma separated ?fields= value into validated player columns"""
+    if not fields:
+        requested = list(DEFAULT_PLAYER_FIELDS)
+    else:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+
+    unknown = [f for f in requested if f not in PLAYER_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown player fields: {', '.join(unknown)}")
+
+    # Deduplicate while keeping the requested order, then add keyset columns
+    columns = list(dict.fromkeys(requested))
+    for key in KEYSET_FIELDS:
+        if key not in columns:
+            columns.append(key)
+    return columns
+
+
+def parse_include(include: Optional[str]) -> List[str]:
+    """Parse a comma separated ?include= value"""
+    if not include:
+        return []
+    requested = [i.strip() for i in include.split(",") if i.strip()]
+    unknown = [i for i in requested if i not in INCLUDE_OPTIONS]
+    if unknown:
+        raise ValueError(f"Unknown include options: {', '.join(unknown)}")
+    return requested
+
+
+def build_player_select(fields: Optional[str] = None, include: Optional[str] = None) -> str:
+    """Build a narrow PostgREST select string for the players table"""
+    columns = parse_fields(fields)
+    if "team" in parse_include(include):
+        columns.append(TEAM_EMBED)
+    return ",".join(columns)
+
+
+def project_row(row: Dict[str, Any], fields: Optional[str] = None,
+                include: Optional[str] = None) -> Dict[str, Any]:
+    """Apply the same projection as build_player_select to an in-memory row"""
+    projected = {column: row.get(column) for column in parse_fields(fields)}
+    if "team" in parse_include(include):
+        projected["teams"] = row.get("teams")
+    return projected
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Encode the keyset position of a row as an opaque cursor"""
+    payload = [row.get(key) for key in KEYSET_FIELDS]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Optional[int], str]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        team, jersey, player_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(team, str) or not isinstance(player_id, str):
+        raise ValueError("Invalid cursor")
+    if jersey is not None and not isinstance(jersey, int):
+        raise ValueError("Invalid cursor")
+    return team, jersey, player_id
+
+
+def _quote(value: str) -> str:
+    """Quote a value for use inside a PostgREST or=() expression"""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def keyset_filter(cursor: str) -> str:
+    """
+    Build the PostgREST or=() expression selecting rows after the cursor.
+    Ordering is (team_abbreviation, jersey_number NULLS LAST, id).
+    """
+    team, jersey, player_id = decode_cursor(cursor)
+    team_q, id_q = _quote(team), _quote(player_id)
+
+    clauses = [f"team_abbreviation.gt.{team_q}"]
+    if jersey is None:
+        clauses.append(f"and(team_abbreviation.eq.{team_q},jersey_number.is.null,id.gt.{id_q})")
+    else:
+        clauses.extend([
+            f"and(team_abbreviation.eq.{team_q},jersey_number.gt.{jersey})",
+            f"and(team_abbreviation.eq.{team_q},jersey_number.is.null)",
+            f"and(team_abbreviation.eq.{team_q},jersey_number.eq.{jersey},id.gt.{id_q})",
+        ])
+    return ",".join(clauses)
+
+
+def apply_keyset(query, cursor: Optional[str], limit: int):
+    """Apply keyset ordering, the cursor position and a limit+1 probe to a query"""
+    if cursor:
+        query = query.or_(keyset_filter(cursor))
+    return (
+        query.order("team_abbreviation")
+        .order("jersey_number", nullsfirst=False)
+        .order("id")
+        .limit(limit + 1)
+    )
+
+
+def paginate(rows: List[Dict], limit: int) -> Tuple[List[Dict], Optional[str]]:
+    """Trim the limit+1 probe row and return (page, next_cursor)"""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(page[-1])
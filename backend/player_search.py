@@ -0,0 +1,170 @@
+"""
+In-memory player name search index
+Normalized tokens with prefix and trigram (fuzzy) matching, so name lookups
+like "vuc", "Vucevic" or "Vučević" resolve without a database round-trip
+"""
+
+import bisect
+import time
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+# Characters that NFKD does not decompose to an ASCII base letter
+_TRANSLITERATION = str.maketrans({
+    "đ": "d", "Đ": "d", "ł": "l", "Ł": "l", "ø": "o", "Ø": "o",
+    "ß": "ss", "æ": "ae", "Æ": "ae", "œ": "oe", "Œ": "oe", "ı": "i",
+})
+
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.9
+FUZZY_WEIGHT = 0.8
+MIN_SIMILARITY = 0.4
+DEFAULT_SEARCH_LIMIT = 20
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and punctuation ("Vučević" -> "vucevic")"""
+    text = (text or "").translate(_TRANSLITERATION)
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    cleaned = "".join(c if c.isalnum() else " " for c in stripped.lower())
+    return " ".join(cleaned.split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a name into normalized tokens"""
+    return normalize(text).split()
+
+
+def trigrams(token: str) -> Set[str]:
+    """Padded character trigrams of a token"""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _IndexState(NamedTuple):
+    players: List[Dict]
+    names: List[str]
+    tokens: List[str]
+    postings: Dict[str, List[int]]
+    trigram_index: Dict[str, List[str]]
+    trigram_sets: Dict[str, Set[str]]
+    built_at: Optional[float]
+
+
+_EMPTY_STATE = _IndexState([], [], [], {}, {}, {}, None)
+
+
+class PlayerSearchIndex:
+    """Immutable-per-build search index over active players"""
+
+    def __init__(self):
+        self._state = _EMPTY_STATE
+
+    @property
+    def ready(self) -> bool:
+        return self._state.built_at is not None
+
+    @property
+    def built_at(self) -> Optional[float]:
+        return self._state.built_at
+
+    def __len__(self) -> int:
+        return len(self._state.players)
+
+    def build(self, players: List[Dict], built_at: Optional[float] = None):
+        """Rebuild the index from player rows and swap it in atomically"""
+        postings = defaultdict(list)
+        trigram_index = defaultdict(list)
+        trigram_sets = {}
+        rows = [p for p in players if p.get("is_active", True) and p.get("name")]
+        names = [normalize(p["name"]) for p in rows]
+
+        for pos, name in enumerate(names):
+            for token in set(name.split()):
+                postings[token].append(pos)
+
+        for token in postings:
+            grams = trigrams(token)
+            trigram_sets[token] = grams
+            for gram in grams:
+                trigram_index[gram].append(token)
+
+        # Single attribute swap so concurrent readers never see a mixed state
+        self._state = _IndexState(
+            rows, names, sorted(postings), dict(postings),
+            dict(trigram_index), trigram_sets,
+            built_at if built_at is not None else time.time(),
+        )
+
+    def _prefix_tokens(self, prefix: str, tokens: List[str]) -> List[str]:
+        start = bisect.bisect_left(tokens, prefix)
+        end = bisect.bisect_left(tokens, prefix + "\uffff")
+        return tokens[start:end]
+
+    def _token_matches(self, query_token: str, state: _IndexState) -> Dict[int, float]:
+        """Best score per player position for a single query token"""
+        scores: Dict[int, float] = {}
+
+        def offer(token: str, score: float):
+            for pos in state.postings.get(token, ()):
+                if score > scores.get(pos, 0.0):
+                    scores[pos] = score
+
+        for token in self._prefix_tokens(query_token, state.tokens):
+            if token == query_token:
+                offer(token, EXACT_SCORE)
+            else:
+                offer(token, PREFIX_SCORE * (0.5 + 0.5 * len(query_token) / len(token)))
+
+        if len(query_token) >= 3:
+            query_grams = trigrams(query_token)
+            shared: Dict[str, int] = defaultdict(int)
+            for gram in query_grams:
+                for token in state.trigram_index.get(gram, ()):
+                    shared[token] += 1
+            for token, count in shared.items():
+                # Dice coefficient over trigram sets
+                similarity = 2 * count / (len(query_grams) + len(state.trigram_sets[token]))
+                if similarity >= MIN_SIMILARITY:
+                    offer(token, FUZZY_WEIGHT * similarity)
+
+        return scores
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[Tuple[Dict, float]]:
+        """Return up to ``limit`` (player, score) pairs ranked best first"""
+        # Take one reference: a concurrent build() swaps the whole state at once
+        state = self._state
+        query_tokens = tokenize(query)
+        if not query_tokens or state.built_at is None:
+            return []
+
+        totals: Optional[Dict[int, float]] = None
+        for query_token in query_tokens:
+            matches = self._token_matches(query_token, state)
+            if totals is None:
+                totals = matches
+            else:
+                # Every query token has to match something in the name
+                totals = {pos: totals[pos] + s for pos, s in matches.items() if pos in totals}
+            if not totals:
+                return []
+
+        normalized_query = " ".join(query_tokens)
+        ranked = []
+        for pos, total in totals.items():
+            name = state.names[pos]
+            score = total / len(query_tokens)
+            if name == normalized_query:
+                score += 0.2
+            elif name.startswith(normalized_query):
+                score += 0.1
+            ranked.append((round(score, 4), name, pos))
+
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return [(state.players[pos], score) for score, _, pos in ranked[:limit]]
+
+
+# Process-wide index, rebuilt at startup and after roster scrapes
+player_index = PlayerSearchIndex()
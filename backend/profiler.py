@@ -0,0 +1,207 @@
+"""
+On-demand sampling profiler for production captures
+A daemon thread samples the stacks of every thread in the process (the event
+loop and the thread-pool workers) with ``sys._current_frames()`` at a fixed
+interval and counts identical stacks. The result is the collapsed-stack text
+that flamegraph.pl, speedscope and inferno read directly.
+
+Off unless PROFILER_TOKEN is set. An admin can then capture the whole
+process for N seconds, or add ``X-Profile: <token>`` to a single slow request
+and fetch that request's profile by the ``X-Profile-Id`` response header.
+Only one capture runs at a time, so at most one sampler thread exists.
+"""
+
+import asyncio
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILER_TOKEN = os.getenv("PROFILER_TOKEN", "")
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "10"))
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+MAX_STACK_DEPTH = 128
+# Per-request profiles kept for GET /api/admin/profile/{id}
+RECENT_PROFILES = 20
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(frame) -> str:
+    """Root-first ``a;b;c`` for one thread's stack"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Samples all threads' stacks from a daemon thread until stopped"""
+
+    def __init__(self, interval: float = PROFILER_INTERVAL_MS / 1000):
+        self.interval = interval
+        self.counts: Dict[Tuple[str, str], int] = {}
+        self.samples = 0
+        self.started: Optional[float] = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StackSampler":
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            # Only this thread writes the counts, so no lock is needed
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                key = (names.get(ident, f"thread-{ident}"), collapse(frame))
+                self.counts[key] = self.counts.get(key, 0) + 1
+            self.samples += 1
+
+    def stop(self) -> "StackSampler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - (self.started or time.perf_counter())
+        return self
+
+    def collapsed(self) -> str:
+        """``thread;root;...;leaf count`` lines, heaviest first"""
+        lines = [
+            f"{thread};{stack} {count}"
+            for (thread, stack), count in sorted(self.counts.items(), key=lambda item: -item[1])
+        ]
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+class Profiler:
+    """Token-protected captures; one sampler at a time"""
+
+    def __init__(self, token: str = PROFILER_TOKEN, max_seconds: float = PROFILER_MAX_SECONDS,
+                 interval_ms: float = PROFILER_INTERVAL_MS):
+        self.token = token
+        self.max_seconds = max_seconds
+        self.interval_ms = interval_ms
+        self.active: Optional[StackSampler] = None
+        self.captures = 0
+        self.recent: "OrderedDict[str, str]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token)
+
+    def authorized(self, token: Optional[str]) -> bool:
+        return self.enabled and token is not None and hmac.compare_digest(token, self.token)
+
+    def begin(self, interval_ms: Optional[float] = None) -> Optional[StackSampler]:
+        """Start a sampler, or None when a capture is already running"""
+        if self.active is not None:
+            return None
+        self.active = StackSampler((interval_ms or self.interval_ms) / 1000).start()
+        return self.active
+
+    def end(self, sampler: StackSampler) -> str:
+        sampler.stop()
+        if self.active is sampler:
+            self.active = None
+        self.captures += 1
+        return sampler.collapsed()
+
+    async def capture(self, seconds: float, interval_ms: Optional[float] = None) -> Optional[str]:
+        """Profile the whole process for ``seconds``; None when busy"""
+        sampler = self.begin(interval_ms)
+        if sampler is None:
+            return None
+        try:
+            await asyncio.sleep(min(seconds, self.max_seconds))
+        finally:
+            output = self.end(sampler)
+        logger.info(f"Profile captured: {sampler.samples} samples over {sampler.elapsed:.1f}s")
+        return output
+
+    def keep(self, output: str) -> str:
+        profile_id = uuid.uuid4().hex[:12]
+        self.recent[profile_id] = output
+        while len(self.recent) > RECENT_PROFILES:
+            self.recent.popitem(last=False)
+        return profile_id
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "running": self.active is not None,
+            "captures": self.captures,
+            "interval_ms": self.interval_ms,
+            "max_seconds": self.max_seconds,
+        }
+
+
+class ProfileRequestMiddleware:
+    """Profiles one request when it carries ``X-Profile: <token>``
+
+    The sampler covers the whole process, so work from concurrent requests
+    shows up in the profile too.
+    """
+
+    def __init__(self, app, profiler: "Profiler" = None):
+        self.app = app
+        self.profiler = profiler or sampling_profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+        token = dict(scope.get("headers") or []).get(b"x-profile")
+        if token is None or not self.profiler.authorized(token.decode("latin-1")):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = self.profiler.begin()
+        if sampler is None:
+            # Another capture is running; serve the request unprofiled
+            async def send_busy(message):
+                if message["type"] == "http.response.start":
+                    message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", b"busy")]}
+                await send(message)
+            await self.app(scope, receive, send_busy)
+            return
+
+        finished = False
+
+        def finish() -> str:
+            nonlocal finished
+            finished = True
+            return self.profiler.keep(self.profiler.end(sampler))
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start" and not finished:
+                profile_id = finish()
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            if not finished:
+                finish()
+
+
+sampling_profiler = Profiler()
@@ -0,0 +1,159 @@
+"""
+Reference-data snapshot for teams and players
+Teams and rosters change a few times a day at most, so they are loaded once,
+indexed in memory and swapped atomically after each scrape. The last good
+snapshot is kept (and persisted to the data volume) when Supabase is down.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from db import fetch_all
+from metrics import run_sync
+from player_queries import PLAYER_FIELDS, build_player_select
+
+logger = logging.getLogger(__name__)
+
+# Anchored to backend/ (/app/data in the container) regardless of the CWD
+DATA_DIR = Path(os.getenv("DATA_DIR") or Path(__file__).resolve().parent / "data")
+SNAPSHOT_FILE = DATA_DIR / "reference_snapshot.json"
+
+
+def _jersey_key(player: Dict) -> Tuple[bool, int, str]:
+    """Sort key matching ORDER BY jersey_number NULLS LAST, id"""
+    jersey = player.get("jersey_number")
+    return (jersey is None, jersey if jersey is not None else 0, str(player.get("id", "")))
+
+
+class ReferenceSnapshot:
+    """Immutable view of teams and players with lookup indexes"""
+
+    __slots__ = ("teams", "players", "teams_by_abbrev", "players_by_id",
+                 "players_by_team", "loaded_at", "source")
+
+    def __init__(self, teams: List[Dict], players: List[Dict],
+                 loaded_at: Optional[float] = None, source: str = "database"):
+        self.teams: Tuple[Dict, ...] = tuple(sorted(teams, key=lambda t: t.get("abbreviation", "")))
+        self.players: Tuple[Dict, ...] = tuple(players)
+        self.teams_by_abbrev: Mapping[str, Dict] = {
+            t["abbreviation"].upper(): t for t in self.teams if t.get("abbreviation")
+        }
+        self.players_by_id: Mapping[str, Dict] = {
+            str(p["id"]): p for p in self.players if p.get("id") is not None
+        }
+
+        by_team: Dict[str, List[Dict]] = {}
+        for player in self.players:
+            abbrev = (player.get("team_abbreviation") or "").upper()
+            by_team.setdefault(abbrev, []).append(player)
+        self.players_by_team: Mapping[str, Tuple[Dict, ...]] = {
+            abbrev: tuple(sorted(rows, key=_jersey_key)) for abbrev, rows in by_team.items()
+        }
+
+        self.loaded_at = loaded_at if loaded_at is not None else time.time()
+        self.source = source
+
+    def team(self, abbrev: str) -> Optional[Dict]:
+        return self.teams_by_abbrev.get(abbrev.upper())
+
+    def team_players(self, abbrev: str, active_only: bool = True) -> List[Dict]:
+        rows = self.players_by_team.get(abbrev.upper(), ())
+        return [p for p in rows if p.get("is_active", True)] if active_only else list(rows)
+
+    def player(self, player_id: str) -> Optional[Dict]:
+        return self.players_by_id.get(str(player_id))
+
+    def age_seconds(self) -> float:
+        return max(0.0, time.time() - self.loaded_at)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"teams": list(self.teams), "players": list(self.players), "loaded_at": self.loaded_at}
+
+
+class ReferenceStore:
+    """Holds the current snapshot and refreshes it from Supabase"""
+
+    def __init__(self, snapshot_file: Path = SNAPSHOT_FILE):
+        self.snapshot: Optional[ReferenceSnapshot] = None
+        self.snapshot_file = snapshot_file
+        self.last_error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.snapshot is not None
+
+    def replace(self, snapshot: ReferenceSnapshot):
+        """Swap in a new snapshot (single reference assignment)"""
+        self.snapshot = snapshot
+
+    async def refresh(self, supabase) -> Optional[ReferenceSnapshot]:
+        """Reload teams and players; keep serving the previous snapshot on failure"""
+        if not supabase:
+            return self.snapshot or self.load_from_disk()
+        try:
+            player_select = build_player_select(",".join(PLAYER_FIELDS), "team")
+            # players keeps a row per season, so page past the 1000-row cap
+            teams, players = await asyncio.gather(
+                supabase.table("teams").select("*").execute(),
+                fetch_all(lambda: supabase.table("players").select(player_select).order("id")),
+            )
+            snapshot = ReferenceSnapshot(teams.data, players)
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Reference data refresh failed, serving stale snapshot: {e}")
+            if self.snapshot is None:
+                self.load_from_disk()
+            return self.snapshot
+
+        self.replace(snapshot)
+        self.last_error = None
+        await run_sync(self.save_to_disk)
+        logger.info(f"Reference snapshot loaded: {len(snapshot.teams)} teams, {len(snapshot.players)} players")
+        return snapshot
+
+    def save_to_disk(self):
+        """Persist the current snapshot so a restart can serve it without Supabase"""
+        if self.snapshot is None:
+            return
+        try:
+            self.snapshot_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.snapshot_file.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.snapshot.to_dict(), default=str))
+            tmp.replace(self.snapshot_file)
+        except Exception as e:
+            logger.warning(f"Failed to persist reference snapshot: {e}")
+
+    def load_from_disk(self) -> Optional[ReferenceSnapshot]:
+        """Load the last persisted snapshot, if any"""
+        try:
+            data = json.loads(self.snapshot_file.read_text())
+            self.replace(ReferenceSnapshot(
+                data.get("teams", []), data.get("players", []),
+                loaded_at=data.get("loaded_at"), source="disk",
+            ))
+            logger.info(f"Reference snapshot restored from {self.snapshot_file}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to restore reference snapshot: {e}")
+        return self.snapshot
+
+    def status(self) -> Dict[str, Any]:
+        snapshot = self.snapshot
+        return {
+            "loaded": snapshot is not None,
+            "source": snapshot.source if snapshot else None,
+            "teams": len(snapshot.teams) if snapshot else 0,
+            "players": len(snapshot.players) if snapshot else 0,
+            "age_seconds": round(snapshot.age_seconds(), 1) if snapshot else None,
+            "last_error": self.last_error,
+        }
+
+
+# Process-wide store, refreshed at startup and after each scrape
+reference_store = ReferenceStore()
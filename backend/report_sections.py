@@ -0,0 +1,232 @@
+"""
+Dependency-aware, concurrent evaluation of report sections
+Each section names the sections whose results it takes as inputs. Every
+section starts as soon as its inputs are ready, so independent sections
+overlap and a report takes as long as its slowest dependency chain, not the
+sum of all sections. CPU-bound sections run in the thread pool.
+
+Sections that declare the data they read (``reads``) get a fingerprint from
+those data versions and their inputs' fingerprints. When a report is
+regenerated, a section whose fingerprint is unchanged is reused from the
+previous run, and inputs needed only by reused sections are not evaluated.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from metrics import run_sync
+
+
+def parse_sections(value: Optional[str]) -> Optional[List[str]]:
+    """``"a, b"`` -> ``["a", "b"]``; None or blank means the whole report"""
+    names = [name.strip() for name in (value or "").split(",") if name.strip()]
+    return names or None
+
+
+def select_sections(outputs: Sequence[str], requested: Optional[Iterable[str]]) -> List[str]:
+    """Requested output sections in report order (all when ``requested`` is None)"""
+    if requested is None:
+        return list(outputs)
+    requested = list(dict.fromkeys(requested))
+    unknown = [name for name in requested if name not in outputs]
+    if unknown or not requested:
+        raise ValueError(
+            f"Unknown report section(s): {', '.join(unknown) or '(none given)'}; "
+            f"choose from {', '.join(outputs)}"
+        )
+    return [name for name in outputs if name in requested]
+
+
+class Section:
+    """A named report step: ``func(*inputs)``, sync or async
+
+    ``reads`` names the data sources (versions from the daily context) the
+    step reads besides its inputs; ``()`` means it depends on its inputs
+    only. Leave it None for steps that must always be recomputed.
+    """
+
+    __slots__ = ("name", "func", "inputs", "cpu", "reads")
+
+    def __init__(self, name: str, func: Callable, inputs: Sequence[str] = (), cpu: bool = False,
+                 reads: Optional[Sequence[str]] = None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        # Sync CPU-heavy work goes to the thread pool instead of the loop
+        self.cpu = cpu
+        self.reads = None if reads is None else tuple(reads)
+
+
+class SectionMemo:
+    """Last result of each report section with the fingerprint it was computed for"""
+
+    def __init__(self):
+        # (scope, section) -> (fingerprint, value); scope is the report slot
+        self.entries: Dict[Tuple[str, str], Tuple[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, scope: str, name: str, fingerprint: Optional[str]):
+        """``(True, value)`` when the stored result matches ``fingerprint``"""
+        entry = self.entries.get((scope, name))
+        if fingerprint is not None and entry is not None and entry[0] == fingerprint:
+            return True, entry[1]
+        return False, None
+
+    def put(self, scope: str, name: str, fingerprint: Optional[str], value: Any):
+        if fingerprint is not None:
+            self.entries[(scope, name)] = (fingerprint, value)
+
+    def status(self) -> Dict:
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+class SectionGraph:
+    """Validated DAG of sections, kept in dependency order"""
+
+    def __init__(self, sections: Iterable[Section]):
+        self.sections: Dict[str, Section] = {}
+        for section in sections:
+            if section.name in self.sections:
+                raise ValueError(f"Duplicate report section '{section.name}'")
+            self.sections[section.name] = section
+        for section in self.sections.values():
+            missing = [name for name in section.inputs if name not in self.sections]
+            if missing:
+                raise ValueError(f"Section '{section.name}' needs unknown input(s): {', '.join(missing)}")
+        self.order = self._dependency_order(self.sections)
+
+    @staticmethod
+    def _dependency_order(sections: Dict[str, Section]) -> List[Section]:
+        order: List[Section] = []
+        state: Dict[str, str] = {}
+
+        def visit(name: str, path: Tuple[str, ...]):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Report sections form a cycle: {' -> '.join(path + (name,))}")
+            state[name] = "visiting"
+            for dep in sections[name].inputs:
+                visit(dep, path + (name,))
+            state[name] = "done"
+            order.append(sections[name])
+
+        for name in sections:
+            visit(name, ())
+        return order
+
+    def fingerprints(self, versions: Optional[Dict[str, str]]) -> Dict[str, Optional[str]]:
+        """Per-section hash of the data versions it reads and its inputs' fingerprints
+
+        None for sections that cannot be fingerprinted: no declared reads, a
+        source missing from ``versions``, or an input without a fingerprint.
+        """
+        prints: Dict[str, Optional[str]] = {}
+        for section in self.order:
+            parts = None
+            if versions is not None and section.reads is not None:
+                # Every report is per day, so no result outlives its day
+                parts = [section.name, str(versions.get("day", ""))]
+                for source in section.reads:
+                    if versions.get(source) is None:
+                        parts = None
+                        break
+                    parts.append(f"{source}={versions[source]}")
+                for name in section.inputs if parts is not None else ():
+                    if prints[name] is None:
+                        parts = None
+                        break
+                    parts.append(f"{name}:{prints[name]}")
+            prints[section.name] = (
+                hashlib.sha1("|".join(parts).encode()).hexdigest()[:16] if parts is not None else None
+            )
+        return prints
+
+    async def evaluate(self, only: Optional[Iterable[str]] = None,
+                       versions: Optional[Dict[str, str]] = None,
+                       memo: Optional[SectionMemo] = None,
+                       scope: str = "") -> Tuple[Dict[str, Any], Dict]:
+        """Run the sections (or ``only`` those plus their inputs) concurrently
+
+        Returns ``(results, metadata)``; metadata has per-section start
+        offset and duration in milliseconds. The first failing section's
+        exception is raised and the sections still running are cancelled.
+        With ``versions`` and ``memo``, sections whose fingerprint matches
+        the memo are reused (``"reused": true`` in their timing) and their
+        inputs are skipped unless another section needs them.
+        """
+        prints = self.fingerprints(versions) if memo is not None else {}
+        reused: Dict[str, Any] = {}
+
+        # Walk from the requested sections, stopping at reusable ones
+        needed = set()
+        pending = list(only if only is not None else self.sections)
+        while pending:
+            name = pending.pop()
+            if name not in self.sections:
+                raise KeyError(name)
+            if name in needed:
+                continue
+            needed.add(name)
+            if memo is not None:
+                hit, value = memo.get(scope, name, prints.get(name))
+                if hit:
+                    reused[name] = value
+                    continue
+            pending.extend(self.sections[name].inputs)
+        sections = [section for section in self.order if section.name in needed]
+        if memo is not None:
+            memo.hits += len(reused)
+            memo.misses += len(sections) - len(reused)
+
+        started = time.perf_counter()
+        timings: Dict[str, Dict[str, Any]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run(section: Section):
+            if section.name in reused:
+                timings[section.name] = {"start_ms": 0.0, "duration_ms": 0.0, "reused": True}
+                return reused[section.name]
+            args = [await tasks[name] for name in section.inputs]
+            ready = time.perf_counter()
+            if section.cpu:
+                value = await run_sync(section.func, *args)
+            else:
+                value = section.func(*args)
+                if inspect.isawaitable(value):
+                    value = await value
+            timings[section.name] = {
+                "start_ms": round((ready - started) * 1000, 2),
+                "duration_ms": round((time.perf_counter() - ready) * 1000, 2),
+            }
+            if memo is not None:
+                memo.put(scope, section.name, prints.get(section.name), value)
+            return value
+
+        # Dependency order guarantees every input task exists before it is awaited
+        for section in sections:
+            tasks[section.name] = asyncio.create_task(run(section))
+        try:
+            values = await asyncio.gather(*tasks.values())
+        finally:
+            pending = [task for task in tasks.values() if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        metadata = {
+            "total_ms": round((time.perf_counter() - started) * 1000, 2),
+            "sections": {section.name: timings[section.name] for section in sections},
+        }
+        if memo is not None:
+            metadata["fingerprints"] = {section.name: prints.get(section.name) for section in sections}
+            metadata["reused"] = [section.name for section in sections if section.name in reused]
+        return dict(zip(tasks, values)), metadata
+
+
+# Process-wide memo shared by every report generator
+section_memo = SectionMemo()
@@ -5,22 +5,51 @@ Includes advanced analytics, Kelly criterion betting, value detection, and Bulls
 """
 
 from datetime import datetime, timedelta
-from supabase import Client
-from typing import Dict, List, Optional, Any
+from db import AsyncDatabase as Client, fetch_all
+from odds_summary import group_odds_by_game
+from odds_matrix import OddsMatrix, to_american, to_decimal
+from kelly import fractional_kelly, simultaneous_kelly
+from monte_carlo import MAX_LEGS, simulate_bankroll, simulate_parlays
+from report_sections import Section, SectionGraph, section_memo, select_sections
+from daily_context import DailyContext
+from typing import Dict, Iterable, List, Optional, Any
 import httpx
 from bs4 import BeautifulSoup
 import json
 import asyncio
-import anyio
+import itertools
 import statistics
 import numpy as np
 
+# slot -> (report_type, top-level sections in report order)
+REPORT_LAYOUTS = {
+    "750am": ("750am_previous_day", (
+        "summary", "results_vs_closing", "top_trends", "bulls_detailed_analysis",
+        "value_opportunities", "risk_assessment", "betting_insights",
+    )),
+    "800am": ("800am_morning_summary", (
+        "executive_summary", "yesterday_performance", "seven_day_trends", "bulls_current_form",
+        "market_intelligence", "automated_parlays", "line_shopping_alerts", "action_items",
+    )),
+    "1100am": ("1100am_gameday_scouting", (
+        "slate_overview", "injury_intelligence", "matchup_analysis", "bulls_game_plan",
+        "betting_strategy", "live_betting_plan", "risk_management", "late_intel",
+    )),
+}
+
+# +EV legs (one per game) combined into simulated 2- and 3-leg parlays
+PARLAY_CANDIDATES = 6
+PARLAY_SIZES = (2, 3)
+
 
 class NBAReportGenerator:
     """Generate NBA analysis reports"""
 
-    def __init__(self, supabase: Client):
+    def __init__(self, supabase: Client, context: Optional[DailyContext] = None):
         self.supabase = supabase
+        # Shared per-day games/odds; methods query Supabase only without it
+        self.context = context
+        self.memo = section_memo
         self.focus_teams = {
             "Celtics", "Wolves", "Thunder", "Magic", "Cavs",
             "Kings", "Rockets", "Knicks", "Bulls"
@@ -29,34 +58,32 @@ class NBAReportGenerator:
 
     async def get_yesterday_games(self) -> List[Dict]:
         """Fetch games from yesterday"""
+        if self.context is not None:
+            return self.context.yesterday_games
         yesterday = (datetime.now() - timedelta(days=1)).date()
         tomorrow = yesterday + timedelta(days=1)
 
-        response = await self._query_games(
-            f"commenced_time >= '{yesterday.isoformat()}'",
-            f"commenced_time < '{tomorrow.isoformat()}'"
-        )
-        return response
+        return await self._query_games(yesterday.isoformat(), tomorrow.isoformat())
 
     async def get_today_games(self) -> List[Dict]:
         """Fetch games for today"""
+        if self.context is not None:
+            return self.context.today_games
         today = datetime.now().date()
         tomorrow = today + timedelta(days=1)
 
-        response = await self._query_games(
-            f"commence_time >= '{today.isoformat()}'",
-            f"commence_time < '{tomorrow.isoformat()}'"
-        )
-        return response
+        return await self._query_games(today.isoformat(), tomorrow.isoformat())
 
-    async def _query_games(self, *conditions: str) -> List[Dict]:
-        """Query games with conditions"""
+    async def _query_games(self, start: str, end: str) -> List[Dict]:
+        """Query games with commence_time in [start, end)"""
         try:
-            query = self.supabase.table("games").select("*")
-            for condition in conditions:
-                if condition:
-                    query = query.filter(condition)
-            response = query.execute()
+            response = await (
+                self.supabase.table("games")
+                .select("*")
+                .gte("commence_time", start)
+                .lt("commence_time", end)
+                .execute()
+            )
             return response.data
         except Exception as e:
             print(f"Error querying games: {e}")
@@ -65,12 +92,36 @@ class NBAReportGenerator:
     async def get_game_odds(self, game_id: str) -> List[Dict]:
         """Get odds for a specific game"""
         try:
-            response = self.supabase.table("odds").select("*").eq("game_id", game_id).execute()
+            response = await self.supabase.table("odds").select("*").eq("game_id", game_id).execute()
             return response.data
         except Exception as e:
             print(f"Error fetching odds for game {game_id}: {e}")
             return []
 
+    async def get_odds_by_game(self, game_ids: List[str]) -> Dict[str, List[Dict]]:
+        """Odds for several games with one in_ query, grouped by game id"""
+        ids = [gid for gid in dict.fromkeys(game_ids) if gid]
+        if not ids:
+            return {}
+        if self.context is not None and all(gid in self.context.odds_by_game for gid in ids):
+            return self.context.odds_for(ids)
+        try:
+            rows = await fetch_all(
+                lambda: self.supabase.table("odds").select("*").in_("game_id", ids).order("id")
+            )
+        except Exception as e:
+            print(f"Error fetching odds for {len(ids)} games: {e}")
+            rows = []
+        return group_odds_by_game(rows, ids)
+
+    async def get_odds_matrix(self) -> OddsMatrix:
+        """Today's slate as an OddsMatrix (shared through the daily context)"""
+        if self.context is not None:
+            return self.context.odds_matrix()
+        games = await self.get_today_games()
+        odds_by_game = await self.get_odds_by_game([g.get("id") for g in games])
+        return OddsMatrix.build([row for rows in odds_by_game.values() for row in rows], games)
+
     async def filter_focus_teams(self, games: List[Dict]) -> List[Dict]:
         """Filter games involving focus teams or high-value betting opportunities"""
         focus_teams = [self.bulls_focus, "Lakers", "Celtics", "Warriors", "Heat"]
@@ -116,48 +167,12 @@ class NBAReportGenerator:
             "avg_bet_size": total_wagered / len(bet_history) if bet_history else 0
         }
 
-    async def identify_arbitrage_opportunities(self, odds_data: List[Dict]) -> List[Dict]:
+    async def identify_arbitrage_opportunities(self, matrix: Optional[OddsMatrix]) -> List[Dict]:
         """Identify arbitrage betting opportunities across multiple sportsbooks"""
-        opportunities = []
-        
-        for game_odds in odds_data:
-            if not game_odds.get("sportsbooks"):
-                continue
-                
-            # Find best odds for each outcome
-            best_home = max(game_odds["sportsbooks"], 
-                          key=lambda x: x.get("home_odds", 0), default={})
-            best_away = max(game_odds["sportsbooks"], 
-                          key=lambda x: x.get("away_odds", 0), default={})
-            
-            if best_home and best_away:
-                home_odds = best_home.get("home_odds", 0)
-                away_odds = best_away.get("away_odds", 0)
-                
-                # Check for arbitrage (sum of implied probabilities < 1)
-                if home_odds > 0 and away_odds > 0:
-                    home_implied = 1 / (home_odds / 100 + 1) if home_odds > 0 else 1 / (abs(home_odds) / 100 + 1)
-                    away_implied = 1 / (away_odds / 100 + 1) if away_odds > 0 else 1 / (abs(away_odds) / 100 + 1)
-                    
-                    total_implied = home_implied + away_implied
-                    
-                    if total_implied < 0.98:  # Account for juice/margin
-                        opportunities.append({
-                            "game": f"{game_odds.get('away_team')} @ {game_odds.get('home_team')}",
-                            "profit_margin": (1 - total_implied) * 100,
-                            "home_bet": {
-                                "sportsbook": best_home.get("sportsbook"),
-                                "odds": home_odds,
-                                "allocation": away_implied / total_implied
-                            },
-                            "away_bet": {
-                                "sportsbook": best_away.get("sportsbook"), 
-                                "odds": away_odds,
-                                "allocation": home_implied / total_implied
-                            }
-                        })
-        
-        return opportunities
+        if matrix is None:
+            return []
+        # Require a 2% margin so the juice on a line move does not eat the edge
+        return matrix.arbitrage(max_total_implied=0.98)
 
     def format_betting_slip(self, bets: List[Dict], total_stake: float) -> Dict:
         """Format professional betting slip with stake allocation"""
@@ -171,13 +186,15 @@ class NBAReportGenerator:
             "risk_grade": "Medium"
         }
         
-        for bet in bets:
+        # Decimal odds and Kelly stakes for the whole slip at once
+        decimals = to_decimal(np.array([bet.get("odds", 100) for bet in bets], dtype=float))
+        probs = np.array([bet.get("confidence", 50) / 100 for bet in bets], dtype=float)
+        kelly = fractional_kelly(probs, decimals)
+        
+        for bet, decimal_odds, kelly_fraction in zip(bets, np.nan_to_num(decimals).tolist(), kelly.tolist()):
             stake = bet.get("stake", 0)
             odds = bet.get("odds", 100)
             confidence = bet.get("confidence", 50)
-            
-            # Calculate decimal odds
-            decimal_odds = (odds / 100 + 1) if odds > 0 else (100 / abs(odds) + 1)
             potential_return = stake * decimal_odds
             
             formatted_bet = {
@@ -188,12 +205,13 @@ class NBAReportGenerator:
                 "confidence": confidence,
                 "reasoning": bet.get("reasoning", ""),
                 "sportsbook": bet.get("sportsbook", "DraftKings"),
-                "kelly_percentage": self.calculate_kelly_criterion(confidence/100, decimal_odds)
+                "kelly_percentage": kelly_fraction
             }
             
             formatted_slip["bets"].append(formatted_bet)
             formatted_slip["total_potential_return"] += potential_return
-            formatted_slip["expected_value"] += stake * (confidence/100 * decimal_odds - 1)
+            if decimal_odds:
+                formatted_slip["expected_value"] += stake * (confidence/100 * decimal_odds - 1)
         
         # Risk grading
         if formatted_slip["expected_value"] > total_stake * 0.1:
@@ -203,25 +221,13 @@ class NBAReportGenerator:
         
         return formatted_slip
 
-    def format_game_line(self, game: Dict, odds_list: List[Dict]) -> Dict:
-        """Format a single game with ATS and O/U lines"""
-        spread_lines = [o for o in odds_list if o.get("market_type") == "spread"]
-        totals_lines = [o for o in odds_list if o.get("market_type") == "totals"]
-
-        spread_line = None
-        total_line = None
-
-        if spread_lines:
-            spread_line = {
-                "point": spread_lines[0].get("point"),
-                "price": spread_lines[0].get("price"),
-            }
-
-        if totals_lines:
-            total_line = {
-                "point": totals_lines[0].get("point"),
-                "price": totals_lines[0].get("price"),
-            }
+    def format_game_line(self, game: Dict, odds_list: List[Dict], matrix: Optional[OddsMatrix] = None) -> Dict:
+        """Format a single game with ATS and O/U lines (consensus plus best available)"""
+        if matrix is None:
+            matrix = OddsMatrix.build(odds_list, [game])
+        # Home side of the spread, Over of the total
+        spread_line = matrix.line(game.get("id"), "spread", 0)
+        total_line = matrix.line(game.get("id"), "totals", 0)
 
         return {
             "home_team": game.get("home_team"),
@@ -231,7 +237,54 @@ class NBAReportGenerator:
             "total": total_line,
         }
 
-    async def generate_750am_report(self) -> Dict:
+    async def generate_report(self, slot: str, sections: Optional[Iterable[str]] = None) -> Dict:
+        """Generate a report, or only the named ``sections`` of it
+
+        Only the requested sections and the inputs they depend on are
+        evaluated; raises ValueError for an unknown slot or section. With a
+        daily context, sections whose input fingerprints are unchanged since
+        the last run are reused instead of recomputed.
+        """
+        if slot not in REPORT_LAYOUTS:
+            raise ValueError(f"Unknown report '{slot}'")
+        report_type, outputs = REPORT_LAYOUTS[slot]
+        wanted = select_sections(outputs, sections)
+        graph = getattr(self, f"_{slot}_sections")()
+        versions = self.context.data_versions() if self.context is not None else None
+        results, metadata = await graph.evaluate(wanted, versions, self.memo, scope=slot)
+
+        report = {
+            "timestamp": datetime.now().isoformat(),
+            "report_type": report_type,
+        }
+        report.update((name, results[name]) for name in wanted)
+        report["metadata"] = metadata
+        return report
+
+    def _750am_sections(self) -> SectionGraph:
+        # reads= names the daily-context data each section depends on; ()
+        # means its inputs only (see report_sections for fingerprinting)
+        return SectionGraph([
+            Section("games", self.get_yesterday_games, reads=["games_yesterday"]),
+            Section("focus_games", self.filter_focus_teams, ["games"], reads=[]),
+            Section("odds_by_game", lambda games: self.get_odds_by_game([g.get("id") for g in games]),
+                    ["focus_games"], reads=["odds_yesterday"]),
+            Section("focus_teams_performance", self._calculate_focus_performance, ["focus_games"], reads=[]),
+            Section("market_efficiency", self._analyze_market_efficiency, ["focus_games"], reads=[]),
+            Section("results_vs_closing", self._analyze_game_results, ["focus_games", "odds_by_game"], reads=[]),
+            Section("top_trends", self._identify_top_trends, ["focus_games"], reads=[]),
+            Section("bulls_detailed_analysis", self._generate_bulls_player_analysis, reads=["reference"]),
+            Section("value_opportunities", self._detect_value_opportunities, reads=["odds_today"]),
+            Section("risk_assessment", self._assess_daily_risks, reads=["games_today", "odds_today"]),
+            Section("betting_insights", self._generate_betting_insights, ["focus_games"], reads=[]),
+            Section("summary", lambda focus_games, performance, efficiency: {
+                "games_analyzed": len(focus_games),
+                "focus_teams_performance": performance,
+                "market_efficiency": efficiency
+            }, ["focus_games", "focus_teams_performance", "market_efficiency"], reads=[]),
+        ])
+
+    async def generate_750am_report(self, sections: Optional[Iterable[str]] = None) -> Dict:
         """
         7:50 AM Report: Advanced Previous Day Analysis
         - Wyniki vs closing line with ATS/O-U performance
@@ -239,32 +292,13 @@ class NBAReportGenerator:
         - Bulls gracz-po-graczu detailed breakdown
         - Risk assessment for today's games
         """
-        games = await self.get_yesterday_games()
-        focus_games = await self.filter_focus_teams(games)
-        
-        report = {
-            "timestamp": datetime.now().isoformat(),
-            "report_type": "750am_previous_day",
-            "summary": {
-                "games_analyzed": len(focus_games),
-                "focus_teams_performance": await self._calculate_focus_performance(focus_games),
-                "market_efficiency": await self._analyze_market_efficiency(focus_games)
-            },
-            "results_vs_closing": [],
-            "top_trends": await self._identify_top_trends(focus_games),
-            "bulls_detailed_analysis": await self._generate_bulls_player_analysis(),
-            "value_opportunities": await self._detect_value_opportunities(),
-            "risk_assessment": await self._assess_daily_risks(),
-            "betting_insights": await self._generate_betting_insights(focus_games)
-        }
+        return await self.generate_report("750am", sections)
 
-        # Process each game with detailed analysis
-        for game in focus_games:
-            odds = await self.get_game_odds(game.get("id"))
-            game_analysis = await self._analyze_game_result(game, odds)
-            report["results_vs_closing"].append(game_analysis)
-
-        return report
+    async def _analyze_game_results(self, games: List[Dict], odds_by_game: Dict[str, List[Dict]]) -> List[Dict]:
+        """Analyze every focus game against its closing lines"""
+        return list(await asyncio.gather(*(
+            self._analyze_game_result(game, odds_by_game.get(game.get("id"), [])) for game in games
+        )))
 
     async def _calculate_focus_performance(self, games: List[Dict]) -> Dict:
         """Calculate overall performance metrics for focus teams"""
@@ -469,7 +503,22 @@ class NBAReportGenerator:
             "betting_lessons": "Home favorites in tight games tend to find extra gear late"
         }
 
-    async def generate_800am_report(self) -> Dict:
+    def _800am_sections(self) -> SectionGraph:
+        return SectionGraph([
+            Section("games", self.get_yesterday_games, reads=["games_yesterday"]),
+            Section("focus_games", self.filter_focus_teams, ["games"], reads=[]),
+            Section("executive_summary", self._generate_executive_summary, ["focus_games"], reads=[]),
+            Section("yesterday_performance", self._analyze_yesterday_performance, ["focus_games"], reads=[]),
+            Section("seven_day_trends", self._calculate_seven_day_trends, reads=["games_yesterday"]),
+            Section("bulls_current_form", self._bulls_form_analysis, reads=["reference"]),
+            Section("odds_matrix", self.get_odds_matrix, reads=["games_today", "odds_today"]),
+            Section("market_intelligence", self._market_intelligence_summary, ["odds_matrix"], reads=[]),
+            Section("automated_parlays", self._generate_parlay_suggestions, ["odds_matrix"], cpu=True, reads=[]),
+            Section("line_shopping_alerts", self._line_shopping_opportunities, ["odds_matrix"], reads=[]),
+            Section("action_items", self._generate_action_items, reads=["games_today", "odds_today"]),
+        ])
+
+    async def generate_800am_report(self, sections: Optional[Iterable[str]] = None) -> Dict:
         """
         8:00 AM Report: Comprehensive Morning Market Summary
         - Wyniki wczoraj with detailed ATS/O-U analysis
@@ -478,23 +527,7 @@ class NBAReportGenerator:
         - Advanced bookmaker insights and line shopping
         - Automated parlay suggestions with Kelly criterion
         """
-        games = await self.get_yesterday_games()
-        focus_games = await self.filter_focus_teams(games)
-        
-        report = {
-            "timestamp": datetime.now().isoformat(),
-            "report_type": "800am_morning_summary",
-            "executive_summary": await self._generate_executive_summary(focus_games),
-            "yesterday_performance": await self._analyze_yesterday_performance(focus_games),
-            "seven_day_trends": await self._calculate_seven_day_trends(),
-            "bulls_current_form": await self._bulls_form_analysis(),
-            "market_intelligence": await self._market_intelligence_summary(),
-            "automated_parlays": await self._generate_parlay_suggestions(),
-            "line_shopping_alerts": await self._line_shopping_opportunities(),
-            "action_items": await self._generate_action_items()
-        }
-
-        return report
+        return await self.generate_report("800am", sections)
 
     async def _generate_executive_summary(self, games: List[Dict]) -> Dict:
         """Generate executive summary of yesterday's performance"""
@@ -619,7 +652,7 @@ class NBAReportGenerator:
             }
         }
 
-    async def _market_intelligence_summary(self) -> Dict:
+    async def _market_intelligence_summary(self, matrix: OddsMatrix) -> Dict:
         """Advanced market intelligence and bookmaker insights"""
         return {
             "line_movements": [
@@ -644,14 +677,9 @@ class NBAReportGenerator:
                 "lakers_ml": {"public": 34, "sharp": 61, "edge": "Sharp on Lakers"}
             },
             "bookmaker_comparison": {
-                "best_lines": [
-                    {"bet": "Bulls +2.5", "book": "BetMGM", "line": -105, "edge": "2.3%"},
-                    {"bet": "Under 218.5", "book": "DraftKings", "line": +105, "edge": "3.1%"}
-                ],
-                "arbitrage_opportunities": [],
-                "reduced_juice": [
-                    {"book": "Pinnacle", "games": ["Bulls/Lakers"], "savings": "~$10 per $100"}
-                ]
+                "best_lines": matrix.best_lines(),
+                "arbitrage_opportunities": await self.identify_arbitrage_opportunities(matrix),
+                "reduced_juice": matrix.book_margins()[:3]
             },
             "injury_reports": {
                 "status": "No major injury concerns",
@@ -660,57 +688,48 @@ class NBAReportGenerator:
             }
         }
 
-    async def _generate_parlay_suggestions(self) -> List[Dict]:
-        """Generate automated parlay suggestions with Kelly criterion"""
-        return [
-            {
-                "name": "Bulls Focus Parlay",
-                "legs": [
-                    {"bet": "DeRozan Over 24.5 PTS", "odds": -110, "confidence": 78},
-                    {"bet": "Vucevic Double-Double", "odds": -150, "confidence": 85},
-                    {"bet": "Bulls +2.5", "odds": -110, "confidence": 65}
-                ],
-                "total_odds": +485,
-                "true_odds": +420,
-                "edge": 13.2,
-                "kelly_bet": 2.8,
-                "recommended_stake": "$28 per $1000 bankroll",
-                "risk_level": "Medium"
-            },
-            {
-                "name": "Safe Evening Special",
+    def _generate_parlay_suggestions(self, matrix: OddsMatrix) -> List[Dict]:
+        """Simulated parlays over the slate's +EV legs, best Kelly stake first"""
+        legs = matrix.value_legs(PARLAY_CANDIDATES)
+        combos = [combo for size in PARLAY_SIZES for combo in itertools.combinations(range(len(legs)), size)]
+        if not combos:
+            return []
+        simulation = simulate_parlays([leg["fair_prob"] for leg in legs], [leg["decimal"] for leg in legs], combos)
+        ranked = sorted((p for p in simulation["parlays"] if p["ev"] > 0), key=lambda p: -p["kelly_fraction"])
+        suggestions = []
+        for rank, parlay in enumerate(ranked[:3], 1):
+            hit_rate = parlay["hit_rate"]
+            suggestions.append({
+                "name": f"{len(parlay['legs'])}-Leg Value Parlay #{rank}",
                 "legs": [
-                    {"bet": "Celtics -5.5", "odds": -110, "confidence": 82},
-                    {"bet": "Under 218.5", "odds": -110, "confidence": 74},
-                    {"bet": "Warriors Over 114.5 TT", "odds": -115, "confidence": 71}
+                    {"bet": legs[i]["bet"], "game": legs[i]["game"], "book": legs[i]["book"],
+                     "odds": legs[i]["odds"], "confidence": round(legs[i]["fair_prob"] * 100, 1)}
+                    for i in parlay["legs"]
                 ],
-                "total_odds": +550,
-                "true_odds": +490,
-                "edge": 10.9,
-                "kelly_bet": 2.2,
-                "recommended_stake": "$22 per $1000 bankroll", 
-                "risk_level": "Low"
-            }
-        ]
+                "total_odds": parlay["american_odds"],
+                "true_odds": int(round(float(to_american(np.array(parlay["fair_decimal_odds"]))))),
+                "hit_rate": round(hit_rate * 100, 2),
+                "edge": round(parlay["ev"] * 100, 1),
+                "kelly_bet": round(parlay["kelly_fraction"] * 100, 2),
+                "recommended_stake": f"${parlay['kelly_fraction'] * 1000:.0f} per $1000 bankroll",
+                "risk_level": "Low" if hit_rate >= 0.35 else "Medium" if hit_rate >= 0.2 else "High",
+                "simulation": {
+                    "simulations": simulation["simulations"],
+                    "seed": simulation["seed"],
+                    "ev_stderr": round(parlay["ev_stderr"] * 100, 2),
+                    "legs_hit": parlay["legs_hit"],
+                },
+            })
+        return suggestions
 
-    async def _line_shopping_opportunities(self) -> List[Dict]:
+    async def _line_shopping_opportunities(self, matrix: OddsMatrix) -> List[Dict]:
         """Identify best line shopping opportunities"""
-        return [
-            {
-                "bet": "Bulls +2.5",
-                "best_line": {"book": "BetMGM", "odds": -105},
-                "worst_line": {"book": "FanDuel", "odds": -115},
-                "savings": "~$9.50 per $100 bet",
-                "recommendation": "Strong line shop value"
-            },
-            {
-                "bet": "Celtics vs Heat Under",
-                "best_line": {"book": "DraftKings", "odds": +105},  
-                "worst_line": {"book": "Caesars", "odds": -115},
-                "savings": "~$19.50 per $100 bet",
-                "recommendation": "Must shop this total"
-            }
-        ]
+        alerts = matrix.line_shopping(min_savings=2.0)
+        for alert in alerts:
+            alert["recommendation"] = (
+                "Must shop this line" if alert["savings_per_100"] >= 10 else "Strong line shop value"
+            )
+        return alerts
 
     async def _generate_action_items(self) -> List[str]:
         """Generate specific action items for the day"""
@@ -724,7 +743,22 @@ class NBAReportGenerator:
             "📈 Consider live betting Bulls if they fall behind early - strong comeback record"
         ]
 
-    async def generate_1100am_report(self) -> Dict:
+    def _1100am_sections(self) -> SectionGraph:
+        return SectionGraph([
+            Section("games", self.get_today_games, reads=["games_today"]),
+            Section("focus_games", self.filter_focus_teams, ["games"], reads=[]),
+            Section("slate_overview", self._generate_slate_overview, ["games", "focus_games"], reads=[]),
+            Section("injury_intelligence", self._compile_injury_updates, reads=["reference"]),
+            Section("matchup_analysis", self._detailed_matchup_breakdowns, ["focus_games"], reads=["reference"]),
+            Section("bulls_game_plan", self._bulls_gameday_analysis, reads=["reference", "odds_today"]),
+            Section("betting_strategy", self._comprehensive_betting_strategy, reads=["odds_today"]),
+            Section("live_betting_plan", self._live_betting_strategy, reads=["odds_today"]),
+            Section("odds_matrix", self.get_odds_matrix, reads=["games_today", "odds_today"]),
+            Section("risk_management", self._gameday_risk_assessment, ["odds_matrix"], cpu=True, reads=[]),
+            Section("late_intel", self._late_breaking_intelligence, reads=["reference", "odds_today"]),
+        ])
+
+    async def generate_1100am_report(self, sections: Optional[Iterable[str]] = None) -> Dict:
         """
         11:00 AM Report: Comprehensive Game-Day Intelligence
         - Complete slate analysis with injury updates
@@ -733,23 +767,7 @@ class NBAReportGenerator:
         - Multi-tier betting recommendations (conservative to aggressive)
         - Real-time risk assessment and late-breaking intel
         """
-        games = await self.get_today_games()
-        focus_games = await self.filter_focus_teams(games)
-        
-        report = {
-            "timestamp": datetime.now().isoformat(),
-            "report_type": "1100am_gameday_scouting",
-            "slate_overview": await self._generate_slate_overview(games, focus_games),
-            "injury_intelligence": await self._compile_injury_updates(),
-            "matchup_analysis": await self._detailed_matchup_breakdowns(focus_games),
-            "bulls_game_plan": await self._bulls_gameday_analysis(),
-            "betting_strategy": await self._comprehensive_betting_strategy(),
-            "live_betting_plan": await self._live_betting_strategy(),
-            "risk_management": await self._gameday_risk_assessment(),
-            "late_intel": await self._late_breaking_intelligence()
-        }
-
-        return report
+        return await self.generate_report("1100am", sections)
 
     async def _generate_slate_overview(self, all_games: List[Dict], focus_games: List[Dict]) -> Dict:
         """Generate comprehensive slate overview"""
@@ -1027,7 +1045,7 @@ class NBAReportGenerator:
             ]
         }
 
-    async def _gameday_risk_assessment(self) -> Dict:
+    def _gameday_risk_assessment(self, matrix: OddsMatrix) -> Dict:
         """Comprehensive risk analysis for the day"""
         return {
             "high_risk_factors": [
@@ -1070,12 +1088,30 @@ class NBAReportGenerator:
                     "strategy": "Factor into all Lakers bets"
                 }
             ],
-            "bankroll_management": {
-                "max_exposure": "15% of bankroll across all bets",
-                "single_bet_max": "5% of bankroll",
-                "stop_loss": "Cease betting if down 8% on day",
-                "hedge_triggers": "Consider hedging if up 12%+"
-            }
+            "bankroll_management": self._simulated_bankroll_plan(matrix)
+        }
+
+    def _simulated_bankroll_plan(self, matrix: OddsMatrix) -> Dict:
+        """Simultaneous-Kelly stakes on the slate's +EV bets and their simulated risk"""
+        legs = matrix.value_legs(MAX_LEGS)
+        if not legs:
+            return {"stakes": [], "max_exposure": "No +EV bets on today's slate", "simulation": None}
+        p = np.array([leg["fair_prob"] for leg in legs])
+        decimal = np.array([leg["decimal"] for leg in legs])
+        stakes = simultaneous_kelly(p, decimal)
+        simulation = simulate_bankroll(p, decimal, stakes)
+        return {
+            "stakes": [
+                {"bet": leg["bet"], "game": leg["game"], "book": leg["book"], "odds": leg["odds"],
+                 "stake_pct": round(float(stake) * 100, 2)}
+                for leg, stake in zip(legs, stakes) if stake > 0
+            ],
+            "max_exposure": f"{stakes.sum() * 100:.1f}% of bankroll across all bets",
+            "single_bet_max": f"{stakes.max() * 100:.1f}% of bankroll",
+            "stop_loss": f"Cease betting if down {-simulation['worst_day']['p50'] * 100:.1f}% on day",
+            "risk_of_ruin": f"{simulation['risk_of_ruin'] * 100:.2f}% chance of losing "
+                            f"{(1 - simulation['ruin_level']) * 100:.0f}% over {simulation['days']} slates",
+            "simulation": simulation,
         }
 
     async def _late_breaking_intelligence(self) -> Dict:
@@ -1,15 +1,15 @@
 import httpx
 import os
 from bs4 import BeautifulSoup
-from supabase import Client
+from db import AsyncDatabase as Client
 from datetime import datetime
 import asyncio
-import anyio
 import re
 import logging
 
 # Import our advanced anti-bot scraper
 from anti_bot_scraper import BasketballReferenceScraper, scrape_nba_teams, scrape_bulls_players
+from odds_stream import odds_broadcaster
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -35,11 +35,9 @@ async def save_teams(supabase: Client, teams: list):
 
     for team in teams:
         try:
-            await anyio.to_thread.run_sync(
-                lambda t=team: supabase.table("teams").upsert(
-                    [t], on_conflict="abbreviation"
-                ).execute()
-            )
+            await supabase.table("teams").upsert(
+                [team], on_conflict="abbreviation"
+            ).execute()
         except Exception as e:
             print(f"Error saving team {team.get('abbreviation')}: {e}")
 
@@ -81,12 +79,11 @@ async def process_odds_data(supabase: Client, odds_data: dict):
                 "away_team": away_team,
             }
 
-            await anyio.to_thread.run_sync(
-                lambda g=game_data: supabase.table("games").upsert(
-                    [g], on_conflict="id"
-                ).execute()
-            )
+            await supabase.table("games").upsert(
+                [game_data], on_conflict="id"
+            ).execute()
 
+            event_records = []
             bookmakers = event.get("bookmakers", [])
             for bookmaker in bookmakers:
                 odds_records = []
@@ -139,18 +136,51 @@ async def process_odds_data(supabase: Client, odds_data: dict):
                 if odds_records:
                     for record in odds_records:
                         try:
-                            await anyio.to_thread.run_sync(
-                                lambda r=record: supabase.table("odds").upsert(
-                                    [r], on_conflict="id"
-                                ).execute()
-                            )
+                            await supabase.table("odds").upsert(
+                                [record], on_conflict="id"
+                            ).execute()
                         except Exception as e:
                             print(f"Error saving odds record: {e}")
+                    event_records.extend(odds_records)
+
+            # Push changed lines to SSE/WebSocket subscribers
+            odds_broadcaster.publish(event_records)
 
         except Exception as e:
             print(f"Error processing event {event.get('id')}: {e}")
 
 
+async def get_nba_scores(days_from: int = 3):
+    """Fetch recent final scores from The Odds API"""
+    api_key = os.getenv("ODDS_API_KEY", "345c1ad37d7b391ec285a93579e7fe80")
+
+    async with httpx.AsyncClient() as client:
+        url = "https://api.the-odds-api.com/v4/sports/basketball_nba/scores"
+        params = {"apiKey": api_key, "daysFrom": days_from}
+
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+        return response.json()
+
+
+async def process_scores_data(supabase: Client, scores_data: list):
+    """Write final scores onto the games table"""
+    for event in scores_data or []:
+        if not event.get("completed"):
+            continue
+        scores = {s.get("name"): s.get("score") for s in event.get("scores") or []}
+        try:
+            await supabase.table("games").update({
+                "home_score": int(scores[event.get("home_team")]),
+                "away_score": int(scores[event.get("away_team")]),
+                "completed": True,
+            }).eq("id", event.get("id")).execute()
+        except (KeyError, TypeError, ValueError):
+            print(f"Incomplete scores for game {event.get('id')}")
+        except Exception as e:
+            print(f"Error saving scores for game {event.get('id')}: {e}")
+
+
 async def scrape_all_data(supabase: Client):
     """Main function to scrape all data"""
     try:
@@ -279,10 +309,10 @@ async def get_team_roster(team_abbrev: str, season: str = "2025"):
         return players
 
 
-async def save_players(supabase: Client, players: list):
-    """Save players to Supabase database"""
+async def save_players(supabase: Client, players: list) -> int:
+    """Save players to Supabase database; returns the number of rows written"""
     if not players:
-        return
+        return 0
         
     success_count = 0
     error_count = 0
@@ -290,8 +320,8 @@ async def save_players(supabase: Client, players: list):
     for player in players:
         try:
             # First, get team_id from teams table
-            team_result = await anyio.to_thread.run_sync(
-                lambda: supabase.table("teams")
+            team_result = await (
+                supabase.table("teams")
                 .select("id")
                 .eq("abbreviation", player["team_abbreviation"])
                 .execute()
@@ -304,11 +334,9 @@ async def save_players(supabase: Client, players: list):
                 player["team_id"] = None
             
             # Upsert player data
-            await anyio.to_thread.run_sync(
-                lambda p=player: supabase.table("players").upsert(
-                    [p], on_conflict="name,team_abbreviation,season_year"
-                ).execute()
-            )
+            await supabase.table("players").upsert(
+                [player], on_conflict="name,team_abbreviation,season_year"
+            ).execute()
             success_count += 1
             
         except Exception as e:
@@ -316,24 +344,31 @@ async def save_players(supabase: Client, players: list):
             error_count += 1
             
     print(f"Players saved: {success_count} success, {error_count} errors")
+    return success_count
+
 
+async def scrape_all_team_rosters(supabase: Client, season: str = "2025", progress=None):
+    """Scrape rosters for all teams
 
-async def scrape_all_team_rosters(supabase: Client, season: str = "2025"):
-    """Scrape rosters for all teams"""
+    ``progress(current, total, rows, team)`` is called after each team,
+    with ``rows`` the player rows written so far. Returns a summary of teams
+    scraped, players scraped, rows written and failed teams; failures
+    outside a single team (e.g. reading the teams table) are raised.
+    """
+    summary = {"season": season, "teams": 0, "players": 0, "rows_written": 0, "failed_teams": []}
     try:
         print(f"[{datetime.now().isoformat()}] Starting roster scrape for season {season}...")
         
         # Get all teams from database
-        teams_result = await anyio.to_thread.run_sync(
-            lambda: supabase.table("teams").select("abbreviation").execute()
-        )
+        teams_result = await supabase.table("teams").select("abbreviation").execute()
         
         if not teams_result.data:
             print("No teams found in database. Please scrape teams first.")
-            return
+            return summary
             
         total_teams = len(teams_result.data)
         total_players = 0
+        rows_written = 0
         
         for i, team in enumerate(teams_result.data, 1):
             team_abbrev = team["abbreviation"]
@@ -341,20 +376,28 @@ async def scrape_all_team_rosters(supabase: Client, season: str = "2025"):
             
             try:
                 players = await get_team_roster(team_abbrev, season)
-                await save_players(supabase, players)
+                rows_written += await save_players(supabase, players)
                 total_players += len(players)
-                
-                # Small delay to be respectful to Basketball-Reference
-                await asyncio.sleep(1)
-                
+                summary["teams"] += 1
             except Exception as e:
                 print(f"Error scraping roster for {team_abbrev}: {e}")
-                continue
+                summary["failed_teams"].append(team_abbrev)
+            
+            summary["players"] = total_players
+            summary["rows_written"] = rows_written
+            if progress:
+                progress(i, total_teams, rows_written, team_abbrev)
+            
+            if i < total_teams:
+                # Small delay to be respectful to Basketball-Reference
+                await asyncio.sleep(1)
                 
         print(f"[{datetime.now().isoformat()}] Roster scrape completed: {total_players} players from {total_teams} teams")
         
     except Exception as e:
         print(f"Error during roster scrape: {e}")
+        raise
+    return summary
 
 
 async def get_bulls_players_data():
@@ -381,11 +424,9 @@ async def save_bulls_players(supabase: Client, players: list):
             player['team_abbreviation'] = 'CHI'
             
             # Save to players table
-            result = await anyio.to_thread.run_sync(
-                lambda p=player: supabase.table("players").upsert(
-                    [p], on_conflict="name,team_abbreviation"
-                ).execute()
-            )
+            result = await supabase.table("players").upsert(
+                [player], on_conflict="name,team_abbreviation"
+            ).execute()
             logger.debug(f"Saved player: {player.get('name')}")
         
         logger.info(f"Successfully saved {len(players)} Bulls players to database")
@@ -407,6 +448,10 @@ async def scrape_all_data(supabase: Client, include_rosters: bool = True):
         odds_data = await get_nba_odds()
         print(f"Fetched odds for {len(odds_data.get('events', []))} games")
         await process_odds_data(supabase, odds_data)
+
+        # Final scores feed the team analytics
+        scores_data = await get_nba_scores()
+        await process_scores_data(supabase, scores_data)
         
         # Scrape rosters if requested
         if include_rosters:
@@ -1,24 +1,24 @@
 """
 Isolated Supabase client to avoid httpx conflicts
 """
+import importlib.util
 import os
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-try:
-    # Import before any httpx-modifying libraries
-    from supabase import create_client, Client
-    SUPABASE_AVAILABLE = True
-except ImportError as e:
-    print(f"Supabase not available: {e}")
-    SUPABASE_AVAILABLE = False
-    Client = None
+if TYPE_CHECKING:
+    from supabase import Client
 
-def create_isolated_supabase_client(url: str, key: str) -> Optional[Client]:
+# supabase-py (postgrest, realtime, storage, gotrue) is only imported when a
+# client is actually created; the API itself talks to PostgREST through db.py
+SUPABASE_AVAILABLE = importlib.util.find_spec("supabase") is not None
+
+def create_isolated_supabase_client(url: str, key: str) -> Optional["Client"]:
     """Create supabase client in isolated environment"""
     if not SUPABASE_AVAILABLE:
         return None
     
     try:
+        from supabase import create_client
         return create_client(url, key)
     except Exception as e:
         print(f"Failed to create supabase client: {e}")
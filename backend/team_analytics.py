@@ -0,0 +1,581 @@
+"""
+Materialized per-team season analytics
+Records, recent form, ATS / over-under trends and score-based ratings are
+computed for all teams in one vectorized pass over the season's games and
+the consensus of each book's latest line, after each ingest. The result is kept in memory, persisted
+to the ``team_analytics`` table and served as a cached read.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from db import fetch_all
+from metrics import run_sync
+
+# numpy is imported when analytics are first computed or loaded, not at API startup
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CONFERENCES = {
+    "Eastern": ("ATL", "BOS", "BKN", "CHA", "CHI", "CLE", "DET", "IND", "MIA", "MIL", "NYK", "ORL", "PHI", "TOR", "WAS"),
+    "Western": ("DAL", "DEN", "GSW", "HOU", "LAC", "LAL", "MEM", "MIN", "NOP", "OKC", "PHX", "POR", "SAC", "SAS", "UTA"),
+}
+
+DIVISIONS = {
+    "Atlantic": ("BOS", "BKN", "NYK", "PHI", "TOR"),
+    "Central": ("CHI", "CLE", "DET", "IND", "MIL"),
+    "Southeast": ("ATL", "CHA", "MIA", "ORL", "WAS"),
+    "Northwest": ("DEN", "MIN", "OKC", "POR", "UTA"),
+    "Pacific": ("GSW", "LAC", "LAL", "PHX", "SAC"),
+    "Southwest": ("DAL", "HOU", "MEM", "NOP", "SAS"),
+}
+
+# abbreviation -> (conference, division), built once
+TEAM_ALIGNMENT: Mapping[str, Tuple[str, str]] = {
+    abbrev: (conference, division)
+    for conference, members in CONFERENCES.items()
+    for division, division_members in DIVISIONS.items()
+    for abbrev in members if abbrev in division_members
+}
+
+ANALYTICS_TABLE = "team_analytics"
+GAME_COLUMNS = "id,commence_time,home_team,away_team,home_score,away_score"
+LINE_COLUMNS = "game_id,bookmaker_key,market_type,team,outcome_name,point,price,last_update,updated_at"
+# Game ids per odds request, keeping the in.(...) filter well under URL limits
+GAME_ID_CHUNK = 150
+RECENT_GAMES = 5
+
+# Columns of the per-team feature matrix used for comparisons
+FEATURES = (
+    ("wins", "season_stats"),
+    ("losses", "season_stats"),
+    ("win_percentage", "season_stats"),
+    ("points_per_game", "season_stats"),
+    ("points_allowed", "season_stats"),
+    ("net_rating", "season_stats"),
+    ("ats_percentage", "betting_stats"),
+    ("ou_percentage", "betting_stats"),
+    ("avg_total", "betting_stats"),
+    ("market_win_probability", "betting_stats"),
+    ("strength_rating", None),
+)
+FEATURE_NAMES = tuple(name for name, _ in FEATURES)
+LOWER_IS_BETTER = frozenset({"losses", "points_allowed"})
+
+
+def season_start(now: Optional[datetime] = None) -> datetime:
+    """First day of the current NBA season (seasons start in October)"""
+    now = now or datetime.now(timezone.utc)
+    year = now.year if now.month >= 8 else now.year - 1
+    return datetime(year, 10, 1, tzinfo=timezone.utc)
+
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value) if value is not None else float("nan")
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _record(wins: int, losses: int) -> str:
+    return f"{int(wins)}-{int(losses)}"
+
+
+def _ratio(numerator: float, denominator: float, digits: int = 3) -> float:
+    return round(float(numerator) / float(denominator), digits) if denominator else 0.0
+
+
+class _TeamResolver:
+    """Maps game team names ("Chicago Bulls", "LA Clippers") to team indexes"""
+
+    def __init__(self, teams: Sequence[Dict]):
+        self.by_name: Dict[str, int] = {}
+        self.nicknames: List[Tuple[str, int]] = []
+        for i, team in enumerate(teams):
+            for key in (team.get("full_name"), team.get("abbreviation")):
+                if key:
+                    self.by_name[key.lower()] = i
+            if team.get("name"):
+                self.nicknames.append((team["name"].lower(), i))
+        self.cache: Dict[str, int] = {}
+
+    def __call__(self, name: Optional[str]) -> int:
+        key = (name or "").lower()
+        if key not in self.cache:
+            index = self.by_name.get(key, -1)
+            if index < 0:
+                index = next((i for nick, i in self.nicknames if key.endswith(nick)), -1)
+            self.cache[key] = index
+        return self.cache[key]
+
+
+def latest_lines(lines: Sequence[Dict]) -> List[Dict]:
+    """Keep each book's most recent line per game, market and outcome
+
+    The odds table is append-only, so older snapshots of the same line are
+    dropped before averaging; the closing line is what bets are graded on.
+    """
+    latest: Dict[Tuple, Dict] = {}
+    for row in lines:
+        market = row.get("market_type")
+        outcome = row.get("outcome_name") if market == "totals" else row.get("team")
+        key = (row.get("game_id"), row.get("bookmaker_key"), market, outcome)
+        stamp = str(row.get("last_update") or row.get("updated_at") or "")
+        current = latest.get(key)
+        if current is None or stamp >= current[0]:
+            latest[key] = (stamp, row)
+    return [row for _, row in latest.values()]
+
+
+def consensus_lines(lines: Sequence[Dict], games: Sequence[Dict]) -> Dict[str, "np.ndarray"]:
+    """Per-game consensus home spread, total and de-vigged home win probability"""
+    import numpy as np
+
+    n = len(games)
+    position = {g.get("id"): i for i, g in enumerate(games)}
+    home_names = [g.get("home_team") for g in games]
+
+    game_idx = np.fromiter((position.get(r.get("game_id"), -1) for r in lines), dtype=np.int64, count=len(lines))
+    market = np.array([r.get("market_type") for r in lines], dtype=object)
+    point = np.fromiter((_float(r.get("point")) for r in lines), dtype=float, count=len(lines))
+    price = np.fromiter((_float(r.get("price")) for r in lines), dtype=float, count=len(lines))
+    is_home = np.fromiter(
+        (g >= 0 and r.get("team") == home_names[g] for r, g in zip(lines, game_idx)),
+        dtype=bool, count=len(lines),
+    )
+    is_over = np.fromiter(
+        ((r.get("outcome_name") or "").lower() == "over" for r in lines), dtype=bool, count=len(lines)
+    )
+    known = game_idx >= 0
+
+    def mean_by_game(mask: "np.ndarray", values: "np.ndarray") -> "np.ndarray":
+        mask = mask & known & ~np.isnan(values)
+        totals = np.bincount(game_idx[mask], weights=values[mask], minlength=n)
+        counts = np.bincount(game_idx[mask], minlength=n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+
+    spread = market == "spread"
+    h2h = (market == "h2h") & (price > 1)
+    home_implied = mean_by_game(h2h & is_home, 1.0 / np.where(price > 0, price, np.nan))
+    away_implied = mean_by_game(h2h & ~is_home, 1.0 / np.where(price > 0, price, np.nan))
+
+    return {
+        # Away-side spread rows are flipped onto the home team's line
+        "spread": mean_by_game(spread, np.where(is_home, point, -point)),
+        "total": mean_by_game((market == "totals") & is_over, point),
+        "home_prob": home_implied / (home_implied + away_implied),
+    }
+
+
+def compute_team_analytics(teams: Sequence[Dict], games: Sequence[Dict], lines: Sequence[Dict],
+                           players: Optional[Mapping[str, Sequence[Dict]]] = None,
+                           computed_at: Optional[float] = None) -> List[Dict]:
+    """Season, recent-form and betting-trend aggregates for every team
+
+    ``games`` may be missing scores (upcoming games); those count towards
+    line averages and market strength but not towards records. Ratings are
+    score-based (points for/against per game) since possessions are not
+    ingested.
+    """
+    import numpy as np
+
+    computed_at = computed_at if computed_at is not None else time.time()
+    teams = sorted(teams, key=lambda t: t.get("abbreviation") or "")
+    n_teams = len(teams)
+    resolve = _TeamResolver(teams)
+
+    home = np.fromiter((resolve(g.get("home_team")) for g in games), dtype=np.int64, count=len(games))
+    away = np.fromiter((resolve(g.get("away_team")) for g in games), dtype=np.int64, count=len(games))
+    keep = (home >= 0) & (away >= 0)
+    games = [g for g, k in zip(games, keep) if k]
+    home, away = home[keep], away[keep]
+    n = len(games)
+
+    ts = np.fromiter((_timestamp(g.get("commence_time")) for g in games), dtype=float, count=n)
+    home_score = np.fromiter((_float(g.get("home_score")) for g in games), dtype=float, count=n)
+    away_score = np.fromiter((_float(g.get("away_score")) for g in games), dtype=float, count=n)
+    consensus = consensus_lines(latest_lines(lines), games)
+
+    # One row per (team, game): home rows first, then away rows
+    team = np.concatenate([home, away])
+    opp = np.concatenate([away, home])
+    at_home = np.concatenate([np.ones(n, bool), np.zeros(n, bool)])
+    pf = np.concatenate([home_score, away_score])
+    pa = np.concatenate([away_score, home_score])
+    line = np.concatenate([consensus["spread"], -consensus["spread"]])
+    total = np.tile(consensus["total"], 2)
+    prob = np.concatenate([consensus["home_prob"], 1 - consensus["home_prob"]])
+    when = np.tile(ts, 2)
+    game_row = np.tile(np.arange(n), 2)
+
+    played = ~np.isnan(pf) & ~np.isnan(pa)
+    margin = pf - pa
+    win = played & (margin > 0)
+    loss = played & (margin < 0)
+    has_line = played & ~np.isnan(line)
+    cover = has_line & (margin + line > 0)
+    no_cover = has_line & (margin + line < 0)
+    has_total = played & ~np.isnan(total)
+    over = has_total & (pf + pa > total)
+    under = has_total & (pf + pa < total)
+
+    conference_of = np.array([TEAM_ALIGNMENT.get(t.get("abbreviation"), ("", ""))[0] for t in teams] or [""], dtype=object)
+    same_conference = (conference_of[team] == conference_of[opp]) if n else np.zeros(0, bool)
+
+    # Rank of each played game within its team, most recent first
+    order = np.lexsort((-when, ~played, team))
+    sorted_team = team[order]
+    rank = np.empty(2 * n, dtype=np.int64)
+    rank[order] = np.arange(2 * n) - np.searchsorted(sorted_team, sorted_team, side="left")
+    last10 = played & (rank < 10)
+    last5 = played & (rank < 5)
+
+    def count(mask: "np.ndarray") -> "np.ndarray":
+        return np.bincount(team[mask], minlength=n_teams)
+
+    def total_of(values: "np.ndarray", mask: "np.ndarray") -> "np.ndarray":
+        return np.bincount(team[mask], weights=values[mask], minlength=n_teams)
+
+    wins, losses = count(win), count(loss)
+    gp = count(played)
+    points_for, points_against = total_of(pf, played), total_of(pa, played)
+    covers, non_covers = count(cover), count(no_cover)
+    overs, unders = count(over), count(under)
+    line_games = ~np.isnan(total)
+    total_sum, total_count = total_of(total, line_games), count(line_games)
+    priced = ~np.isnan(prob)
+    prob_sum, prob_count = total_of(prob, priced), count(priced)
+
+    home_wins, home_losses = count(win & at_home), count(loss & at_home)
+    away_wins, away_losses = count(win & ~at_home), count(loss & ~at_home)
+    conf_wins, conf_losses = count(win & same_conference), count(loss & same_conference)
+    l10_wins, l10_losses = count(win & last10), count(loss & last10)
+    l5_wins, l5_losses = count(win & last5), count(loss & last5)
+    ats_home = (count(cover & at_home), count(no_cover & at_home))
+    ats_away = (count(cover & ~at_home), count(no_cover & ~at_home))
+    ou_home = (count(over & at_home), count(under & at_home))
+
+    recent_rows = np.flatnonzero(played & (rank < RECENT_GAMES))
+    recent_rows = recent_rows[np.lexsort((rank[recent_rows], team[recent_rows]))]
+    recent: Dict[int, List[Dict]] = {}
+    for row in recent_rows:
+        g = games[game_row[row]]
+        team_score, opp_score = int(pf[row]), int(pa[row])
+        recent.setdefault(int(team[row]), []).append({
+            "game_id": g.get("id"),
+            "date": datetime.fromtimestamp(when[row], timezone.utc).strftime("%Y-%m-%d"),
+            "opponent": teams[opp[row]].get("abbreviation"),
+            "home": bool(at_home[row]),
+            "team_score": team_score,
+            "opponent_score": opp_score,
+            "result": "W" if team_score > opp_score else "L",
+            "margin": abs(team_score - opp_score),
+        })
+
+    updated = datetime.fromtimestamp(computed_at, timezone.utc).isoformat()
+    results = []
+    for i, team_row in enumerate(teams):
+        abbrev = team_row.get("abbreviation")
+        conference, division = TEAM_ALIGNMENT.get(abbrev, ("Unknown", "Unknown"))
+        ppg = _ratio(points_for[i], gp[i], 1)
+        papg = _ratio(points_against[i], gp[i], 1)
+        ats_decided = covers[i] + non_covers[i]
+        ou_decided = overs[i] + unders[i]
+        market_strength = prob_sum[i] / prob_count[i] if prob_count[i] else None
+        win_pct = _ratio(wins[i], wins[i] + losses[i])
+        strength = market_strength if market_strength is not None else (win_pct if gp[i] else 0.5)
+        # Most experienced active players; no per-player stats are ingested
+        roster = sorted(
+            (p for p in (players or {}).get(abbrev, ()) if p.get("is_active", True)),
+            key=lambda p: -(p.get("experience") or 0),
+        )[:3]
+
+        results.append({
+            **team_row,
+            "conference": conference,
+            "division": division,
+            "season_stats": {
+                "games_played": int(gp[i]),
+                "wins": int(wins[i]),
+                "losses": int(losses[i]),
+                "win_percentage": win_pct,
+                "points_per_game": ppg,
+                "points_allowed": papg,
+                "offensive_rating": ppg,
+                "defensive_rating": papg,
+                "net_rating": round(ppg - papg, 1),
+            },
+            "recent_form": {
+                "last_10": _record(l10_wins[i], l10_losses[i]),
+                "last_5": _record(l5_wins[i], l5_losses[i]),
+                "home_record": _record(home_wins[i], home_losses[i]),
+                "away_record": _record(away_wins[i], away_losses[i]),
+                "vs_conference": _record(conf_wins[i], conf_losses[i]),
+            },
+            "betting_stats": {
+                "ats_record": _record(covers[i], non_covers[i]),
+                "ats_percentage": _ratio(covers[i], ats_decided),
+                "ats_home": _record(*(side[i] for side in ats_home)),
+                "ats_away": _record(*(side[i] for side in ats_away)),
+                "over_under": _record(overs[i], unders[i]),
+                "ou_percentage": _ratio(overs[i], ou_decided),
+                "over_under_home": _record(*(side[i] for side in ou_home)),
+                "avg_total": _ratio(total_sum[i], total_count[i], 1),
+                "market_win_probability": round(market_strength, 3) if market_strength is not None else None,
+            },
+            "recent_games": recent.get(i, []),
+            "key_players": [p.get("name") for p in roster],
+            "strength_rating": int(round(100 * strength)),
+            "last_updated": updated,
+        })
+    return results
+
+
+def summary_view(row: Dict) -> Dict:
+    """List-endpoint view of a team row (without per-game detail)"""
+    return {k: v for k, v in row.items() if k != "recent_games"}
+
+
+def detail_view(row: Dict) -> Dict:
+    """Single-team view in the shape of /api/teams/{abbrev}/analysis"""
+    season = row["season_stats"]
+    betting = row["betting_stats"]
+    form = row["recent_form"]
+    return {
+        **summary_view(row),
+        "season_record": {k: season[k] for k in ("wins", "losses", "win_percentage")},
+        "advanced_stats": {k: season[k] for k in ("offensive_rating", "defensive_rating", "net_rating")},
+        "recent_games": row["recent_games"],
+        "form_analysis": {
+            "last_10_games": form["last_10"],
+            "home_form": form["home_record"],
+            "away_form": form["away_record"],
+        },
+        "betting_trends": {k: betting[k] for k in ("ats_home", "ats_away", "over_under_home")},
+    }
+
+
+def _feature(row: Dict, name: str, section: Optional[str]) -> float:
+    return _float((row.get(section) or {}).get(name) if section else row.get(name))
+
+
+def _cell(value: float, digits: int = 3) -> Optional[float]:
+    return None if math.isnan(value) else round(float(value), digits)
+
+
+class TeamAnalyticsSnapshot:
+    """Immutable set of materialized team rows plus a team x feature matrix"""
+
+    __slots__ = ("teams", "by_abbrev", "positions", "features", "ranks", "computed_at", "source")
+
+    def __init__(self, rows: Sequence[Dict], computed_at: Optional[float] = None, source: str = "computed"):
+        import numpy as np
+
+        self.teams: Tuple[Dict, ...] = tuple(sorted(rows, key=lambda r: r.get("abbreviation") or ""))
+        self.by_abbrev: Mapping[str, Dict] = {r["abbreviation"].upper(): r for r in self.teams if r.get("abbreviation")}
+        self.positions: Mapping[str, int] = {
+            (r.get("abbreviation") or "").upper(): i for i, r in enumerate(self.teams)
+        }
+        self.features = np.array(
+            [[_feature(r, name, section) for name, section in FEATURES] for r in self.teams],
+            dtype=float,
+        ).reshape(len(self.teams), len(FEATURES))
+
+        # League rank per feature (1 = best); missing values rank last
+        direction = np.array([1.0 if name in LOWER_IS_BETTER else -1.0 for name in FEATURE_NAMES])
+        keyed = np.where(np.isnan(self.features), np.inf, self.features * direction)
+        self.ranks = np.empty_like(keyed, dtype=np.int64)
+        order = np.argsort(keyed, axis=0, kind="stable")
+        np.put_along_axis(self.ranks, order, np.arange(1, len(self.teams) + 1)[:, None], axis=0)
+
+        self.computed_at = computed_at if computed_at is not None else time.time()
+        self.source = source
+
+    def team(self, abbrev: str) -> Optional[Dict]:
+        return self.by_abbrev.get(abbrev.upper())
+
+    def compare(self, abbrevs: Sequence[str]) -> Dict[str, Any]:
+        """Side-by-side metrics, league ranks and deltas against the first team"""
+        import numpy as np
+
+        missing = [a for a in abbrevs if a.upper() not in self.positions]
+        if missing:
+            raise KeyError(", ".join(missing))
+        idx = np.array([self.positions[a.upper()] for a in abbrevs], dtype=np.int64)
+        matrix = self.features[idx]
+        ranks = self.ranks[idx]
+        deltas = matrix - matrix[0]
+
+        # Leader per feature within the compared subset
+        direction = np.array([1.0 if name in LOWER_IS_BETTER else -1.0 for name in FEATURE_NAMES])
+        keyed = np.where(np.isnan(matrix), np.inf, matrix * direction)
+        best = np.argmin(keyed, axis=0)
+        has_value = ~np.all(np.isnan(matrix), axis=0)
+
+        teams = []
+        for row, i in enumerate(idx):
+            team = self.teams[i]
+            teams.append({
+                "abbreviation": team.get("abbreviation"),
+                "full_name": team.get("full_name"),
+                "conference": team.get("conference"),
+                "division": team.get("division"),
+                "metrics": {name: _cell(matrix[row, j]) for j, name in enumerate(FEATURE_NAMES)},
+                "league_rank": {name: int(ranks[row, j]) for j, name in enumerate(FEATURE_NAMES)},
+            })
+        baseline = teams[0]["abbreviation"]
+        return {
+            "features": list(FEATURE_NAMES),
+            "baseline": baseline,
+            "teams": teams,
+            "deltas": {
+                teams[row]["abbreviation"]: {name: _cell(deltas[row, j]) for j, name in enumerate(FEATURE_NAMES)}
+                for row in range(1, len(teams))
+            },
+            "leaders": {
+                name: teams[int(best[j])]["abbreviation"] if has_value[j] else None
+                for j, name in enumerate(FEATURE_NAMES)
+            },
+            "computed_at": datetime.fromtimestamp(self.computed_at, timezone.utc).isoformat(),
+        }
+
+    def listing(self) -> Dict[str, Any]:
+        teams = [summary_view(r) for r in self.teams]
+        return {
+            "teams": teams,
+            "count": len(teams),
+            "conferences": {
+                conference: [t for t in teams if t["conference"] == conference]
+                for conference in CONFERENCES
+            },
+            "computed_at": datetime.fromtimestamp(self.computed_at, timezone.utc).isoformat(),
+        }
+
+
+class TeamAnalyticsStore:
+    """Holds the current analytics snapshot; refreshed after each ingest"""
+
+    def __init__(self):
+        self.snapshot: Optional[TeamAnalyticsSnapshot] = None
+        self.last_error: Optional[str] = None
+        self.last_duration: Optional[float] = None
+        self._first_load = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.snapshot is not None
+
+    def replace(self, snapshot: TeamAnalyticsSnapshot):
+        self.snapshot = snapshot
+
+    async def refresh(self, supabase, teams: Sequence[Dict],
+                      players: Optional[Mapping[str, Sequence[Dict]]] = None) -> Optional[TeamAnalyticsSnapshot]:
+        """Recompute from the season's games and lines and persist the result"""
+        if not supabase or not teams:
+            return self.snapshot
+        started = time.perf_counter()
+        since = season_start().isoformat()
+        try:
+            games = await fetch_all(lambda: supabase.table("games").select(GAME_COLUMNS)
+                                    .gte("commence_time", since).order("commence_time").order("id"))
+            lines = await self.fetch_season_lines(supabase, [g["id"] for g in games if g.get("id")])
+            computed_at = time.time()
+            rows = await run_sync(compute_team_analytics, teams, games, lines, players, computed_at)
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Team analytics refresh failed, serving previous snapshot: {e}")
+            return self.snapshot
+
+        snapshot = TeamAnalyticsSnapshot(rows, computed_at)
+        self.replace(snapshot)
+        self.last_error = None
+        self.last_duration = time.perf_counter() - started
+        await self.save(supabase, snapshot)
+        logger.info(f"Team analytics materialized for {len(rows)} teams in {self.last_duration:.2f}s")
+        return snapshot
+
+    async def ensure(self, supabase, teams: Optional[Sequence[Dict]] = None,
+                     players: Optional[Mapping[str, Sequence[Dict]]] = None) -> Optional[TeamAnalyticsSnapshot]:
+        """First use: load the materialized rows, computing them only if ``teams`` is given
+
+        Single-flight, so a burst of requests on a cold process triggers one
+        load (and at most one refresh) rather than one per request.
+        """
+        async with self._first_load:
+            if self.snapshot is None and await self.load(supabase) is None and teams:
+                await self.refresh(supabase, teams, players)
+        return self.snapshot
+
+    async def fetch_season_lines(self, supabase, game_ids: Sequence[str]) -> List[Dict]:
+        """Lines for this season's games only, not the whole odds history"""
+        chunks = [game_ids[i:i + GAME_ID_CHUNK] for i in range(0, len(game_ids), GAME_ID_CHUNK)]
+
+        def query(chunk):
+            return lambda: (
+                supabase.table("odds").select(LINE_COLUMNS)
+                .in_("game_id", chunk).in_("market_type", ["h2h", "spread", "totals"])
+                .order("game_id").order("id")
+            )
+
+        pages = await asyncio.gather(*(fetch_all(query(chunk)) for chunk in chunks))
+        return [row for page in pages for row in page]
+
+    async def save(self, supabase, snapshot: TeamAnalyticsSnapshot):
+        """Upsert the materialized rows so other workers can read them"""
+        computed = datetime.fromtimestamp(snapshot.computed_at, timezone.utc).isoformat()
+        records = [
+            {"abbreviation": r["abbreviation"], "season": season_start().year, "data": r, "computed_at": computed}
+            for r in snapshot.teams
+        ]
+        try:
+            await supabase.table(ANALYTICS_TABLE).upsert(records, on_conflict="abbreviation").execute()
+        except Exception as e:
+            logger.warning(f"Failed to persist team analytics: {e}")
+
+    async def load(self, supabase) -> Optional[TeamAnalyticsSnapshot]:
+        """Load the last materialized rows from the database"""
+        if not supabase:
+            return self.snapshot
+        try:
+            response = await supabase.table(ANALYTICS_TABLE).select("data,computed_at").execute()
+        except Exception as e:
+            logger.warning(f"Failed to load team analytics: {e}")
+            return self.snapshot
+        if response.data:
+            computed_at = max(_timestamp(r.get("computed_at")) for r in response.data)
+            self.replace(TeamAnalyticsSnapshot(
+                [r["data"] for r in response.data],
+                computed_at if not math.isnan(computed_at) else None, source="database",
+            ))
+        return self.snapshot
+
+    def status(self) -> Dict[str, Any]:
+        snapshot = self.snapshot
+        return {
+            "loaded": snapshot is not None,
+            "source": snapshot.source if snapshot else None,
+            "teams": len(snapshot.teams) if snapshot else 0,
+            "age_seconds": round(max(0.0, time.time() - snapshot.computed_at), 1) if snapshot else None,
+            "last_duration_seconds": round(self.last_duration, 3) if self.last_duration is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+# Process-wide store, refreshed after each ingest
+team_analytics_store = TeamAnalyticsStore()
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import time
+
+import anyio
+import httpx
+import pytest
+
+from backend.db import AsyncDatabase, DatabaseError, fetch_all
+
+
+def make_db(handler, **kwargs):
+    """Create a database client backed by an in-process mock transport"""
+    kwargs.setdefault("retry_backoff", 0)
+    return AsyncDatabase(
+        "https://example.supabase.co", "service-key",
+        transport=httpx.MockTransport(handler), **kwargs
+    )
+
+
+class TestQueryBuilder:
+    """Test PostgREST request construction"""
+
+    @pytest.mark.asyncio
+    async def test_select_filters_and_order(self):
+        """Test filters, ordering and limit map to PostgREST params"""
+        seen = {}
+
+        def handler(request):
+            seen["url"] = request.url
+            seen["headers"] = request.headers
+            return httpx.Response(200, json=[{"id": 1}])
+
+        db = make_db(handler)
+        response = await (
+            db.table("players")
+            .select("id, name,\n team_abbreviation")
+            .eq("is_active", True)
+            .ilike("name", "%vuc%")
+            .in_("team_abbreviation", ["CHI", "BOS"])
+            .order("team_abbreviation")
+            .order("jersey_number", nullsfirst=False)
+            .limit(51)
+            .execute()
+        )
+        await db.aclose()
+
+        assert response.data == [{"id": 1}]
+        params = seen["url"].params
+        assert seen["url"].path == "/rest/v1/players"
+        assert params["select"] == "id,name,team_abbreviation"
+        assert params["is_active"] == "eq.true"
+        assert params["name"] == "ilike.%vuc%"
+        assert params["team_abbreviation"] == "in.(CHI,BOS)"
+        assert params["order"] == "team_abbreviation.asc,jersey_number.asc.nullslast"
+        assert params["limit"] == "51"
+        assert seen["headers"]["apikey"] == "service-key"
+
+    @pytest.mark.asyncio
+    async def test_upsert(self):
+        """Test upsert sends merge-duplicates with on_conflict"""
+        seen = {}
+
+        def handler(request):
+            seen["request"] = request
+            return httpx.Response(201, json=json.loads(request.content))
+
+        db = make_db(handler)
+        response = await db.table("teams").upsert([{"abbreviation": "CHI"}], on_conflict="abbreviation").execute()
+        await db.aclose()
+
+        request = seen["request"]
+        assert request.method == "POST"
+        assert request.url.params["on_conflict"] == "abbreviation"
+        assert "resolution=merge-duplicates" in request.headers["prefer"]
+        assert response.data == [{"abbreviation": "CHI"}]
+
+    @pytest.mark.asyncio
+    async def test_single_returns_none_when_missing(self):
+        """Test single() maps PostgREST 406 to empty data"""
+        db = make_db(lambda request: httpx.Response(406, json={"message": "0 rows"}))
+        response = await db.table("teams").select("*").eq("abbreviation", "XXX").single().execute()
+        await db.aclose()
+        assert response.data is None
+
+    @pytest.mark.asyncio
+    async def test_fetch_all_pages_past_the_row_cap(self):
+        """Test fetch_all keeps requesting offset pages until a short page"""
+        rows = [{"id": i} for i in range(5)]
+        offsets = []
+
+        def handler(request):
+            offset, limit = int(request.url.params["offset"]), int(request.url.params["limit"])
+            offsets.append(offset)
+            return httpx.Response(200, json=rows[offset:offset + limit])
+
+        db = make_db(handler)
+        fetched = await fetch_all(lambda: db.table("players").select("id").order("id"), page_size=2)
+        await db.aclose()
+        assert fetched == rows
+        assert offsets == [0, 2, 4]
+
+
+class TestRetries:
+    """Test retry and error handling"""
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_errors(self):
+        """Test 503 and transport errors are retried"""
+        calls = {"n": 0}
+
+        def handler(request):
+            calls["n"] += 1
+            if calls["n"] == 1:
+                raise httpx.ConnectError("connection refused", request=request)
+            if calls["n"] == 2:
+                return httpx.Response(503)
+            return httpx.Response(200, json=[])
+
+        db = make_db(handler, retries=2)
+        response = await db.table("games").select("*").execute()
+        await db.aclose()
+        assert response.data == []
+        assert calls["n"] == 3
+
+    @pytest.mark.asyncio
+    async def test_writes_are_not_resent_after_they_may_have_committed(self):
+        """Test inserts are only retried when the request never reached the server"""
+        calls = {"n": 0}
+
+        def handler(request):
+            calls["n"] += 1
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        db = make_db(handler, retries=2)
+        with pytest.raises(httpx.ReadTimeout):
+            await db.table("odds").insert([{"game_id": "g1", "price": 1.9}]).execute()
+        with pytest.raises(httpx.ReadTimeout):
+            await db.table("odds").upsert([{"game_id": "g1", "price": 1.9}]).execute()
+        assert calls["n"] == 2
+
+        # Keyed upserts merge into the first attempt's rows, so they are retried
+        with pytest.raises(httpx.ReadTimeout):
+            await db.table("teams").upsert([{"abbreviation": "CHI"}], on_conflict="abbreviation").execute()
+        await db.aclose()
+        assert calls["n"] == 5
+
+        calls["n"] = 0
+
+        def refused_once(request):
+            calls["n"] += 1
+            if calls["n"] == 1:
+                raise httpx.ConnectError("connection refused", request=request)
+            return httpx.Response(201, json=[])
+
+        db = make_db(refused_once, retries=2)
+        await db.table("odds").insert([{"game_id": "g1"}]).execute()
+        await db.aclose()
+        assert calls["n"] == 2
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self):
+        """Test 4xx errors raise DatabaseError immediately"""
+        calls = {"n": 0}
+
+        def handler(request):
+            calls["n"] += 1
+            return httpx.Response(400, json={"message": "bad filter"})
+
+        db = make_db(handler, retries=2)
+        with pytest.raises(DatabaseError) as exc:
+            await db.table("games").select("*").execute()
+        await db.aclose()
+        assert exc.value.status_code == 400
+        assert calls["n"] == 1
+
+
+class TestLoad:
+    """Load test: concurrent query throughput, async client vs thread offload"""
+
+    LATENCY = 0.05
+    REQUESTS = 400
+
+    @pytest.mark.asyncio
+    async def test_async_client_outperforms_thread_offload(self):
+        """Test async path is not capped by anyio's 40-thread limiter"""
+
+        def blocking_query():
+            # Stand-in for supabase-py's synchronous .execute()
+            time.sleep(self.LATENCY)
+            return []
+
+        async def thread_path():
+            await anyio.to_thread.run_sync(blocking_query)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(thread_path() for _ in range(self.REQUESTS)))
+        thread_elapsed = time.perf_counter() - started
+
+        async def handler(request):
+            await asyncio.sleep(self.LATENCY)
+            return httpx.Response(200, json=[])
+
+        db = make_db(handler)
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            db.table("odds").select("*").eq("game_id", str(i)).execute()
+            for i in range(self.REQUESTS)
+        ))
+        async_elapsed = time.perf_counter() - started
+        await db.aclose()
+
+        thread_rps = self.REQUESTS / thread_elapsed
+        async_rps = self.REQUESTS / async_elapsed
+        throughput = f"thread offload: {thread_rps:.0f} req/s, async client: {async_rps:.0f} req/s"
+
+        # 400 x 50ms through 40 threads needs >= 10 sequential waves (~500ms)
+        assert thread_elapsed >= (self.REQUESTS / 40) * self.LATENCY * 0.9, throughput
+        assert async_rps > 2 * thread_rps, throughput
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s", "-k", "Load"])
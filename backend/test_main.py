@@ -1,8 +1,31 @@
 import pytest
 import asyncio
+import httpx
 from fastapi.testclient import TestClient
-from backend.main import app
+from backend.main import app, player_index, reference_store, team_analytics_store
 from backend.reports import NBAReportGenerator
+from backend.report_sections import Section, SectionGraph, SectionMemo
+from backend.daily_context import DailyContext, DailyContextStore
+from backend import player_queries
+from backend.player_search import PlayerSearchIndex, normalize
+from backend.reference_data import ReferenceSnapshot, ReferenceStore
+from backend.db import AsyncDatabase
+from backend import odds_summary
+from backend.odds_matrix import OddsMatrix
+from backend.arbitrage import ArbitrageScanner
+from backend.kelly import size_bets
+from backend.monte_carlo import MAX_PARLAYS, simulate_bankroll, simulate_parlays
+from backend.odds_stream import HEARTBEAT, OddsBroadcaster
+from backend.leader import FileLease, LeaderElection
+from backend.invalidation import InvalidationBus
+from backend.job_registry import JobRegistry
+from backend.admission import AdmissionGate, Overloaded, parse_limits
+from backend.metrics import Histogram
+from backend.profiler import Profiler, ProfileRequestMiddleware, StackSampler
+from backend.loop_monitor import LoopMonitor
+from backend import jobs, worker
+from backend import team_analytics
+from backend.team_analytics import FEATURE_NAMES, TeamAnalyticsSnapshot, compute_team_analytics
 
 
 @pytest.fixture
@@ -11,6 +34,32 @@ def client():
     return TestClient(app)
 
 
+@pytest.fixture
+def fake_db():
+    """Install an in-memory PostgREST stand-in as app.state.supabase"""
+    tables = {"games": [], "odds": [], "teams": [], "players": []}
+    requests = []
+    
+    def handler(request):
+        table = request.url.path.rsplit("/", 1)[-1]
+        requests.append(request)
+        rows = tables.get(table, [])
+        for column, expression in request.url.params.multi_items():
+            if expression.startswith("in.("):
+                values = set(expression[4:-1].split(","))
+                rows = [r for r in rows if str(r.get(column)) in values]
+            elif expression.startswith("eq."):
+                rows = [r for r in rows if str(r.get(column)) == expression[3:]]
+        return httpx.Response(200, json=rows)
+    
+    previous = getattr(app.state, "supabase", None)
+    app.state.supabase = AsyncDatabase(
+        "https://example.supabase.co", "key", transport=httpx.MockTransport(handler)
+    )
+    yield tables, requests
+    app.state.supabase = previous
+
+
 @pytest.fixture
 def report_generator():
     """Create report generator instance for testing"""
@@ -82,6 +131,180 @@ class TestReportGeneration:
         assert "bulls_form_analysis" in report
         assert "market_intelligence" in report
     
+    @pytest.mark.asyncio
+    async def test_750am_report_loads_slate_odds_once(self, fake_db):
+        """Test odds for every focus game come from a single in_ query"""
+        tables, requests = fake_db
+        tables["games"] = [
+            {"id": f"g{i}", "home_team": "Chicago Bulls", "away_team": f"Team {i}"} for i in range(6)
+        ]
+        tables["odds"] = [
+            {"id": f"o{i}", "game_id": f"g{i}", "market_type": "spread", "point": -2.5, "price": 1.91}
+            for i in range(6)
+        ]
+        
+        report = await NBAReportGenerator(app.state.supabase).generate_750am_report()
+        assert len(report["results_vs_closing"]) == 6
+        odds_requests = [r for r in requests if r.url.path.endswith("/odds")]
+        assert len(odds_requests) == 1
+        assert odds_requests[0].url.params["game_id"] == "in.(g0,g1,g2,g3,g4,g5)"
+    
+    @pytest.mark.asyncio
+    async def test_daily_context_loads_once_until_invalidated(self, fake_db):
+        """Test concurrent callers share one load and ingest forces a reload"""
+        from datetime import date
+        
+        tables, requests = fake_db
+        tables["games"] = [
+            {"id": "y1", "commence_time": "2025-11-09T01:00:00Z", "home_team": "Chicago Bulls"},
+            {"id": "t1", "commence_time": "2025-11-10T00:30:00Z", "home_team": "Boston Celtics"},
+        ]
+        tables["odds"] = [
+            {"id": "o1", "game_id": "t1", "bookmaker_key": "dk", "market_type": "spread", "team": "Boston Celtics", "point": -4.5, "last_update": "2025-11-09T10:00:00Z"},
+            {"id": "o2", "game_id": "t1", "bookmaker_key": "dk", "market_type": "spread", "team": "Boston Celtics", "point": -5.5, "last_update": "2025-11-09T12:00:00Z"},
+        ]
+        store = DailyContextStore()
+        day = date(2025, 11, 10)
+        
+        first, second = await asyncio.gather(store.get(app.state.supabase, day), store.get(app.state.supabase, day))
+        assert first is second and store.loads == 1 and len(requests) == 2
+        assert [g["id"] for g in first.yesterday_games] == ["y1"]
+        assert [g["id"] for g in first.today_games] == ["t1"]
+        assert [row["point"] for row in first.odds_by_game["t1"]] == [-5.5]
+        
+        generator = NBAReportGenerator(app.state.supabase, first)
+        assert await generator.get_today_games() == first.today_games
+        assert (await generator.get_odds_by_game(["t1"]))["t1"] == first.odds_by_game["t1"]
+        assert len(requests) == 2
+        
+        store.invalidate("odds")
+        reloaded = await store.get(app.state.supabase, day)
+        assert reloaded is not first and store.loads == 2
+        assert await store.get(None) is None
+    
+    @pytest.mark.asyncio
+    async def test_reports_share_the_daily_context(self, fake_db):
+        """Test the 7:50 and 8:00 endpoints reuse one load of yesterday's slate"""
+        from backend.main import daily_context_store
+        
+        tables, requests = fake_db
+        tables["games"] = [{"id": "g1", "home_team": "Chicago Bulls", "away_team": "Detroit Pistons"}]
+        daily_context_store.invalidate("test")
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                assert (await http.get("/api/reports/750am")).status_code == 200
+                assert (await http.get("/api/reports/800am")).status_code == 200
+                assert (await http.get("/api/bulls-analysis")).status_code == 200
+        finally:
+            daily_context_store.invalidate("test")
+        assert len(requests) == 2
+    
+    @pytest.mark.asyncio
+    async def test_unchanged_sections_are_reused(self, fake_db):
+        """Test regeneration recomputes only the sections whose inputs changed"""
+        from datetime import date
+        
+        games = [{"id": "g1", "home_team": "Chicago Bulls", "away_team": "Detroit Pistons",
+                  "commence_time": "2024-01-02T19:00:00"}]
+        reference = ReferenceSnapshot([{"abbreviation": "CHI"}], [])
+        
+        def context(price):
+            odds = {"g1": [{"game_id": "g1", "bookmaker": "draftkings", "market_type": "h2h", "price": price}]}
+            return DailyContext(date(2024, 1, 2), [], games, odds, reference)
+        
+        memo = SectionMemo()
+        generator = NBAReportGenerator(app.state.supabase, context(-110))
+        generator.memo = memo
+        first = await generator.generate_1100am_report()
+        assert first["metadata"]["reused"] == []
+        
+        again = await generator.generate_1100am_report()
+        assert set(again["metadata"]["reused"]) == {"slate_overview", "injury_intelligence", "matchup_analysis",
+                                                    "bulls_game_plan", "betting_strategy", "live_betting_plan",
+                                                    "risk_management", "late_intel"}
+        assert again["slate_overview"] == first["slate_overview"]
+        
+        generator.context = context(-120)
+        moved = await generator.generate_1100am_report()
+        recomputed = set(moved["metadata"]["sections"]) - set(moved["metadata"]["reused"])
+        assert recomputed == {"bulls_game_plan", "betting_strategy", "live_betting_plan",
+                              "odds_matrix", "risk_management", "late_intel"}
+    
+    @pytest.mark.asyncio
+    async def test_independent_sections_run_concurrently(self):
+        """Test sections overlap unless one needs another's result"""
+        import threading
+        
+        async def slow(value):
+            await asyncio.sleep(0.1)
+            return value
+        
+        graph = SectionGraph([
+            Section("combined", lambda a, b: a + b, ["a", "b"]),
+            Section("a", lambda: slow(1)),
+            Section("b", lambda: slow(2)),
+            Section("thread", threading.get_ident, cpu=True),
+        ])
+        results, metadata = await graph.evaluate()
+        assert results["combined"] == 3
+        assert results["thread"] != threading.get_ident()
+        assert metadata["total_ms"] < 180
+        assert metadata["sections"]["combined"]["start_ms"] >= 100
+        
+        only, only_metadata = await graph.evaluate(["a"])
+        assert only == {"a": 1} and list(only_metadata["sections"]) == ["a"]
+        
+        with pytest.raises(ValueError):
+            SectionGraph([Section("x", lambda y: y, ["y"]), Section("y", lambda x: x, ["x"])])
+        with pytest.raises(ValueError):
+            SectionGraph([Section("x", lambda y: y, ["missing"])])
+    
+    @pytest.mark.asyncio
+    async def test_selected_sections_only(self, report_generator, monkeypatch):
+        """Test ?sections= computes the requested sections and their inputs only"""
+        called = []
+        original = report_generator._generate_slate_overview
+        
+        async def spy(*args):
+            called.append("slate_overview")
+            return await original(*args)
+        
+        monkeypatch.setattr(report_generator, "_generate_slate_overview", spy)
+        report = await report_generator.generate_1100am_report(["late_intel", "slate_overview"])
+        assert [k for k in report if k not in ("timestamp", "report_type", "metadata")] == ["slate_overview", "late_intel"]
+        assert set(report["metadata"]["sections"]) == {"games", "focus_games", "slate_overview", "late_intel"}
+        assert called == ["slate_overview"]
+        
+        with pytest.raises(ValueError):
+            await report_generator.generate_800am_report(["nope"])
+    
+    def test_sections_query_parameter(self, client, fake_db):
+        """Test the endpoint returns the requested sections and rejects unknown ones"""
+        report = client.get("/api/reports/1100am?sections=injury_intelligence").json()
+        assert "injury_intelligence" in report and "slate_overview" not in report
+        assert list(report["metadata"]["sections"]) == ["injury_intelligence"]
+        assert client.get("/api/reports/800am?sections=bogus").status_code == 400
+    
+    @pytest.mark.asyncio
+    async def test_failing_section_cancels_the_rest(self):
+        """Test the first error propagates and unfinished sections are cancelled"""
+        cancelled = asyncio.Event()
+        
+        async def hang():
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        async def fail():
+            raise RuntimeError("boom")
+        
+        with pytest.raises(RuntimeError):
+            await SectionGraph([Section("hang", hang), Section("fail", fail)]).evaluate()
+        assert cancelled.is_set()
+    
     @pytest.mark.asyncio
     async def test_1100am_report_structure(self, report_generator):
         """Test 11:00 AM report has correct structure"""
@@ -94,6 +317,7 @@ class TestReportGeneration:
         assert "injury_intelligence" in report
         assert "matchup_analysis" in report
         assert "bulls_game_plan" in report
+        assert set(report["metadata"]["sections"]) >= {"games", "slate_overview", "late_intel"}
 
 
 class TestBettingCalculations:
@@ -114,6 +338,116 @@ class TestBettingCalculations:
         kelly = report_generator.calculate_kelly_criterion(0, 2.0)
         assert kelly == 0
     
+    def test_batch_kelly_matches_single_bets(self, report_generator):
+        """Test batch independent sizing agrees with the per-bet calculator"""
+        probs, odds = [0.6, 0.4, 0.55, 0.0], [2.0, 2.0, -110, 3.0]
+        result = size_bets(probs, odds, max_exposure=None)
+        expected = [report_generator.calculate_kelly_criterion(p, d) for p, d in zip(probs, [2.0, 2.0, 1 + 100 / 110, 3.0])]
+        assert result["stakes"] == pytest.approx(expected, abs=1e-6)
+        
+        with pytest.raises(ValueError):
+            size_bets([0.5, 0.6], [2.0])
+        with pytest.raises(ValueError):
+            size_bets([1.5], [2.0])
+    
+    def test_simultaneous_kelly_shares_the_bankroll(self):
+        """Test concurrent bets get less than their independent Kelly and respect the cap"""
+        single = size_bets([0.55], [2.0], mode="simultaneous", fraction=1, max_exposure=None)["stakes"][0]
+        together = size_bets([0.55] * 3, [2.0] * 3, mode="simultaneous", fraction=1, max_exposure=None)["stakes"]
+        assert single == pytest.approx(0.1, abs=1e-3)
+        assert together[0] < single and together == pytest.approx([together[0]] * 3)
+        
+        capped = size_bets([0.6, 0.52, 0.7, 0.45], [2.0, 2.0, 1.6, 2.4], mode="simultaneous",
+                           fraction=0.5, max_exposure=0.15)
+        assert capped["total_exposure"] == pytest.approx(0.15)
+        # The cap pushes the smallest edge out entirely
+        assert capped["stakes"][1] == 0 and capped["stakes"][3] > 0
+    
+    def test_batch_kelly_endpoint(self, client):
+        """Test hundreds of bets are sized in one request"""
+        import random
+        
+        rng = random.Random(7)
+        body = {"probs": [rng.uniform(0.4, 0.65) for _ in range(500)],
+                "odds": [rng.uniform(1.7, 2.3) for _ in range(500)]}
+        data = client.post("/api/kelly-calculator/batch?mode=simultaneous&max_exposure=0.3&bankroll=1000", json=body).json()
+        assert data["count"] == 500 and len(data["amounts"]) == 500
+        assert data["total_exposure"] <= 0.3 + 1e-9
+        assert data["compute_ms"] < 50
+        assert client.post("/api/kelly-calculator/batch?mode=martingale", json=body).status_code == 400
+    
+    def test_parlay_simulation_is_reproducible(self):
+        """Test simulated parlays match the exact hit rate and a seed gives the same draws"""
+        probs, odds = [0.55, 0.6, 0.5], [2.0, -110, 2.2]
+        result = simulate_parlays(probs, odds, [[0, 1], [0, 1, 2]], simulations=400000, seed=3, chunk=300000)
+        pair, triple = result["parlays"]
+        assert result["chunks"] == 4
+        assert pair["hit_rate"] == pytest.approx(0.33, abs=0.004)
+        assert pair["ev"] == pytest.approx(pair["hit_rate"] * 2.0 * (1 + 100 / 110) - 1, abs=1e-5)
+        assert sum(triple["legs_hit"]) == pytest.approx(1) and len(triple["legs_hit"]) == 4
+        
+        again = simulate_parlays(probs, odds, [[0, 1], [0, 1, 2]], simulations=400000, seed=3, chunk=300000, workers=2)
+        assert again["parlays"] == result["parlays"]
+        
+        correlated = simulate_parlays(probs[:2], odds[:2], [[0, 1]], [[1, 0.6], [0.6, 1]], simulations=200000)
+        assert correlated["parlays"][0]["hit_rate"] > 0.36
+        with pytest.raises(ValueError):
+            simulate_parlays(probs[:2], odds[:2], [[0, 1]], [[1, 2], [2, 1]])
+        with pytest.raises(ValueError):
+            simulate_parlays(probs, odds, [[0, 3]])
+    
+    def test_bankroll_simulation_risk(self):
+        """Test bigger stakes on the same bets mean deeper drawdowns and more ruin"""
+        probs, odds = [0.55, 0.55], [2.0, 2.0]
+        modest = simulate_bankroll(probs, odds, [0.02, 0.02], days=50, paths=4000, seed=1)
+        reckless = simulate_bankroll(probs, odds, [0.3, 0.3], days=50, paths=4000, seed=1)
+        assert modest["final_bankroll"]["p50"] > 1
+        assert reckless["max_drawdown"]["p50"] > modest["max_drawdown"]["p50"]
+        assert reckless["risk_of_ruin"] > modest["risk_of_ruin"]
+        assert simulate_bankroll(probs, odds, [0.02, 0.02], days=50, paths=4000, seed=1)["final_bankroll"] == modest["final_bankroll"]
+        with pytest.raises(ValueError):
+            simulate_bankroll(probs, odds, [0.6, 0.6])
+    
+    def test_slate_parlays_and_bankroll_plan(self):
+        """Test report parlays and stakes come from the slate's +EV best prices"""
+        games = [{"id": f"g{i}", "home_team": f"Home {i}", "away_team": f"Away {i}"} for i in range(4)]
+        rows = [
+            {"game_id": g["id"], "bookmaker_key": book, "bookmaker_title": book.upper(), "market_type": "h2h",
+             "team": team, "price": price}
+            for g in games
+            for book, prices in (("dk", (1.91, 1.91)), ("mgm", (1.91, 1.91)), ("fd", (2.15, 1.75)))
+            for team, price in zip((g["home_team"], g["away_team"]), prices)
+        ]
+        matrix = OddsMatrix.build(rows, games)
+        legs = matrix.value_legs()
+        assert [leg["bet"] for leg in legs] == [f"Home {i} ML" for i in range(4)]
+        assert all(leg["book"] == "FD" and leg["edge"] > 0 for leg in legs)
+        
+        generator = NBAReportGenerator(None)
+        parlays = generator._generate_parlay_suggestions(matrix)
+        assert len(parlays) == 3 and all(p["edge"] > 0 for p in parlays)
+        assert len(parlays[0]["legs"]) == 2 and parlays[0]["simulation"]["seed"] == 0
+        assert parlays == generator._generate_parlay_suggestions(matrix)
+        
+        plan = generator._gameday_risk_assessment(matrix)["bankroll_management"]
+        assert len(plan["stakes"]) == 4
+        assert plan["simulation"]["exposure"] <= 0.5
+        assert 0 <= plan["simulation"]["risk_of_ruin"] < 0.05
+    
+    def test_monte_carlo_endpoints(self, client):
+        """Test the parlay and bankroll simulators over HTTP"""
+        body = {"probs": [0.55, 0.6], "odds": [2.0, 1.9]}
+        data = client.post("/api/monte-carlo/parlays?simulations=100000&seed=9", json=body).json()
+        assert data["simulations"] == 100000 and data["parlays"][0]["legs"] == [0, 1]
+        assert client.post("/api/monte-carlo/parlays?simulations=100000&seed=9", json=body).json()["parlays"] == data["parlays"]
+        bad = {**body, "correlation": [[1, 0.5]]}
+        assert client.post("/api/monte-carlo/parlays", json=bad).status_code == 400
+        too_many = {**body, "parlays": [[0, 1]] * (MAX_PARLAYS + 1)}
+        assert client.post("/api/monte-carlo/parlays?simulations=1000", json=too_many).status_code == 400
+        
+        risk = client.post("/api/monte-carlo/bankroll?days=20&paths=1000", json={**body, "stakes": [0.05, 0.05]}).json()
+        assert risk["paths"] == 1000 and set(risk["max_drawdown"]) == {"p5", "p25", "p50", "p75", "p95"}
+    
     def test_roi_calculation(self, report_generator):
         """Test ROI projection calculation"""
         bet_history = [
@@ -182,5 +516,1286 @@ class TestDataValidation:
         assert metrics["win_rate"] == 0
 
 
+
+class TestPlayerQueries:
+    """Test player projection and keyset pagination helpers"""
+    
+    def test_default_projection_is_narrow(self):
+        """Test default select omits the team join and wide columns"""
+        select = player_queries.build_player_select()
+        assert "teams!" not in select
+        assert "college" not in select
+        assert select.split(",")[:2] == ["id", "name"]
+    
+    def test_projection_adds_keyset_columns_and_team(self):
+        """Test requested fields always carry keyset columns"""
+        select = player_queries.build_player_select("name", "team")
+        assert select.endswith("," + player_queries.TEAM_EMBED)
+        columns = select[:-len(player_queries.TEAM_EMBED) - 1].split(",")
+        assert columns[0] == "name"
+        for key in player_queries.KEYSET_FIELDS:
+            assert key in columns
+    
+    def test_unknown_field_rejected(self):
+        """Test unknown fields and includes raise ValueError"""
+        with pytest.raises(ValueError):
+            player_queries.build_player_select("name,password")
+        with pytest.raises(ValueError):
+            player_queries.build_player_select(None, "games")
+    
+    def test_cursor_roundtrip(self):
+        """Test cursor encodes the keyset position"""
+        row = {"team_abbreviation": "CHI", "jersey_number": 8, "id": "abc", "name": "X"}
+        cursor = player_queries.encode_cursor(row)
+        assert player_queries.decode_cursor(cursor) == ("CHI", 8, "abc")
+        
+        with pytest.raises(ValueError):
+            player_queries.decode_cursor("not-a-cursor")
+    
+    def test_keyset_filter_handles_null_jersey(self):
+        """Test rows with no jersey number sort last within a team"""
+        cursor = player_queries.encode_cursor(
+            {"team_abbreviation": "CHI", "jersey_number": None, "id": "abc"}
+        )
+        expression = player_queries.keyset_filter(cursor)
+        assert 'team_abbreviation.gt."CHI"' in expression
+        assert "jersey_number.is.null" in expression
+        assert "jersey_number.gt" not in expression
+    
+    def test_paginate(self):
+        """Test limit+1 probe produces next cursor only when more rows exist"""
+        rows = [
+            {"team_abbreviation": "CHI", "jersey_number": n, "id": str(n)}
+            for n in range(3)
+        ]
+        page, next_cursor = player_queries.paginate(rows, 2)
+        assert len(page) == 2
+        assert player_queries.decode_cursor(next_cursor) == ("CHI", 1, "1")
+        
+        page, next_cursor = player_queries.paginate(rows, 5)
+        assert len(page) == 3
+        assert next_cursor is None
+
+
+class TestPlayerSearchIndex:
+    """Test in-memory player name search"""
+    
+    @pytest.fixture
+    def index(self):
+        index = PlayerSearchIndex()
+        index.build([
+            {"id": "1", "name": "Nikola Vučević", "team_abbreviation": "CHI", "is_active": True},
+            {"id": "2", "name": "Nikola Jokić", "team_abbreviation": "DEN", "is_active": True},
+            {"id": "3", "name": "Coby White", "team_abbreviation": "CHI", "is_active": True},
+            {"id": "4", "name": "Luka Dončić", "team_abbreviation": "LAL", "is_active": True},
+            {"id": "5", "name": "Retired Player", "team_abbreviation": "CHI", "is_active": False},
+        ])
+        return index
+    
+    def test_normalize_strips_accents(self):
+        """Test accent folding for diacritics"""
+        assert normalize("Nikola Vučević") == "nikola vucevic"
+        assert normalize("Đorđević") == "dordevic"
+    
+    def test_exact_and_accent_insensitive(self, index):
+        """Test plain ASCII query matches accented name"""
+        results = index.search("Vucevic")
+        assert results[0][0]["id"] == "1"
+        assert index.search("Vučević")[0][0]["id"] == "1"
+    
+    def test_prefix_match(self, index):
+        """Test typeahead prefix queries"""
+        assert [p["id"] for p, _ in index.search("vuc")] == ["1"]
+        assert {p["id"] for p, _ in index.search("nik")} == {"1", "2"}
+    
+    def test_fuzzy_match_and_ranking(self, index):
+        """Test misspelled names still resolve and exact matches rank first"""
+        assert index.search("Donchic")[0][0]["id"] == "4"
+        results = index.search("coby white")
+        assert results[0][0]["id"] == "3"
+        assert results[0][1] > 1.0
+    
+    def test_limit_and_inactive(self, index):
+        """Test limit is respected and inactive players are excluded"""
+        assert len(index.search("nikola", limit=1)) == 1
+        assert index.search("retired") == []
+    
+    def test_search_endpoint_uses_index(self, client):
+        """Test search endpoint answers from the index without a database"""
+        player_index.build([{"id": "1", "name": "Nikola Vučević", "team_abbreviation": "CHI", "jersey_number": 9}])
+        try:
+            response = client.get("/api/players/search/vucevic?limit=5")
+            assert response.status_code == 200
+            data = response.json()
+            assert data["source"] == "index"
+            assert data["players"][0]["name"] == "Nikola Vučević"
+            assert "college" not in data["players"][0]
+        finally:
+            player_index.build([])
+
+
+class TestReferenceSnapshot:
+    """Test in-memory teams/players snapshot"""
+    
+    TEAMS = [
+        {"id": "t1", "abbreviation": "CHI", "full_name": "Chicago Bulls"},
+        {"id": "t2", "abbreviation": "BOS", "full_name": "Boston Celtics"},
+    ]
+    PLAYERS = [
+        {"id": "p1", "name": "Coby White", "team_abbreviation": "CHI", "jersey_number": 0, "is_active": True},
+        {"id": "p2", "name": "Nikola Vucevic", "team_abbreviation": "CHI", "jersey_number": 9, "is_active": True},
+        {"id": "p3", "name": "Two Way", "team_abbreviation": "CHI", "jersey_number": None, "is_active": True},
+        {"id": "p4", "name": "Former Bull", "team_abbreviation": "CHI", "jersey_number": 1, "is_active": False},
+    ]
+    
+    @pytest.fixture
+    def snapshot(self):
+        return ReferenceSnapshot(self.TEAMS, self.PLAYERS)
+    
+    @pytest.fixture
+    def installed(self, snapshot):
+        previous = reference_store.snapshot
+        reference_store.replace(snapshot)
+        yield snapshot
+        reference_store.replace(previous)
+    
+    def test_indexes(self, snapshot):
+        """Test lookups by abbreviation, id and team"""
+        assert [t["abbreviation"] for t in snapshot.teams] == ["BOS", "CHI"]
+        assert snapshot.team("chi")["id"] == "t1"
+        assert snapshot.player("p2")["name"] == "Nikola Vucevic"
+        assert [p["id"] for p in snapshot.team_players("CHI")] == ["p1", "p2", "p3"]
+        assert snapshot.team_players("BOS") == []
+    
+    def test_disk_roundtrip(self, snapshot, tmp_path):
+        """Test the snapshot survives a restart without Supabase"""
+        store = ReferenceStore(tmp_path / "snapshot.json")
+        store.replace(snapshot)
+        store.save_to_disk()
+        
+        restored = ReferenceStore(tmp_path / "snapshot.json")
+        assert restored.load_from_disk() is not None
+        assert restored.snapshot.source == "disk"
+        assert restored.snapshot.player("p1")["name"] == "Coby White"
+    
+    def test_endpoints_served_from_snapshot(self, client, installed):
+        """Test team/player endpoints answer without a database"""
+        assert len(client.get("/api/teams").json()["teams"]) == 2
+        
+        data = client.get("/api/teams/chi/players").json()
+        assert data["team"] == "CHI"
+        assert data["count"] == 3
+        
+        assert client.get("/api/teams/BOS/players").json()["count"] == 0
+        assert client.get("/api/teams/XXX/players").status_code == 404
+        assert client.get("/api/players/p2").json()["player"]["jersey_number"] == 9
+        assert client.get("/api/players/missing").status_code == 404
+
+
+class TestOddsBatch:
+    """Test batched odds and games-with-odds embedding"""
+    
+    ODDS = [
+        {"game_id": "g1", "bookmaker_key": "dk", "bookmaker_title": "DraftKings", "market_type": "h2h", "team": "Bulls", "price": 2.10},
+        {"game_id": "g1", "bookmaker_key": "mgm", "bookmaker_title": "BetMGM", "market_type": "h2h", "team": "Bulls", "price": 2.20},
+        {"game_id": "g1", "bookmaker_key": "dk", "bookmaker_title": "DraftKings", "market_type": "spread", "team": "Bulls", "point": 2.5, "price": 1.91},
+        {"game_id": "g1", "bookmaker_key": "mgm", "bookmaker_title": "BetMGM", "market_type": "spread", "team": "Bulls", "point": 3.0, "price": 1.87},
+        {"game_id": "g1", "bookmaker_key": "dk", "bookmaker_title": "DraftKings", "market_type": "totals", "outcome_name": "Over", "point": 225.5, "price": 1.91},
+        {"game_id": "g1", "bookmaker_key": "mgm", "bookmaker_title": "BetMGM", "market_type": "totals", "outcome_name": "Over", "point": 224.5, "price": 1.87},
+        {"game_id": "g2", "bookmaker_key": "dk", "bookmaker_title": "DraftKings", "market_type": "h2h", "team": "Celtics", "price": 1.40},
+    ]
+    
+    def test_summary_best_line_and_consensus(self):
+        """Test best line prefers better points, then better prices"""
+        grouped = odds_summary.group_odds_by_game(self.ODDS, ["g1", "g3"])
+        assert grouped["g3"] == []
+        
+        summary = odds_summary.summarize_game_odds(grouped["g1"])
+        assert summary["h2h"]["outcomes"]["Bulls"]["best_bookmaker"] == "BetMGM"
+        assert summary["h2h"]["outcomes"]["Bulls"]["consensus_price"] == 2.15
+        assert summary["spread"]["outcomes"]["Bulls"]["best_point"] == 3.0
+        assert summary["totals"]["outcomes"]["Over"]["best_point"] == 224.5
+        assert summary["totals"]["bookmakers"] == 2
+    
+    def test_parse_game_ids(self):
+        """Test game id parsing and validation"""
+        assert odds_summary.parse_game_ids("a, b,a") == ["a", "b"]
+        with pytest.raises(ValueError):
+            odds_summary.parse_game_ids(" , ")
+    
+    def test_batch_endpoint_single_query(self, client, fake_db):
+        """Test /api/odds fetches all games with one in_ query"""
+        tables, requests = fake_db
+        tables["odds"] = self.ODDS
+        
+        data = client.get("/api/odds?game_ids=g1,g2,g3").json()
+        assert len(data["odds"]["g1"]) == 6
+        assert len(data["odds"]["g2"]) == 1
+        assert data["odds"]["g3"] == []
+        assert len(requests) == 1
+        # Paged in id order so PostgREST's row cap cannot drop lines
+        assert requests[0].url.params["order"] == "id.asc" and requests[0].url.params["offset"] == "0"
+        assert client.get("/api/odds?game_ids=").status_code == 400
+    
+    def test_today_games_with_odds_summary(self, client, fake_db):
+        """Test include=odds_summary embeds per-market summaries"""
+        tables, requests = fake_db
+        tables["games"] = [{"id": "g1", "home_team": "Bulls"}, {"id": "g2", "home_team": "Celtics"}]
+        tables["odds"] = self.ODDS
+        
+        games = client.get("/api/games/today?include=odds_summary").json()["games"]
+        assert games[0]["odds_summary"]["spread"]["outcomes"]["Bulls"]["best_point"] == 3.0
+        assert "spread" not in games[1]["odds_summary"]
+        assert len(requests) == 2
+
+
+class TestOddsMatrix:
+    """Test the vectorized slate odds matrix"""
+    
+    GAMES = [{"id": "g1", "home_team": "Chicago Bulls", "away_team": "Detroit Pistons"}]
+    
+    @staticmethod
+    def line(book, market, name, price, point=None, **extra):
+        key = "outcome_name" if market == "totals" else "team"
+        return {"game_id": "g1", "bookmaker_key": book, "bookmaker_title": book.upper(),
+                "market_type": market, key: name, "price": price, "point": point, **extra}
+    
+    def test_prices_fair_probability_and_best_line(self):
+        """Test American/decimal prices, no-vig probability and best line per outcome"""
+        rows = [
+            self.line("dk", "h2h", "Chicago Bulls", -110),
+            self.line("dk", "h2h", "Detroit Pistons", -110),
+            self.line("mgm", "h2h", "Chicago Bulls", 2.0),
+            self.line("mgm", "h2h", "Detroit Pistons", 1.8),
+            self.line("dk", "spread", "Chicago Bulls", 1.91, -2.5),
+            self.line("mgm", "spread", "Chicago Bulls", 1.95, -3.0),
+            self.line("dk", "totals", "Over", 1.91, 221.5, last_update="2025-01-01T10:00:00Z"),
+            self.line("dk", "totals", "Over", 1.87, 220.5, last_update="2025-01-01T12:00:00Z"),
+        ]
+        matrix = OddsMatrix.build(rows, self.GAMES)
+        
+        assert matrix.decimal[0, 0, 0, 0] == pytest.approx(1 + 100 / 110)
+        assert matrix.fair_prob[0, 0, 0, 0] == pytest.approx(0.5)
+        assert matrix.overround[0, 1, 0] == pytest.approx(1 / 2.0 + 1 / 1.8)
+        
+        summary = matrix.summary("g1")
+        assert summary["h2h"]["outcomes"]["Chicago Bulls"]["best_bookmaker"] == "MGM"
+        assert summary["h2h"]["outcomes"]["Chicago Bulls"]["fair_prob"] == pytest.approx((0.5 + (1 / 2.0) / (1 / 2.0 + 1 / 1.8)) / 2, abs=1e-4)
+        # More points is better for the bettor, whatever the price
+        assert summary["spread"]["outcomes"]["Chicago Bulls"]["best_point"] == -2.5
+        # Only each book's latest line counts
+        assert summary["totals"]["outcomes"]["Over"]["best_point"] == 220.5
+        assert summary["totals"]["outcomes"]["Over"]["books"] == 1
+        
+        game_line = NBAReportGenerator(None).format_game_line(self.GAMES[0], rows)
+        assert game_line["spread"]["point"] == -2.75 and game_line["spread"]["best_point"] == -2.5
+    
+    @pytest.mark.asyncio
+    async def test_arbitrage_and_line_shopping(self):
+        """Test best prices across books are paired into arbitrage and shopping alerts"""
+        rows = [
+            self.line("dk", "h2h", "Chicago Bulls", 2.25),
+            self.line("dk", "h2h", "Detroit Pistons", 1.65),
+            self.line("mgm", "h2h", "Chicago Bulls", 1.80),
+            self.line("mgm", "h2h", "Detroit Pistons", 2.05),
+            self.line("dk", "spread", "Chicago Bulls", 2.1, -3.0),
+            self.line("mgm", "spread", "Detroit Pistons", 2.1, 2.5),
+        ]
+        matrix = OddsMatrix.build(rows, self.GAMES)
+        
+        opportunities = await NBAReportGenerator(None).identify_arbitrage_opportunities(matrix)
+        # The spread sides are different lines (a middle), not an arbitrage
+        assert [o["market"] for o in opportunities] == ["h2h"]
+        arb = opportunities[0]
+        assert arb["home_bet"]["sportsbook"] == "DK" and arb["away_bet"]["sportsbook"] == "MGM"
+        assert arb["total_implied"] == pytest.approx(1 / 2.25 + 1 / 2.05, abs=1e-4)
+        assert arb["home_bet"]["allocation"] * 2.25 == pytest.approx(arb["away_bet"]["allocation"] * 2.05, abs=1e-3)
+        
+        alerts = matrix.line_shopping()
+        assert alerts[0]["bet"] == "Chicago Bulls ML"
+        assert alerts[0]["savings_per_100"] == pytest.approx(45.0)
+    
+    def test_value_legs_price_against_the_same_point(self):
+        """Test a spread's edge uses only books quoting the best line's point"""
+        rows = [
+            self.line("dk", "spread", "Chicago Bulls", 1.6, 2.5),
+            self.line("dk", "spread", "Detroit Pistons", 2.4, -2.5),
+            self.line("mgm", "spread", "Chicago Bulls", 1.95, 3.5),
+            self.line("mgm", "spread", "Detroit Pistons", 1.87, -3.5),
+        ]
+        matrix = OddsMatrix.build(rows, self.GAMES)
+        fair = matrix.fair_prob_at_best_point()
+        assert fair[0, 1, 0] == pytest.approx(matrix.fair_prob[0, 1, 1, 0])
+        assert fair[0, 1, 1] == pytest.approx(0.4)
+        # Averaged across +2.5 and +3.5 both sides would look like +EV
+        assert matrix.best_decimal[0, 1, 1] * matrix.consensus_fair_prob[0, 1, 1] > 1
+        assert matrix.value_legs() == []
+    
+    def test_full_slate_computation_is_fast(self):
+        """Test the derived arrays for a 15-game, 10-book slate stay sub-millisecond"""
+        games = [{"id": f"g{i}", "home_team": f"Home {i}", "away_team": f"Away {i}"} for i in range(15)]
+        rows = [
+            {"game_id": g["id"], "bookmaker_key": f"b{b}", "market_type": market,
+             "team": side, "outcome_name": side, "price": 1.8 + b / 100, "point": 220.5 if market == "totals" else None}
+            for g in games for b in range(10)
+            for market, sides in (("h2h", (g["home_team"], g["away_team"])), ("totals", ("Over", "Under")))
+            for side in sides
+        ]
+        matrix = OddsMatrix.build(rows, games)
+        assert matrix.status()["lines"] == len(rows)
+        timings = []
+        for _ in range(20):
+            matrix._compute()
+            timings.append(matrix.compute_seconds)
+        assert min(timings) < 0.001
+    
+    def test_arbitrage_endpoint_uses_the_slate(self, client, fake_db):
+        """Test /api/arbitrage-opportunities scans today's odds"""
+        from datetime import datetime
+        from backend.main import daily_context_store
+        
+        tables, requests = fake_db
+        tables["games"] = [{**self.GAMES[0], "commence_time": datetime.now().replace(hour=23, minute=59).isoformat()}]
+        tables["odds"] = [
+            {"id": "o1", **self.line("dk", "h2h", "Chicago Bulls", 2.25)},
+            {"id": "o2", **self.line("mgm", "h2h", "Detroit Pistons", 2.05)},
+        ]
+        daily_context_store.invalidate("test")
+        try:
+            data = client.get("/api/arbitrage-opportunities").json()
+        finally:
+            daily_context_store.invalidate("test")
+        assert data["count"] == 1
+        assert data["opportunities"][0]["game"] == "Detroit Pistons @ Chicago Bulls"
+
+
+class TestArbitrageScanner:
+    """Test the incremental arbitrage and middle scanner"""
+    
+    GAME = {"id": "g1", "home_team": "Chicago Bulls", "away_team": "Detroit Pistons"}
+    
+    @staticmethod
+    def line(book, market, name, price, point=None, stamp="2025-01-01T10:00:00Z"):
+        key = "outcome_name" if market == "totals" else "team"
+        return {"game_id": "g1", "bookmaker_key": book, "market_type": market, key: name,
+                "price": price, "point": point, "last_update": stamp}
+    
+    def test_arbitrage_and_middles_per_market(self):
+        """Test same-line arbitrage on spreads and middles on spreads and totals"""
+        scanner = ArbitrageScanner()
+        scanner.load([self.GAME], [
+            self.line("dk", "spread", "Chicago Bulls", 2.10, -3.0),
+            self.line("mgm", "spread", "Detroit Pistons", 2.05, 3.0),
+            self.line("fd", "spread", "Detroit Pistons", 1.91, -2.5),
+            self.line("dk", "totals", "Over", 1.95, 219.5),
+            self.line("mgm", "totals", "Under", 1.95, 221.5),
+            self.line("dk", "h2h", "Chicago Bulls", 1.50),
+            self.line("mgm", "h2h", "Detroit Pistons", 2.60),
+        ])
+        
+        arbs = scanner.opportunities("arbitrage")
+        assert [(a["market"], a["home_bet"]["point"]) for a in arbs] == [("spread", -3.0)]
+        assert arbs[0]["home_bet"]["sportsbook"] == "dk" and arbs[0]["away_bet"]["sportsbook"] == "mgm"
+        
+        middles = {o["market"]: o["middle"] for o in scanner.opportunities("middle")}
+        assert middles["totals"] == {"width": 2.0, "range": [219.5, 221.5]}
+        assert scanner.status()["arbitrage"] == 1
+    
+    def test_deltas_rescan_only_affected_markets(self):
+        """Test a price move clears the arbitrage and stale lines are ignored"""
+        scanner = ArbitrageScanner()
+        scanner.load([self.GAME], [
+            self.line("dk", "h2h", "Chicago Bulls", 2.25),
+            self.line("mgm", "h2h", "Detroit Pistons", 2.05),
+            self.line("dk", "totals", "Over", 1.91, 220.5),
+        ])
+        assert len(scanner.opportunities()) == 1
+        
+        assert scanner.apply([self.line("dk", "h2h", "Chicago Bulls", 1.70, stamp="2025-01-01T09:00:00Z")]) == 0
+        assert len(scanner.opportunities()) == 1
+        
+        assert scanner.apply([self.line("dk", "h2h", "Chicago Bulls", 1.70, stamp="2025-01-01T11:00:00Z")]) == 1
+        assert scanner.opportunities() == []
+        assert scanner.markets_scanned == 2 + 1
+    
+    def test_new_day_and_tip_off_drop_markets(self):
+        """Test reseeding for a new day and games tipping off clear their markets"""
+        from datetime import date, datetime, timezone
+        
+        scanner = ArbitrageScanner()
+        game = {**self.GAME, "commence_time": "2099-01-01T19:00:00Z"}
+        scanner.load([game], [
+            self.line("dk", "h2h", "Chicago Bulls", 2.25),
+            self.line("mgm", "h2h", "Detroit Pistons", 2.05),
+        ], date(2025, 1, 1))
+        assert scanner.prune_started(datetime(2099, 1, 1, 18, tzinfo=timezone.utc)) == 0
+        assert len(scanner.opportunities()) == 1
+        
+        scanner.load([], [], date(2025, 1, 2))
+        assert scanner.opportunities() == [] and scanner.status()["markets"] == 0
+        # Lines for games off the slate are not indexed
+        assert scanner.apply([self.line("dk", "h2h", "Chicago Bulls", 2.25)]) == 0
+        
+        scanner.load([game], [
+            self.line("dk", "h2h", "Chicago Bulls", 2.25),
+            self.line("mgm", "h2h", "Detroit Pistons", 2.05),
+        ], date(2025, 1, 3))
+        assert scanner.prune_started(datetime(2099, 1, 1, 19, 5, tzinfo=timezone.utc)) == 1
+        assert scanner.opportunities() == [] and scanner.lines == {} and scanner.games == {}
+    
+    def test_endpoint_serves_the_live_index(self, client, fake_db):
+        """Test the endpoint seeds from today's slate and follows the odds stream"""
+        from datetime import datetime
+        from backend.main import arbitrage_scanner, daily_context_store, odds_broadcaster
+        
+        tables, requests = fake_db
+        tables["games"] = [{**self.GAME, "commence_time": datetime.now().replace(hour=23, minute=59).isoformat()}]
+        tables["odds"] = [
+            {"id": "o1", **self.line("dk", "h2h", "Chicago Bulls", 2.25)},
+            {"id": "o2", **self.line("mgm", "h2h", "Detroit Pistons", 1.70)},
+        ]
+        daily_context_store.invalidate("test")
+        arbitrage_scanner.seeded_day = None
+        try:
+            assert client.get("/api/arbitrage-opportunities").json()["count"] == 0
+            loads = len(requests)
+            odds_broadcaster.publish([self.line("mgm", "h2h", "Detroit Pistons", 2.05, stamp="2025-01-01T11:00:00Z")])
+            data = client.get("/api/arbitrage-opportunities").json()
+        finally:
+            daily_context_store.invalidate("test")
+            odds_broadcaster.publish([self.line("mgm", "h2h", "Detroit Pistons", 1.70, stamp="2025-01-01T12:00:00Z")])
+        assert data["count"] == 1
+        assert data["opportunities"][0]["away_bet"]["sportsbook"] == "mgm"
+        assert len(requests) == loads
+
+
+class TestOddsStream:
+    """Test odds delta broadcasting"""
+    
+    LINE = {"game_id": "g1", "bookmaker_key": "dk", "market_type": "spread", "team": "Bulls", "point": 2.5, "price": 1.91}
+    
+    def test_only_changed_lines_are_published(self):
+        """Test unchanged lines produce no event"""
+        broadcaster = OddsBroadcaster()
+        first = broadcaster.publish([self.LINE])
+        assert first.seq == 1 and first.id == f"{broadcaster.epoch}-1"
+        assert broadcaster.publish([dict(self.LINE)]) is None
+        
+        moved = broadcaster.publish([{**self.LINE, "point": 3.0}])
+        change = moved.data
+        assert moved.seq == 2
+        assert '"previous_point":2.5' in change
+        assert moved.sse.startswith(f"id: {broadcaster.epoch}-2\nevent: odds\n".encode())
+    
+    @pytest.mark.asyncio
+    async def test_resume_and_heartbeat(self):
+        """Test Last-Event-ID replay, live delivery and heartbeats"""
+        broadcaster = OddsBroadcaster()
+        first = broadcaster.publish([self.LINE])
+        broadcaster.publish([{**self.LINE, "price": 1.95}])
+        
+        stream = broadcaster.subscribe(last_event_id=first.id, heartbeat=0.01)
+        assert (await stream.__anext__()).seq == 2
+        assert await stream.__anext__() is HEARTBEAT
+        
+        live = broadcaster.publish([{**self.LINE, "price": 2.0}])
+        assert await stream.__anext__() is live
+        assert broadcaster.status()["subscribers"] == 1
+        await stream.aclose()
+        assert broadcaster.status()["subscribers"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_snapshot_when_resume_point_expired(self):
+        """Test clients too far behind the replay buffer get a snapshot"""
+        broadcaster = OddsBroadcaster(replay_size=1)
+        broadcaster.publish([self.LINE])
+        broadcaster.publish([{**self.LINE, "price": 1.95}])
+        
+        stream = broadcaster.subscribe(last_event_id=f"{broadcaster.epoch}-0", heartbeat=0.01)
+        event = await stream.__anext__()
+        assert event.event == "snapshot"
+        assert '"price":1.95' in event.data
+        await stream.aclose()
+    
+    def test_ids_from_other_processes_get_a_snapshot(self):
+        """Test ids from another worker, a restart, or ahead of us resync"""
+        broadcaster = OddsBroadcaster()
+        latest = broadcaster.publish([self.LINE])
+        assert broadcaster._replay_since(latest.id) == []
+        for foreign in ("0a1b2c3d-1", f"{broadcaster.epoch}-9", "7", "garbage"):
+            assert [e.event for e in broadcaster._replay_since(foreign)] == ["snapshot"]
+    
+    def test_latest_lines_are_capped(self):
+        """Test the least recently changed lines are evicted past the cap"""
+        broadcaster = OddsBroadcaster(max_lines=2)
+        lines = [{**self.LINE, "game_id": f"g{i}"} for i in range(3)]
+        broadcaster.publish(lines[:2])
+        broadcaster.publish([{**lines[0], "price": 2.0}])
+        broadcaster.publish([lines[2]])
+        assert [key[0] for key in broadcaster.latest] == ["g0", "g2"]
+        assert broadcaster.status()["lines"] == 2
+
+
+class TestTeamAnalytics:
+    """Test materialized per-team analytics"""
+    
+    TEAMS = [
+        {"abbreviation": "CHI", "full_name": "Chicago Bulls", "name": "Bulls"},
+        {"abbreviation": "BOS", "full_name": "Boston Celtics", "name": "Celtics"},
+        {"abbreviation": "LAL", "full_name": "Los Angeles Lakers", "name": "Lakers"},
+    ]
+    GAMES = [
+        {"id": "g1", "commence_time": "2025-11-01T00:00:00Z", "home_team": "Chicago Bulls", "away_team": "Boston Celtics", "home_score": 110, "away_score": 100},
+        {"id": "g2", "commence_time": "2025-11-03T00:00:00Z", "home_team": "Boston Celtics", "away_team": "Chicago Bulls", "home_score": 120, "away_score": 118},
+        {"id": "g3", "commence_time": "2025-11-05T00:00:00Z", "home_team": "Chicago Bulls", "away_team": "Los Angeles Lakers", "home_score": 99, "away_score": 105},
+        {"id": "g4", "commence_time": "2025-11-07T00:00:00Z", "home_team": "LA Lakers", "away_team": "Chicago Bulls"},
+    ]
+    LINES = [
+        {"game_id": "g1", "market_type": "spread", "team": "Chicago Bulls", "point": -4.5, "price": 1.91},
+        {"game_id": "g1", "market_type": "spread", "team": "Boston Celtics", "point": 4.5, "price": 1.91},
+        {"game_id": "g1", "market_type": "totals", "outcome_name": "Over", "point": 215.5, "price": 1.91},
+        {"game_id": "g2", "market_type": "spread", "team": "Boston Celtics", "point": -6.0, "price": 1.91},
+        {"game_id": "g2", "market_type": "totals", "outcome_name": "Over", "point": 230.5, "price": 1.91},
+        {"game_id": "g4", "market_type": "h2h", "team": "LA Lakers", "price": 1.5},
+        {"game_id": "g4", "market_type": "h2h", "team": "Chicago Bulls", "price": 3.0},
+    ]
+    
+    @pytest.fixture
+    def rows(self):
+        return {r["abbreviation"]: r for r in compute_team_analytics(self.TEAMS, self.GAMES, self.LINES)}
+    
+    def test_records_and_form(self, rows):
+        """Test records, splits and recent games come from final scores"""
+        chi = rows["CHI"]
+        assert chi["season_stats"]["wins"] == 1
+        assert chi["season_stats"]["losses"] == 2
+        assert chi["season_stats"]["points_per_game"] == 109.0
+        assert chi["season_stats"]["net_rating"] == 0.7
+        assert chi["recent_form"]["home_record"] == "1-1"
+        assert chi["recent_form"]["away_record"] == "0-1"
+        assert chi["recent_form"]["vs_conference"] == "1-1"
+        assert [g["game_id"] for g in chi["recent_games"]] == ["g3", "g2", "g1"]
+        assert chi["conference"] == "Eastern" and chi["division"] == "Central"
+        assert rows["LAL"]["season_stats"]["wins"] == 1
+    
+    def test_betting_trends(self, rows):
+        """Test ATS and over/under against consensus lines"""
+        chi = rows["CHI"]
+        # g1: won by 10 as -4.5 favourite; g2: lost by 2 as +6 dog -> both covers
+        assert chi["betting_stats"]["ats_record"] == "2-0"
+        assert chi["betting_stats"]["ats_away"] == "1-0"
+        assert rows["BOS"]["betting_stats"]["ats_record"] == "0-2"
+        # g1: 210 under 215.5; g2: 238 over 230.5
+        assert chi["betting_stats"]["over_under"] == "1-1"
+        assert chi["betting_stats"]["avg_total"] == 223.0
+    
+    def test_latest_line_per_book_is_graded(self):
+        """Test superseded snapshots of a line do not enter the consensus"""
+        stale = {"game_id": "g1", "bookmaker_key": "dk", "market_type": "totals", "outcome_name": "Over",
+                 "point": 205.5, "price": 1.91, "last_update": "2025-10-30T12:00:00Z"}
+        closing = {**stale, "point": 215.5, "last_update": "2025-10-31T23:00:00Z"}
+        other_book = {**stale, "bookmaker_key": "mgm", "point": 216.5}
+        kept = team_analytics.latest_lines([closing, stale, other_book])
+        assert sorted(r["point"] for r in kept) == [215.5, 216.5]
+    
+    def test_unscored_games_feed_market_strength(self, rows):
+        """Test upcoming games count towards market strength but not records"""
+        # De-vigged: (1/1.5) / (1/1.5 + 1/3) = 2/3
+        assert rows["LAL"]["betting_stats"]["market_win_probability"] == 0.667
+        assert rows["LAL"]["strength_rating"] == 67
+        assert rows["LAL"]["season_stats"]["games_played"] == 1
+        assert rows["CHI"]["season_stats"]["games_played"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_refresh_materializes_and_persists(self, fake_db):
+        """Test refresh reads games and lines once and upserts the rows"""
+        tables, requests = fake_db
+        tables["games"] = self.GAMES
+        tables["odds"] = self.LINES
+        store = type(team_analytics_store)()
+        
+        snapshot = await store.refresh(app.state.supabase, self.TEAMS)
+        assert snapshot.team("chi")["season_stats"]["wins"] == 1
+        paths = [r.url.path.rsplit("/", 1)[-1] for r in requests]
+        assert paths == ["games", "odds", "team_analytics"]
+        assert requests[1].url.params["game_id"] == "in.(g1,g2,g3,g4)"
+        assert requests[-1].method == "POST"
+        assert store.status()["teams"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_cold_start_loads_once(self, fake_db, monkeypatch):
+        """Test concurrent first requests share one load and refresh"""
+        tables, requests = fake_db
+        tables["games"] = self.GAMES
+        store = type(team_analytics_store)()
+        refreshes = []
+        
+        async def fake_refresh(db, teams, players=None):
+            refreshes.append(teams)
+            await asyncio.sleep(0.01)
+            store.replace(TeamAnalyticsSnapshot([]))
+        
+        monkeypatch.setattr(store, "refresh", fake_refresh)
+        await asyncio.gather(*(store.ensure(app.state.supabase, self.TEAMS) for _ in range(5)))
+        assert len(refreshes) == 1
+        
+        # Without teams (worker mode) only the materialized rows are read
+        store.snapshot = None
+        assert await store.ensure(app.state.supabase) is None
+        assert len(refreshes) == 1
+        assert [r.url.path.rsplit("/", 1)[-1] for r in requests] == ["team_analytics"] * 2
+    
+    def test_endpoints_are_cached_reads(self, client, rows):
+        """Test both analysis endpoints are served from the snapshot"""
+        previous = team_analytics_store.snapshot
+        team_analytics_store.replace(TeamAnalyticsSnapshot(list(rows.values())))
+        try:
+            data = client.get("/api/teams/analysis").json()
+            assert data["count"] == 3
+            assert [t["abbreviation"] for t in data["conferences"]["Western"]] == ["LAL"]
+            assert "recent_games" not in data["teams"][0]
+            
+            detail = client.get("/api/teams/chi/analysis").json()
+            assert detail["season_record"]["wins"] == 1
+            assert detail["betting_trends"]["ats_away"] == "1-0"
+            assert len(detail["recent_games"]) == 3
+            assert client.get("/api/teams/XXX/analysis").status_code == 404
+        finally:
+            team_analytics_store.replace(previous)
+    
+    def test_compare_from_feature_matrix(self, client, rows):
+        """Test comparisons slice the feature matrix and report deltas"""
+        snapshot = TeamAnalyticsSnapshot(list(rows.values()))
+        assert snapshot.features.shape == (3, len(FEATURE_NAMES))
+        
+        result = snapshot.compare(["CHI", "bos"])
+        assert result["baseline"] == "CHI"
+        assert result["deltas"]["BOS"]["wins"] == 0
+        assert result["leaders"]["ats_percentage"] == "CHI"
+        assert result["leaders"]["market_win_probability"] == "CHI"
+        assert result["teams"][1]["metrics"]["market_win_probability"] is None
+        assert result["teams"][0]["league_rank"]["points_allowed"] == 2
+        with pytest.raises(KeyError):
+            snapshot.compare(["CHI", "XXX"])
+        
+        previous = team_analytics_store.snapshot
+        team_analytics_store.replace(snapshot)
+        try:
+            data = client.get("/api/teams/compare?team1=CHI&team2=BOS&team3=LAL").json()
+            assert [t["abbreviation"] for t in data["teams"]] == ["CHI", "BOS", "LAL"]
+            assert data["leaders"]["strength_rating"] == "LAL"
+            assert len(client.get("/api/teams/compare?teams=LAL,CHI").json()["teams"]) == 2
+            assert client.get("/api/teams/compare?team1=CHI").status_code == 400
+            assert client.get("/api/teams/compare?teams=CHI,XXX").status_code == 404
+        finally:
+            team_analytics_store.replace(previous)
+
+
+
+class TestLeaderElection:
+    """Test single-leader background jobs"""
+    
+    @pytest.mark.asyncio
+    async def test_file_lease_is_exclusive(self, tmp_path):
+        """Test only one holder gets the flock until it is released"""
+        first = FileLease(tmp_path / "scheduler.lock", identity="worker-1")
+        second = FileLease(tmp_path / "scheduler.lock", identity="worker-2")
+        
+        assert await first.acquire()
+        assert not await second.acquire()
+        assert await second.holder() == "worker-1"
+        
+        await first.release()
+        assert await second.acquire()
+        assert await second.renew()
+        await second.release()
+    
+    @pytest.mark.asyncio
+    async def test_single_leader_and_failover(self, tmp_path):
+        """Test one of two workers runs the jobs and the other takes over"""
+        running = []
+        
+        def make_worker(name):
+            election = LeaderElection(FileLease(tmp_path / "scheduler.lock", identity=name),
+                                      lease_seconds=0.03, retry_seconds=0.01)
+            
+            async def elected():
+                running.append(name)
+            
+            async def demoted():
+                running.remove(name)
+            
+            return election, asyncio.create_task(election.campaign(elected, demoted))
+        
+        (first, first_task), (second, second_task) = make_worker("w1"), make_worker("w2")
+        await asyncio.sleep(0.1)
+        assert len(running) == 1
+        leader_task = first_task if first.is_leader else second_task
+        follower = second if first.is_leader else first
+        
+        # Leader dies: its lock is released and the follower is elected
+        leader_task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader_task
+        await asyncio.sleep(0.1)
+        assert follower.is_leader
+        assert running == [follower.lease.identity]
+        assert follower.status()["terms"] == 1
+        
+        other = second_task if leader_task is first_task else first_task
+        other.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await other
+        assert running == []
+    
+    @pytest.mark.asyncio
+    async def test_steps_down_when_renewal_fails(self):
+        """Test a leader whose lease cannot be renewed stops its jobs"""
+        class FlakyLease:
+            name, identity = "test", "w1"
+            renewals = 0
+            
+            async def acquire(self):
+                return True
+            
+            async def renew(self):
+                self.renewals += 1
+                if self.renewals == 1:
+                    raise ConnectionError("redis down")
+                return True
+            
+            async def release(self):
+                pass
+        
+        events = []
+        election = LeaderElection(FlakyLease(), lease_seconds=0.03, retry_seconds=0.01)
+        
+        async def elected():
+            events.append("elected")
+        
+        async def demoted():
+            events.append("demoted")
+        
+        task = asyncio.create_task(election.campaign(elected, demoted))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert events[:3] == ["elected", "demoted", "elected"]
+        assert events[-1] == "demoted"
+    
+    @pytest.mark.asyncio
+    async def test_startup_scrape_runs_on_election_only(self, monkeypatch):
+        """Test AUTO_SCRAPE_ON_START scrapes once, from the leader's callback"""
+        import types
+        
+        cycles = []
+        
+        async def fake_cycle(db, stages=jobs.INGEST_STAGES):
+            cycles.append(list(stages))
+        
+        monkeypatch.setattr(jobs, "run_ingest_cycle", fake_cycle)
+        state = types.SimpleNamespace(supabase=object())
+        await jobs.start_background_jobs(state, (), scrape_on_start=True)
+        await state.scrape_task
+        assert cycles == [list(jobs.INGEST_STAGES)]
+        
+        # Scheduler without AUTO_SCRAPE_ON_START: the loop waits an interval first
+        await jobs.start_background_jobs(state, ["odds"], interval=3600, scrape_on_start=False)
+        await asyncio.sleep(0.01)
+        assert len(cycles) == 1
+        await jobs.stop_background_jobs(state)
+
+
+
+class TestWorker:
+    """Test the ingest worker and cache invalidation between processes"""
+    
+    def test_cli_stage_selection(self):
+        """Test stages are validated and defaults cover every stage"""
+        args = worker.parse_args(["--stages", "odds, analytics", "--concurrency", "3", "--once"])
+        assert args.stages == ["odds", "analytics"]
+        assert args.concurrency == 3 and args.once
+        assert worker.parse_args([]).stages == list(jobs.STAGES)
+        with pytest.raises(SystemExit):
+            worker.parse_args(["--stages", "odds,bogus"])
+    
+    @pytest.mark.asyncio
+    async def test_invalidation_dispatch(self, fake_db):
+        """Test only versions published by other processes trigger reloads"""
+        tables, requests = fake_db
+        supabase = app.state.supabase
+        reloaded = []
+        
+        async def handler(db, since):
+            reloaded.append(since)
+        
+        bus = InvalidationBus()
+        bus.on("reference", handler)
+        tables["cache_invalidations"] = [{"name": "reference", "version": 1_000_000}]
+        assert await bus.poll(supabase) == {}  # startup baseline
+        
+        tables["cache_invalidations"] = [{"name": "reference", "version": 5_000_000}]
+        assert await bus.poll(supabase) == {"reference": 5_000_000}
+        assert reloaded == [1.0]
+        assert await bus.poll(supabase) == {}
+        
+        # Our own publish is already applied locally
+        await bus.publish(supabase, "reference")
+        tables["cache_invalidations"] = [{"name": "reference", "version": bus.seen["reference"]}]
+        assert await bus.poll(supabase) == {}
+        assert requests[-2].method == "POST"
+    
+    @pytest.mark.asyncio
+    async def test_odds_replay_pages_and_resumes(self, fake_db, monkeypatch):
+        """Test replayed odds are read in pages and the next replay starts at the newest row read"""
+        import sys
+        
+        tables, requests = fake_db
+        broadcaster = OddsBroadcaster()
+        monkeypatch.setattr(sys.modules["odds_stream"], "odds_broadcaster", broadcaster)
+        monkeypatch.setattr(jobs, "_odds_replayed_until", None)
+        tables["odds"] = [
+            {"id": f"o{i}", "game_id": "g1", "bookmaker_key": f"b{i}", "market_type": "h2h", "team": "Bulls",
+             "price": 1.9, "updated_at": f"2025-01-01T10:0{i}:00Z"}
+            for i in range(3)
+        ]
+        await jobs.replay_odds_changes(app.state.supabase, 1_700_000_000.0)
+        assert len(broadcaster.latest) == 3
+        assert requests[-1].url.params["offset"] == "0" and requests[-1].url.params["order"] == "updated_at.asc,id.asc"
+        assert jobs._odds_replayed_until == "2025-01-01T10:02:00Z"
+        
+        await jobs.replay_odds_changes(app.state.supabase, 1_700_000_000.0)
+        assert requests[-1].url.params["updated_at"] == "gte.2025-01-01T10:02:00Z"
+    
+    @pytest.mark.asyncio
+    async def test_ingest_cycle_respects_stages(self, fake_db, monkeypatch):
+        """Test an analytics-only cycle skips scraping and invalidates analytics"""
+        tables, requests = fake_db
+        published = []
+        scraped = []
+        
+        async def fake_publish(db, *names):
+            published.extend(names)
+        
+        async def fake_scrape(db, **kwargs):
+            scraped.append(kwargs)
+        
+        async def refreshed(db):
+            pass
+        
+        monkeypatch.setattr(jobs, "_real_implementations_loaded", True)
+        monkeypatch.setattr(jobs, "scrape_all_data", fake_scrape)
+        monkeypatch.setattr(jobs.invalidations, "publish", fake_publish)
+        # Keep the process-wide snapshot, search index and data dir untouched
+        monkeypatch.setattr(jobs, "refresh_reference_data", refreshed)
+        monkeypatch.setattr(jobs, "refresh_team_analytics", refreshed)
+        await jobs.run_ingest_cycle(app.state.supabase, ["analytics"])
+        assert scraped == [] and published == ["team_analytics"]
+        
+        await jobs.run_ingest_cycle(app.state.supabase, ["odds"])
+        assert scraped == [{"include_rosters": False}]
+        assert published[1:] == ["odds", "reference"]
+
+
+class FakeJobsTable:
+    """Stateful PostgREST stand-in for background_jobs (eq/in filters, limit)"""
+    
+    def __init__(self):
+        self.rows = []
+    
+    @staticmethod
+    def _text(value):
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        return "null" if value is None else str(value)
+    
+    def _matches(self, row, filters):
+        for column, expression in filters:
+            if expression.startswith("in.("):
+                if self._text(row.get(column)) not in expression[4:-1].split(","):
+                    return False
+            elif expression.startswith("eq.") and self._text(row.get(column)) != expression[3:]:
+                return False
+        return True
+    
+    def handler(self, request):
+        import json
+        
+        params = request.url.params
+        filters = [(k, v) for k, v in params.multi_items() if k not in ("select", "order", "limit", "offset")]
+        matched = [r for r in self.rows if self._matches(r, filters)]
+        if request.method == "GET":
+            return httpx.Response(200, json=matched[:int(params.get("limit", len(matched)))])
+        body = json.loads(request.content)
+        if request.method == "POST":
+            for row in body if isinstance(body, list) else [body]:
+                if row["status"] in ("queued", "running") and any(
+                    r["kind"] == row["kind"] and r["key"] == row["key"] and r["status"] in ("queued", "running")
+                    for r in self.rows
+                ):
+                    return httpx.Response(409, json={"message": "duplicate key value"})
+                self.rows.append(dict(row))
+            return httpx.Response(201, json=[])
+        for row in matched:
+            row.update(body)
+        return httpx.Response(200, json=[dict(r) for r in matched])
+
+
+class TestJobRegistry:
+    """Test tracked background jobs"""
+    
+    @pytest.mark.asyncio
+    async def test_dedupe_limit_and_progress(self):
+        """Test duplicates reuse the active job and the kind limit queues others"""
+        registry = JobRegistry(limits={"scrape": 1})
+        release = asyncio.Event()
+        
+        async def work(db, job):
+            job.update(current=1, total=30, rows=15)
+            await release.wait()
+            return {"players": 15}
+        
+        registry.register("scrape", work)
+        first, created = await registry.submit("scrape", key="2025")
+        again, created_again = await registry.submit("scrape", key="2025")
+        other, _ = await registry.submit("scrape", key="2024")
+        assert created and not created_again and again is first
+        await asyncio.sleep(0)
+        assert first.status == "running" and first.progress["current"] == 1
+        assert other.status == "queued"
+        
+        release.set()
+        await asyncio.gather(*(job.task for job in (first, other) if job.task))
+        assert first.status == other.status == "succeeded"
+        assert first.result == {"players": 15} and first.duration is not None
+        assert [job.id for job in await registry.list(kind="scrape")] == [other.id, first.id]
+        assert registry.status()["local_jobs"] == {"succeeded": 2}
+        with pytest.raises(KeyError):
+            await registry.submit("unregistered")
+    
+    @pytest.mark.asyncio
+    async def test_cancel_and_failure(self):
+        """Test running and queued jobs cancel, and errors are recorded"""
+        registry = JobRegistry()
+        
+        async def forever(db, job):
+            await asyncio.sleep(3600)
+        
+        async def broken(db, job):
+            raise ValueError("no teams")
+        
+        registry.register("scrape", forever)
+        registry.register("report", broken)
+        running, _ = await registry.submit("scrape")
+        queued, _ = await registry.submit("scrape", key="other")
+        await asyncio.sleep(0)
+        assert (await registry.cancel(queued.id)).status == "cancelled"
+        assert (await registry.cancel(running.id)).status == "cancelled"
+        assert await registry.cancel("missing") is None
+        
+        failed, _ = await registry.submit("report")
+        await failed.task
+        assert failed.status == "failed" and failed.error == "no teams"
+    
+    @pytest.mark.asyncio
+    async def test_jobs_are_shared_across_processes(self):
+        """Test two API workers dedupe through the table and the executor runs the job"""
+        import sys
+        from backend import job_registry as job_registry_module
+        
+        # Same db module the registry imported, so its DatabaseError is the one caught
+        Database = sys.modules[job_registry_module.DatabaseError.__module__].AsyncDatabase
+        table = FakeJobsTable()
+        db = Database("https://example.supabase.co", "key", transport=httpx.MockTransport(table.handler))
+        started = asyncio.Event()
+        
+        async def work(supabase, job):
+            job.update(current=3, total=30, rows=40)
+            started.set()
+            await asyncio.sleep(3600)
+        
+        api_a, api_b, executor = JobRegistry(), JobRegistry(), JobRegistry(poll_seconds=0.01)
+        for registry in (api_a, api_b, executor):
+            registry.register("roster_scrape", work)
+            registry.attach(db)
+        
+        job, created = await api_a.submit("roster_scrape", key="2025")
+        same, created_again = await api_b.submit("roster_scrape", key="2025")
+        assert created and not created_again and same.id == job.id
+        
+        # A submission racing past the lookup hits the unique index instead
+        original = api_b._find_active_row
+        lookups = []
+        
+        async def miss_once(kind, key):
+            lookups.append(kind)
+            return None if len(lookups) == 1 else await original(kind, key)
+        
+        api_b._find_active_row = miss_once
+        raced, created_raced = await api_b.submit("roster_scrape", key="2025")
+        assert not created_raced and raced.id == job.id and len(table.rows) == 1
+        
+        await executor.tick()  # claim
+        await started.wait()
+        await executor.tick()  # save progress
+        seen = await api_b.get(job.id)
+        assert seen.status == "running" and seen.progress["rows"] == 40
+        
+        assert (await api_a.cancel(job.id)).cancel_requested
+        await executor.tick()  # apply the cancel request
+        assert table.rows[0]["status"] == "cancelled"
+        assert [j.status for j in await api_b.list(kind="roster_scrape")] == ["cancelled"]
+        await db.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_roster_scrape_endpoints(self, monkeypatch):
+        """Test repeated roster scrape requests share one inspectable job"""
+        from backend.main import job_registry
+        
+        started = asyncio.Event()
+        
+        async def fake_scrape(supabase, job):
+            job.update(current=3, total=30, rows=40)
+            started.set()
+            await asyncio.sleep(3600)
+        
+        monkeypatch.setitem(job_registry.handlers, "roster_scrape", fake_scrape)
+        previous = getattr(app.state, "supabase", None)
+        app.state.supabase = object()  # local registry, but the route needs a database
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                first = (await http.post("/api/scrape/rosters?season=2025")).json()
+                second = (await http.post("/api/scrape/rosters?season=2025")).json()
+                assert first["created"] and not second["created"]
+                assert second["job_id"] == first["job_id"]
+                
+                await started.wait()
+                job = (await http.get(f"/api/jobs/{first['job_id']}")).json()
+                assert job["status"] == "running"
+                assert job["progress"]["current"] == 3 and job["progress"]["rows"] == 40
+                listed = (await http.get("/api/jobs?kind=roster_scrape&status=running")).json()
+                assert first["job_id"] in [j["id"] for j in listed["jobs"]]
+                
+                cancelled = (await http.post(f"/api/jobs/{first['job_id']}/cancel")).json()
+                assert cancelled["status"] == "cancelled"
+                assert (await http.get("/api/jobs/missing")).status_code == 404
+        finally:
+            app.state.supabase = previous
+    
+    @pytest.mark.asyncio
+    async def test_bulls_scrape_is_queued(self, monkeypatch):
+        """Test the Bulls scrape route hands the work to the job executor"""
+        from backend.main import job_registry
+        
+        ran = asyncio.Event()
+        
+        async def fake_scrape(supabase, job):
+            ran.set()
+            return {"players_count": 15}
+        
+        monkeypatch.setitem(job_registry.handlers, "bulls_scrape", fake_scrape)
+        previous = getattr(app.state, "supabase", None)
+        app.state.supabase = object()
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                body = (await http.post("/api/scrape/bulls-players")).json()
+                assert body["job"]["kind"] == "bulls_scrape" and body["created"]
+                await asyncio.wait_for(ran.wait(), timeout=5)
+        finally:
+            app.state.supabase = previous
+
+
+class TestAdmissionControl:
+    """Test load shedding on expensive endpoints"""
+    
+    @pytest.mark.asyncio
+    async def test_gate_queue_and_rejections(self):
+        """Test one slot, one queued waiter, and fast rejection beyond that"""
+        gate = AdmissionGate("reports", limit=1, queue_size=1, max_wait=0.05)
+        release = asyncio.Event()
+        
+        async def hold():
+            async with gate.admit():
+                await release.wait()
+        
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold())
+        try:
+            await asyncio.sleep(0)
+            assert gate.in_flight == 1 and gate.waiting == 1
+            
+            with pytest.raises(Overloaded) as full:
+                async with gate.admit():
+                    pass
+            assert full.value.reason == "queue full" and full.value.retry_after >= 1
+            
+            # The queued waiter times out while the slot stays busy
+            with pytest.raises(Overloaded):
+                await waiter
+            assert gate.rejected_queue_full == 1 and gate.rejected_timeout == 1
+        finally:
+            release.set()
+            await asyncio.gather(holder, waiter, return_exceptions=True)
+        assert gate.in_flight == 0 and gate.admitted == 1
+        assert gate.status()["avg_service_seconds"] is not None
+        assert parse_limits("reports=2, scrape=1,") == {"reports": 2, "scrape": 1}
+    
+    @pytest.mark.asyncio
+    async def test_busy_endpoint_sheds_and_health_stays_up(self, monkeypatch):
+        """Test a saturated group returns 503 with Retry-After; /health is ungated"""
+        import contextlib
+        from backend.main import admission_control
+        
+        gate = admission_control.gate("reports")
+        monkeypatch.setattr(gate, "queue_size", 0)
+        transport = httpx.ASGITransport(app=app)
+        async with contextlib.AsyncExitStack() as stack:
+            for _ in range(gate.limit):
+                await stack.enter_async_context(gate.admit())
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                response = await http.get("/api/reports/750am")
+                assert response.status_code == 503
+                assert int(response.headers["Retry-After"]) >= 1
+                assert (await http.get("/health")).status_code == 200
+                status = (await http.get("/api/status")).json()["admission"]
+                assert status["reports"]["rejected_queue_full"] >= 1
+        assert gate.in_flight == 0
+
+
+
+class TestRequestMetrics:
+    """Test per-route latency instrumentation"""
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket counts accumulate and +Inf matches the count"""
+        histogram = Histogram("latency_seconds", "test", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(("/x",), value)
+        lines = histogram.render()
+        assert 'latency_seconds_bucket{route="/x",le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{route="/x",le="1.0"} 3' in lines
+        assert 'latency_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+        assert 'latency_seconds_count{route="/x"} 4' in lines
+    
+    def test_server_timing_and_metrics_endpoint(self, client, fake_db):
+        """Test the breakdown header and per-route-template histograms"""
+        tables, requests = fake_db
+        tables["odds"] = TestOddsBatch.ODDS
+        
+        response = client.get("/api/odds/g1")
+        timing = response.headers["Server-Timing"]
+        for phase in ("db;dur=", "queue;dur=", "compute;dur=", "serialize;dur=", "total;dur="):
+            assert phase in timing
+        assert 'desc="1 calls"' in timing
+        
+        metrics = client.get("/metrics")
+        assert metrics.headers["content-type"].startswith("text/plain")
+        body = metrics.text
+        assert 'http_requests_total{method="GET",route="/api/odds/{game_id}",status="200"}' in body
+        assert 'http_request_phase_seconds_count{method="GET",route="/api/odds/{game_id}",phase="db"}' in body
+        assert 'http_request_db_calls_total{method="GET",route="/api/odds/{game_id}"}' in body
+        assert "# TYPE admission_rejected_total counter" in body
+
+
+
+class TestProfiler:
+    """Test the on-demand sampling profiler"""
+    
+    def test_sampler_collapses_worker_thread_stacks(self):
+        """Test a busy thread shows up as a thread-prefixed collapsed stack"""
+        import threading
+        import time
+        
+        stop = threading.Event()
+        
+        def spin_for_profile():
+            while not stop.is_set():
+                sum(range(1000))
+        
+        worker_thread = threading.Thread(target=spin_for_profile, name="busy-worker")
+        worker_thread.start()
+        try:
+            sampler = StackSampler(interval=0.002).start()
+            time.sleep(0.1)
+            sampler.stop()
+        finally:
+            stop.set()
+            worker_thread.join()
+        lines = sampler.collapsed().splitlines()
+        assert sampler.samples > 0
+        assert any(line.startswith("busy-worker;") and "spin_for_profile (test_main.py:" in line for line in lines)
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    
+    @pytest.mark.asyncio
+    async def test_admin_capture_is_off_by_default_and_protected(self, monkeypatch):
+        """Test 404 while disabled, 403 for a bad token, collapsed stacks otherwise"""
+        from backend.main import sampling_profiler
+        
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            assert (await http.post("/api/admin/profile?seconds=0.05")).status_code == 404
+            
+            monkeypatch.setattr(sampling_profiler, "token", "secret")
+            denied = await http.post("/api/admin/profile?seconds=0.05", headers={"X-Admin-Token": "nope"})
+            assert denied.status_code == 403
+            response = await http.post("/api/admin/profile?seconds=0.05&interval_ms=2",
+                                       headers={"X-Admin-Token": "secret"})
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/plain")
+            assert "MainThread;" in response.text
+            assert sampling_profiler.active is None
+    
+    @pytest.mark.asyncio
+    async def test_request_opt_in_header(self):
+        """Test X-Profile profiles one request and the result can be fetched"""
+        profiler = Profiler(token="secret", interval_ms=1)
+        profiled_app = ProfileRequestMiddleware(app, profiler=profiler)
+        transport = httpx.ASGITransport(app=profiled_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            plain = await http.get("/health")
+            assert "X-Profile-Id" not in plain.headers
+            profiled = await http.get("/health", headers={"X-Profile": "secret"})
+            profile_id = profiled.headers["X-Profile-Id"]
+        assert profile_id in profiler.recent and profiler.active is None
+
+
+
+class TestLoopMonitor:
+    """Test the event-loop lag watchdog"""
+    
+    @pytest.mark.asyncio
+    async def test_blocking_call_is_attributed(self):
+        """Test a sync sleep on the loop is charged to the function that made it"""
+        import time
+        
+        monitor = LoopMonitor(interval=0.01, threshold=0.05)
+        task = asyncio.create_task(monitor.run())
+        
+        def parse_page_synchronously():
+            time.sleep(0.25)
+        
+        try:
+            await asyncio.sleep(0.05)
+            parse_page_synchronously()
+            await asyncio.sleep(0.05)
+        finally:
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        
+        assert monitor.stalls >= 1 and monitor.max_lag >= 0.2
+        top = monitor.top_offenders()[0]
+        assert top.key.startswith("test_main.py:parse_page_synchronously")
+        assert top.count == 1 and top.blocked_seconds >= 0.2
+        status = monitor.status()
+        assert status["top_offenders"][0]["offender"] == top.key and not status["running"]
+        families = {name: samples for name, _, _, samples in monitor.metric_families()}
+        assert families["event_loop_offender_stalls_total"] == [({"offender": top.key}, 1)]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
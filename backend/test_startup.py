@@ -0,0 +1,86 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+# Imported at first use only; none of these may load with `import main`
+HEAVY_MODULES = (
+    "numpy", "supabase", "apscheduler", "pytz", "bs4", "cloudscraper",
+    "fake_useragent", "httpx_socks", "aiofiles", "reports", "scrapers", "anti_bot_scraper",
+)
+
+
+def run_python(code, tmp_path, *args):
+    """Run code in a fresh interpreter from backend/, without Supabase configured"""
+    env = {
+        **os.environ,
+        "SUPABASE_URL": "", "VITE_SUPABASE_URL": "",
+        "SUPABASE_SERVICE_ROLE_KEY": "", "SUPABASE_SERVICE_KEY": "", "VITE_SUPABASE_ANON_KEY": "",
+        "ENABLE_SCHEDULER": "false", "AUTO_SCRAPE_ON_START": "false",
+        "DATA_DIR": str(tmp_path),
+    }
+    result = subprocess.run(
+        [sys.executable, *args, "-c", code], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return result
+
+
+class TestImportProfile:
+    """Import-time profile of the API module"""
+
+    # Seconds `import main` may add on top of importing fastapi itself
+    IMPORT_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET_SECONDS", "0.5"))
+
+    def test_heavy_dependencies_are_lazy(self, tmp_path):
+        """Test scrapers, reports and their dependencies load at first use"""
+        result = run_python("import main, sys, json; print(json.dumps(sorted(sys.modules)))", tmp_path)
+        loaded = set(json.loads(result.stdout.strip().splitlines()[-1]))
+        assert sorted(m for m in HEAVY_MODULES if m in loaded) == []
+
+    def test_import_time_budget(self, tmp_path):
+        """Test `import main` stays within budget beyond fastapi (best of 3)"""
+        overheads = []
+        for _ in range(3):
+            profile = run_python("import main", tmp_path, "-X", "importtime").stderr
+            cumulative = {}
+            for line in profile.splitlines():
+                match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)", line)
+                if match:
+                    cumulative[match.group(3)] = int(match.group(1)) / 1e6
+            overheads.append(cumulative["main"] - cumulative.get("fastapi", 0.0))
+            slowest = sorted(cumulative.items(), key=lambda item: -item[1])[:10]
+        print(f"\nimport main overhead: {min(overheads):.3f}s, slowest: {slowest}")
+        assert min(overheads) < self.IMPORT_BUDGET, slowest
+
+
+class TestTimeToFirstHealth:
+    """Cold start: fresh interpreter to the first /health response"""
+
+    HEALTH_BUDGET = float(os.getenv("STARTUP_HEALTH_BUDGET_SECONDS", "3.0"))
+
+    def test_first_health_within_budget(self, tmp_path):
+        """Test process start, lifespan startup and /health stay within budget"""
+        code = (
+            "from fastapi.testclient import TestClient\n"
+            "import main\n"
+            "with TestClient(main.app) as client:\n"
+            "    assert client.get('/health').status_code == 200\n"
+        )
+        started = time.perf_counter()
+        run_python(code, tmp_path)
+        elapsed = time.perf_counter() - started
+        print(f"\ntime to first /health: {elapsed:.3f}s")
+        assert elapsed < self.HEALTH_BUDGET
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
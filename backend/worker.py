@@ -0,0 +1,153 @@
+"""
+Ingest worker: scraping, analytics materialization and scheduled reports
+Runs the background jobs outside the API processes so HTTP latency is not
+affected by HTML parsing or report generation. Results reach the API
+processes through the database plus cache invalidation messages.
+
+    python worker.py --stages odds,rosters,analytics,reports --concurrency 2
+    python worker.py --once --stages odds,analytics
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import resource
+import signal
+import types
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from db import create_database
+from jobs import (
+    INGEST_STAGES,
+    SCRAPE_INTERVAL_SECONDS,
+    STAGES,
+    configure_concurrency,
+    refresh_reference_data,
+    register_job_handlers,
+    run_ingest_cycle,
+    start_background_jobs,
+    stop_background_jobs,
+)
+from job_registry import job_registry
+from leader import LeaderElection, create_lease
+from loop_monitor import LOOP_MONITOR_ENABLED, loop_monitor
+from supabase_client import get_supabase_config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def parse_stages(value: str) -> List[str]:
+    stages = [s.strip().lower() for s in value.split(",") if s.strip()]
+    unknown = sorted(set(stages) - set(STAGES))
+    if unknown or not stages:
+        raise argparse.ArgumentTypeError(
+            f"unknown stage(s) {', '.join(unknown)}; choose from {', '.join(STAGES)}"
+        )
+    return stages
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="NBA Analytics ingest worker")
+    parser.add_argument("--stages", type=parse_stages, default=list(STAGES),
+                        help=f"comma separated stages to run ({','.join(STAGES)})")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("WORKER_CONCURRENCY", "2")),
+                        help="maximum background jobs running at once")
+    parser.add_argument("--interval", type=float, default=SCRAPE_INTERVAL_SECONDS,
+                        help="seconds between ingest cycles")
+    parser.add_argument("--memory-limit-mb", type=int, default=int(os.getenv("WORKER_MEMORY_LIMIT_MB", "0")),
+                        help="virtual address-space (RLIMIT_AS) cap; 0 (default) disables it. "
+                             "Prefer a container memory limit: NumPy/OpenBLAS reserve much more "
+                             "address space than they use")
+    parser.add_argument("--once", action="store_true",
+                        help="run one ingest cycle for the selected ingest stages and exit")
+    parser.add_argument("--no-leader-election", action="store_true",
+                        help="run jobs even if another worker holds the leader lease")
+    return parser.parse_args(argv)
+
+
+def apply_memory_limit(limit_mb: int):
+    """Cap the worker's virtual address space; exceeding it raises MemoryError in the worker only
+
+    RLIMIT_AS counts reserved, not resident, memory. NumPy/OpenBLAS thread
+    arenas reserve large ranges up front, so set this well above the real
+    footprint, or leave it off and use a cgroup limit (compose ``mem_limit``).
+    """
+    if limit_mb <= 0:
+        return
+    limit = limit_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    logger.info(f"Worker memory limited to {limit_mb} MB")
+
+
+async def run(args: argparse.Namespace) -> int:
+    config = get_supabase_config()
+    supabase = create_database(config["url"], config["service_key"] or config["anon_key"])
+    if supabase is None:
+        logger.error("Worker needs SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY")
+        return 1
+
+    configure_concurrency(args.concurrency)
+    # Executes jobs queued by the API processes while this worker leads
+    job_registry.attach(supabase)
+    register_job_handlers()
+    state = types.SimpleNamespace(supabase=supabase)
+    # Scraping and parsing run here, so stalls are worth logging here too
+    monitor = asyncio.create_task(loop_monitor.run()) if LOOP_MONITOR_ENABLED else None
+    try:
+        # Analytics and roster refreshes read the teams snapshot
+        await refresh_reference_data(supabase)
+
+        if args.once:
+            await run_ingest_cycle(supabase, [s for s in args.stages if s in INGEST_STAGES])
+            return 0
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError):
+                loop.add_signal_handler(sig, stop.set)
+
+        async def start():
+            await start_background_jobs(state, args.stages, args.interval)
+
+        async def stop_jobs():
+            await stop_background_jobs(state)
+
+        if args.no_leader_election:
+            await start()
+            await stop.wait()
+            await stop_jobs()
+        else:
+            election = LeaderElection(create_lease(os.getenv("REDIS_URL", "redis://redis:6379/0")))
+            campaign = asyncio.create_task(election.campaign(start, stop_jobs))
+            logger.info(f"Worker started (stages: {', '.join(args.stages)}); campaigning for leadership")
+            await stop.wait()
+            campaign.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await campaign
+        return 0
+    finally:
+        if monitor:
+            monitor.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await monitor
+        await supabase.aclose()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+    apply_memory_limit(args.memory_limit_mb)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
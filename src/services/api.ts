@@ -62,20 +62,36 @@ export const teamsApi = {
     const params = new URLSearchParams({ team1, team2 });
     if (team3) params.append('team3', team3);
     return apiRequest<any>(`/api/teams/compare?${params}`);
-  }
+  },
+
+  // Compare any number of teams (deltas are relative to the first)
+  compareMany: (teams: string[]) =>
+    apiRequest<any>(`/api/teams/compare?teams=${encodeURIComponent(teams.join(','))}`)
 };
 
 // Players API  
 export const playersApi = {
   // Get all players with optional filters
-  getAll: (filters?: {team?: string, position?: string, active?: boolean}) => {
+  getAll: (filters?: {
+    team?: string,
+    position?: string,
+    active?: boolean,
+    limit?: number,
+    cursor?: string,
+    fields?: string[],
+    include?: 'team',
+  }) => {
     const params = new URLSearchParams();
     if (filters?.team) params.set('team', filters.team);
     if (filters?.position) params.set('position', filters.position);
     if (filters?.active !== undefined) params.set('active', filters.active.toString());
+    if (filters?.limit) params.set('limit', filters.limit.toString());
+    if (filters?.cursor) params.set('cursor', filters.cursor);
+    if (filters?.fields?.length) params.set('fields', filters.fields.join(','));
+    if (filters?.include) params.set('include', filters.include);
     
     const query = params.toString() ? `?${params}` : '';
-    return apiRequest<{players: any[], count: number}>(`/api/players${query}`);
+    return apiRequest<{players: any[], count: number, next_cursor: string | null}>(`/api/players${query}`);
   },
   
   // Get player details
@@ -83,29 +99,56 @@ export const playersApi = {
     apiRequest<{player: any}>(`/api/players/${playerId}`),
   
   // Search players by name
-  searchByName: (name: string) => 
-    apiRequest<{query: string, players: any[], count: number}>(`/api/players/search/${name}`),
+  searchByName: (name: string, limit?: number) => {
+    const query = limit ? `?limit=${limit}` : '';
+    return apiRequest<{query: string, players: any[], count: number, next_cursor: string | null}>(
+      `/api/players/search/${encodeURIComponent(name)}${query}`
+    );
+  },
 };
 
 // Games API
 export const gamesApi = {
-  // Get today's games
-  getToday: () => apiRequest<{games: any[]}>('/api/games/today'),
+  // Get today's games (optionally with best line / consensus per market)
+  getToday: (includeOddsSummary: boolean = false) =>
+    apiRequest<{games: any[]}>(
+      `/api/games/today${includeOddsSummary ? '?include=odds_summary' : ''}`
+    ),
   
   // Get game odds
   getOdds: (gameId: string) => apiRequest<{odds: any[]}>(`/api/odds/${gameId}`),
+  
+  // Get odds for a whole slate in one request, grouped by game id
+  getOddsBatch: (gameIds: string[]) =>
+    apiRequest<{odds: Record<string, any[]>, count: number}>(
+      `/api/odds?game_ids=${gameIds.map(encodeURIComponent).join(',')}`
+    ),
 };
 
+// Live odds push (Server-Sent Events); EventSource resends Last-Event-ID on reconnect
+export const oddsStreamApi = {
+  subscribe: (onChanges: (changes: any[], kind: 'odds' | 'snapshot') => void) => {
+    const source = new EventSource(`${API_BASE}/api/stream/odds`);
+    source.addEventListener('odds', (e) => onChanges(JSON.parse((e as MessageEvent).data).changes, 'odds'));
+    source.addEventListener('snapshot', (e) => onChanges(JSON.parse((e as MessageEvent).data).lines, 'snapshot'));
+    return () => source.close();
+  },
+};
+
+// Only the listed report sections (and their inputs) are computed
+const sectionsQuery = (sections?: string[]) =>
+  sections && sections.length ? `?sections=${encodeURIComponent(sections.join(','))}` : '';
+
 // Reports API
 export const reportsApi = {
   // Get 7:50 AM report (previous day analysis)
-  get750Report: () => apiRequest<any>('/api/reports/750am'),
+  get750Report: (sections?: string[]) => apiRequest<any>(`/api/reports/750am${sectionsQuery(sections)}`),
   
   // Get 8:00 AM report (morning summary)
-  get800Report: () => apiRequest<any>('/api/reports/800am'),
+  get800Report: (sections?: string[]) => apiRequest<any>(`/api/reports/800am${sectionsQuery(sections)}`),
   
   // Get 11:00 AM report (game-day scouting)
-  get1100Report: () => apiRequest<any>('/api/reports/1100am'),
+  get1100Report: (sections?: string[]) => apiRequest<any>(`/api/reports/1100am${sectionsQuery(sections)}`),
 };
 
 // Bulls Analysis API
@@ -119,8 +162,10 @@ export const bettingApi = {
   // Get betting recommendations
   getRecommendations: () => apiRequest<any>('/api/betting-recommendations'),
   
-  // Get arbitrage opportunities
-  getArbitrageOpportunities: () => apiRequest<{opportunities: any[], count: number}>('/api/arbitrage-opportunities'),
+  // Get arbitrage opportunities (and middles) from the live odds index
+  getArbitrageOpportunities: () => apiRequest<{
+    opportunities: any[], count: number, middles?: any[], updated_at: number | null
+  }>('/api/arbitrage-opportunities'),
   
   // Calculate Kelly criterion
   calculateKelly: (estimatedProb: number, decimalOdds: number) => 
@@ -128,6 +173,54 @@ export const bettingApi = {
       `/api/kelly-calculator?estimated_prob=${estimatedProb}&decimal_odds=${decimalOdds}`
     ),
   
+  // Size many bets at once; 'simultaneous' splits one bankroll across concurrent bets
+  calculateKellyBatch: (
+    probs: number[],
+    odds: number[],
+    options: {mode?: 'independent' | 'simultaneous', fraction?: number, maxExposure?: number, bankroll?: number} = {}
+  ) => {
+    const params = new URLSearchParams({mode: options.mode ?? 'independent'});
+    if (options.fraction !== undefined) params.set('fraction', String(options.fraction));
+    if (options.maxExposure !== undefined) params.set('max_exposure', String(options.maxExposure));
+    if (options.bankroll !== undefined) params.set('bankroll', String(options.bankroll));
+    return apiRequest<{stakes: number[], total_exposure: number, amounts?: number[], [key: string]: any}>(
+      `/api/kelly-calculator/batch?${params}`, {
+        method: 'POST',
+        body: JSON.stringify({probs, odds}),
+      }
+    );
+  },
+  
+  // Monte Carlo parlay EV/hit rate (all legs form one parlay when parlays is omitted)
+  simulateParlays: (
+    legs: {probs: number[], odds: number[], parlays?: number[][], correlation?: number[][]},
+    options: {simulations?: number, seed?: number} = {}
+  ) => {
+    const params = new URLSearchParams();
+    if (options.simulations !== undefined) params.set('simulations', String(options.simulations));
+    if (options.seed !== undefined) params.set('seed', String(options.seed));
+    return apiRequest<any>(`/api/monte-carlo/parlays?${params}`, {
+      method: 'POST',
+      body: JSON.stringify(legs),
+    });
+  },
+  
+  // Monte Carlo drawdown and risk of ruin for a slate of stakes
+  simulateBankroll: (
+    bets: {probs: number[], odds: number[], stakes: number[], correlation?: number[][]},
+    options: {days?: number, paths?: number, ruinLevel?: number, seed?: number} = {}
+  ) => {
+    const params = new URLSearchParams();
+    if (options.days !== undefined) params.set('days', String(options.days));
+    if (options.paths !== undefined) params.set('paths', String(options.paths));
+    if (options.ruinLevel !== undefined) params.set('ruin_level', String(options.ruinLevel));
+    if (options.seed !== undefined) params.set('seed', String(options.seed));
+    return apiRequest<any>(`/api/monte-carlo/bankroll?${params}`, {
+      method: 'POST',
+      body: JSON.stringify(bets),
+    });
+  },
+  
   // Get performance metrics
   getPerformanceMetrics: () => apiRequest<any>('/api/performance-metrics'),
   
@@ -149,10 +242,19 @@ export const systemApi = {
   
   // Trigger roster scraping
   triggerRosterScrape: (season: string = '2025') => 
-    apiRequest<{message: string, timestamp: string, status: string}>('/api/scrape/rosters', {
+    apiRequest<{message: string, timestamp: string, status: string, job_id: string, created: boolean}>('/api/scrape/rosters', {
       method: 'POST',
       body: JSON.stringify({season}),
     }),
+
+  // Background jobs (roster scrapes) with progress
+  getJobs: (kind?: string) =>
+    apiRequest<any>(`/api/jobs${kind ? `?kind=${encodeURIComponent(kind)}` : ''}`),
+
+  getJob: (jobId: string) => apiRequest<any>(`/api/jobs/${jobId}`),
+
+  cancelJob: (jobId: string) =>
+    apiRequest<any>(`/api/jobs/${jobId}/cancel`, { method: 'POST' }),
 };
 
 // Export combined API object
@@ -160,6 +262,7 @@ export const api = {
   teams: teamsApi,
   players: playersApi,
   games: gamesApi,
+  oddsStream: oddsStreamApi,
   reports: reportsApi,
   bulls: bullsApi,
   betting: bettingApi,
@@ -73,18 +73,28 @@ export interface PerformanceMetrics {
   avg_bet_size: number;
 }
 
+export interface ArbitrageLeg {
+  outcome: string;
+  sportsbook: string;
+  odds: number;
+  point: number | null;
+  allocation: number;
+}
+
 export interface ArbitrageOpportunity {
+  type: 'arbitrage' | 'middle';
   game: string;
+  game_id: string;
+  market: 'h2h' | 'spread' | 'totals';
+  total_implied: number;
   profit_margin: number;
-  home_bet: {
-    sportsbook: string;
-    odds: number;
-    allocation: number;
-  };
-  away_bet: {
-    sportsbook: string;
-    odds: number;
-    allocation: number;
+  // Home side for h2h/spread, Over for totals
+  home_bet: ArbitrageLeg;
+  away_bet: ArbitrageLeg;
+  // Middles only: both bets win for results inside the range
+  middle?: {
+    width: number;
+    range: [number, number];
   };
 }
 
@@ -0,0 +1,27 @@
+/*
+  # Game scores and materialized team analytics
+
+  1. Changes
+    - `games`
+      - `home_score` (integer) - final home score, null until completed
+      - `away_score` (integer) - final away score, null until completed
+      - `completed` (boolean)
+
+  2. New Tables
+    - `team_analytics`
+      - `abbreviation` (text, primary key)
+      - `season` (integer) - season start year
+      - `data` (jsonb) - materialized season / form / betting aggregates
+      - `computed_at` (timestamp)
+*/
+
+ALTER TABLE public.games ADD COLUMN IF NOT EXISTS home_score integer;
+ALTER TABLE public.games ADD COLUMN IF NOT EXISTS away_score integer;
+ALTER TABLE public.games ADD COLUMN IF NOT EXISTS completed boolean DEFAULT false;
+
+CREATE TABLE IF NOT EXISTS public.team_analytics (
+  abbreviation text PRIMARY KEY,
+  season integer NOT NULL,
+  data jsonb NOT NULL,
+  computed_at timestamptz NOT NULL DEFAULT now()
+);
@@ -0,0 +1,18 @@
+/*
+  # Create cache_invalidations table
+
+  1. New Tables
+    - `cache_invalidations`
+      - `name` (text, primary key) - cache name: "reference", "team_analytics", "odds"
+      - `version` (bigint) - microsecond timestamp of the last write
+      - `updated_at` (timestamp)
+
+  Written by whichever process ingests data (worker.py or the elected API
+  worker); polled by every API process to reload its in-memory caches.
+*/
+
+CREATE TABLE IF NOT EXISTS public.cache_invalidations (
+  name text PRIMARY KEY,
+  version bigint NOT NULL,
+  updated_at timestamptz DEFAULT now()
+);
@@ -0,0 +1,45 @@
+/*
+  # Create background_jobs table
+
+  1. New Tables
+    - `background_jobs`
+      - `id` (text, primary key)
+      - `kind` (text) - job type, e.g. "roster_scrape"
+      - `key` (text) - dedupe key within a kind, e.g. the season
+      - `params` (jsonb)
+      - `status` (text) - queued, running, succeeded, failed, cancelled
+      - `progress` (jsonb) - current/total/rows/message
+      - `result` (jsonb), `error` (text)
+      - `cancel_requested` (boolean)
+      - `created_at`, `started_at`, `finished_at` (timestamp)
+
+  Any API process queues jobs here; the elected leader (or worker.py)
+  claims and runs them and writes progress back.
+
+  2. Indexes
+    - At most one queued or running job per (kind, key), so duplicate
+      submissions from different workers collapse into one job
+    - (status, created_at) for the executor's queue scan
+*/
+
+CREATE TABLE IF NOT EXISTS public.background_jobs (
+  id text PRIMARY KEY,
+  kind text NOT NULL,
+  key text NOT NULL DEFAULT '',
+  params jsonb NOT NULL DEFAULT '{}'::jsonb,
+  status text NOT NULL DEFAULT 'queued',
+  progress jsonb NOT NULL DEFAULT '{}'::jsonb,
+  result jsonb,
+  error text,
+  cancel_requested boolean NOT NULL DEFAULT false,
+  created_at timestamptz NOT NULL DEFAULT now(),
+  started_at timestamptz,
+  finished_at timestamptz
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_background_jobs_active
+  ON public.background_jobs(kind, key)
+  WHERE status IN ('queued', 'running');
+
+CREATE INDEX IF NOT EXISTS idx_background_jobs_status_created
+  ON public.background_jobs(status, created_at);